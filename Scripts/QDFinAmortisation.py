@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+from collections import namedtuple
+
+import numpy
+
+from QDFinArray import power
+from QDFinMoneyMarket import annuityDeferred
+
+# Amortisation schedules for books of loans repaid by payments at the end of each period.  Interest is the annual rate as a
+#	percentage, paid periodsPerYear times a year, so each period accrues interest / periodsPerYear percent on the balance.  The
+#	schedules are NumPy blocks with a row per loan and a column per period, padded with zeros after each loan's last period:
+#		firstLoan	index in the book of the first loan (row) in the block.
+#		payment		total paid in the period.
+#		interest	interest part of the payment.
+#		principal	principal part of the payment.
+#		balance		balance left after the payment.
+AmortisationSchedule = namedtuple("AmortisationSchedule", ["firstLoan", "payment", "interest", "principal", "balance"]);
+
+# Cashflows of a whole book summed over the loans, one value per period.
+BookProjection = namedtuple("BookProjection", ["payment", "interest", "principal", "balance"]);
+
+# Level payment for each loan, annuityDeferred on the periodic rate, or an equal share of the principal when the rate is 0.
+def levelPayment(principals, periodRates, numPeriods):
+	with numpy.errstate(invalid="ignore", divide="ignore"):
+		return numpy.where(periodRates == 0.0, principals / numPeriods, annuityDeferred(principals, periodRates * 100.0, numPeriods));
+
+# Level payment schedules in closed form.  The balance after t payments is P(1 + r)^t - A((1 + r)^t - 1) / r, the interest in a
+#	period is r times the balance before it and the rest of the payment is principal.  The last payment clears whatever balance
+#	remains, so rounding never leaves a few cents owing.
+def levelPaymentSchedule(principals, interests, numPeriods, periodsPerYear=12, firstLoan=0):
+	principals = numpy.asarray(principals, dtype=numpy.float64);
+	periodRates = numpy.broadcast_to(numpy.asarray(interests, dtype=numpy.float64) / (100.0 * periodsPerYear), principals.shape);
+	numPeriods = numpy.broadcast_to(numpy.asarray(numPeriods), principals.shape);
+	payments = levelPayment(principals, periodRates, numPeriods);
+
+	periods = numpy.arange(1, int(numpy.max(numPeriods)) + 1);
+	rates = periodRates[:, numpy.newaxis];
+	growth = power(1.0 + rates, periods);
+	with numpy.errstate(invalid="ignore", divide="ignore"):
+		balance = numpy.where(rates == 0.0, principals[:, numpy.newaxis] - payments[:, numpy.newaxis] * periods, principals[:, numpy.newaxis] * growth - payments[:, numpy.newaxis] * (growth - 1.0) / rates);
+	previousBalance = numpy.concatenate((principals[:, numpy.newaxis], balance[:, :-1]), axis=1);
+
+	active = periods <= numPeriods[:, numpy.newaxis];
+	last = periods == numPeriods[:, numpy.newaxis];
+	interest = numpy.where(active, rates * previousBalance, 0.0);
+	principal = numpy.where(last, previousBalance, numpy.where(active, payments[:, numpy.newaxis] - interest, 0.0));
+	balance = numpy.where(active & ~last, balance, 0.0);
+	return AmortisationSchedule(firstLoan, interest + principal, interest, principal, balance);
+
+# Schedules for loans whose rate changes every period, such as floating rate loans, with interests as a (loan x period) array of
+#	annual rates.  Each period the payment is worked out again from annuityDeferred on the remaining balance and term, so the
+#	loans are stepped forward a period at a time, all of the loans at once.
+def floatingRateSchedule(principals, interests, numPeriods, periodsPerYear=12, firstLoan=0):
+	principals = numpy.asarray(principals, dtype=numpy.float64);
+	periodRates = numpy.asarray(interests, dtype=numpy.float64) / (100.0 * periodsPerYear);
+	numPeriods = numpy.broadcast_to(numpy.asarray(numPeriods), principals.shape);
+	maxPeriods = int(numpy.max(numPeriods));
+
+	payment = numpy.zeros((len(principals), maxPeriods));
+	interest = numpy.zeros((len(principals), maxPeriods));
+	principal = numpy.zeros((len(principals), maxPeriods));
+	balance = numpy.zeros((len(principals), maxPeriods));
+	remainingBalance = principals.copy();
+	for period in range(maxPeriods):
+		active = period < numPeriods;
+		rates = periodRates[:, period];
+		interest[:, period] = numpy.where(active, rates * remainingBalance, 0.0);
+		principal[:, period] = numpy.where(active, levelPayment(remainingBalance, rates, numpy.maximum(numPeriods - period, 1)) - interest[:, period], 0.0);
+		principal[:, period] = numpy.where(period == numPeriods - 1, remainingBalance, principal[:, period]);
+		remainingBalance = remainingBalance - principal[:, period];
+		payment[:, period] = interest[:, period] + principal[:, period];
+		balance[:, period] = numpy.where(active, remainingBalance, 0.0);
+	return AmortisationSchedule(firstLoan, payment, interest, principal, balance);
+
+# Generate the schedules for a book of loans chunkSize loans at a time, so a book of millions of loans can be written out or
+#	summed without holding all of it in memory.  A single annual rate per loan uses the closed form, a (loan x period) array
+#	of rates steps the loans through floatingRateSchedule.
+def amortisationSchedules(principals, interests, numPeriods, periodsPerYear=12, chunkSize=1000):
+	principals = numpy.asarray(principals, dtype=numpy.float64);
+	interests = numpy.asarray(interests, dtype=numpy.float64);
+	numPeriods = numpy.broadcast_to(numpy.asarray(numPeriods), principals.shape);
+	floating = interests.ndim == 2;
+	if not floating:
+		interests = numpy.broadcast_to(interests, principals.shape);
+
+	for start in range(0, len(principals), chunkSize):
+		rows = slice(start, start + chunkSize);
+		if floating:
+			yield floatingRateSchedule(principals[rows], interests[rows], numPeriods[rows], periodsPerYear, start);
+		else:
+			yield levelPaymentSchedule(principals[rows], interests[rows], numPeriods[rows], periodsPerYear, start);
+
+# Project the cashflows of a whole book, summing each period over all of the loans, a chunk of schedules at a time.
+def bookCashflowProjection(principals, interests, numPeriods, periodsPerYear=12, chunkSize=1000):
+	maxPeriods = int(numpy.max(numPeriods));
+	totals = [numpy.zeros(maxPeriods) for field in range(4)];
+	for schedule in amortisationSchedules(principals, interests, numPeriods, periodsPerYear, chunkSize):
+		for field in range(4):
+			block = schedule[field + 1];
+			totals[field][:block.shape[1]] += numpy.sum(block, axis=0);
+	return BookProjection(*totals);
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import math
+
+import numpy
+
+# Helpers which let the pricing functions accept either Python scalars or NumPy arrays.  Scalars are sent through the math 
+#	module exactly as before, so existing results don't move, arrays go through the equivalent NumPy ufunc and broadcast.
+
+# Check whether any of the values is an array, in which case the vectorised path should be used.
+def isArray(*values):
+	for value in values:
+		if isinstance(value, numpy.ndarray):
+			return True;
+	return False;
+
+# x raised to the power y.
+def power(x, y):
+	if isArray(x, y):
+		return numpy.power(x, y);
+	return math.pow(x, y);
+
+# Natural log of x.
+def log(x):
+	if isArray(x):
+		return numpy.log(x);
+	return math.log(x);
+
+# e raised to the power x.
+def exp(x):
+	if isArray(x):
+		return numpy.exp(x);
+	return math.exp(x);
+
+# Square root of x.
+def sqrt(x):
+	if isArray(x):
+		return numpy.sqrt(x);
+	return math.sqrt(x);
+
+# Natural log of 1 + x, accurate for small x.
+def log1p(x):
+	if isArray(x):
+		return numpy.log1p(x);
+	return math.log1p(x);
+
+# e raised to the power x, minus 1, accurate for small x.
+def expm1(x):
+	if isArray(x):
+		return numpy.expm1(x);
+	return math.expm1(x);
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import datetime
+import os
+
+from collections import namedtuple
+
+import numpy
+
+from QDFinDayCount import toDates
+from QDFinDayCount import toDayNumbers
+
+#	Business day calendars.  A calendar covers a fixed range of years and stores:
+#		bitmap			one bit per calendar day, set for business days (packed, so 100 years is under 5KB).
+#		prefixCounts	prefixCounts[i] is the number of business days before day i of the range.
+#		businessDays	the day numbers of every business day in order, so the n-th business day is a single lookup.
+#	With these, counting, rolling and adding business days are all constant time lookups, and each of them work on whole
+#	arrays of dates at once.
+#
+#	Calendars can be loaded from .cal files, see Calendars/ next to this script.  Each line of the file is one of:
+#		name NAME					name of the calendar
+#		years FIRST LAST			range of years covered
+#		weekend DAY [DAY...]		weekend days, Mon Tue Wed Thu Fri Sat Sun
+#		fixed MM-DD [observed]		holiday on the same day each year, optionally moved to the next free business day
+#		nth MM N DAY				N-th weekday of the month, a negative N counts back from the end of the month
+#		easter OFFSET				holiday a number of days from Easter Sunday
+#		date YYYY-MM-DD				one-off holiday
+#	Anything after a # is a comment.
+
+WEEKDAY_NAMES = ["MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN"];
+
+def calendarDirectory():
+	return os.path.join(os.path.dirname(os.path.abspath(__file__)), "Calendars");
+
+# Get Easter Sunday for a year, using the anonymous Gregorian algorithm.
+def easterSunday(year):
+	a = year % 19;
+	b = year // 100;
+	c = year % 100;
+	d = (19 * a + b - b // 4 - ((b - (b + 8) // 25 + 1) // 3) + 15) % 30;
+	e = (32 + 2 * (b % 4) + 2 * (c // 4) - d - (c % 4)) % 7;
+	f = d + e - 7 * ((a + 11 * d + 22 * e) // 451) + 114;
+	return datetime.date(year, f // 31, f % 31 + 1);
+
+# Get the N-th given weekday of a month, where N of -1 is the last one in the month.
+def nthWeekdayOfMonth(year, month, n, weekday):
+	if n > 0:
+		first = datetime.date(year, month, 1);
+		return first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1));
+	nextMonth = datetime.date(year + month // 12, month % 12 + 1, 1);
+	last = nextMonth - datetime.timedelta(days=1);
+	return last - datetime.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1));
+
+class BusinessDayCalendar(object):
+	def __init__(self, name, holidays, weekend=(5, 6), firstYear=1970, lastYear=2100):
+		self.name = name;
+		self.firstYear = firstYear;
+		self.lastYear = lastYear;
+		self.weekend = tuple(weekend);
+
+		self.firstDay = int(toDayNumbers(datetime.date(firstYear, 1, 1)));
+		self.endDay = int(toDayNumbers(datetime.date(lastYear + 1, 1, 1)));
+		dayNumbers = numpy.arange(self.firstDay, self.endDay);
+
+		# 1970-01-01 was a Thursday, so shift by 3 to get Monday as 0.
+		weekdays = (dayNumbers + 3) % 7;
+		isBusinessDay = ~numpy.isin(weekdays, self.weekend);
+		holidayNumbers = toDayNumbers(list(holidays)) if len(holidays) > 0 else numpy.zeros(0, dtype=numpy.int64);
+		holidayNumbers = holidayNumbers[(holidayNumbers >= self.firstDay) & (holidayNumbers < self.endDay)];
+		isBusinessDay[holidayNumbers - self.firstDay] = False;
+
+		self.numDays = len(dayNumbers);
+		self.bitmap = numpy.packbits(isBusinessDay);
+		self.prefixCounts = numpy.zeros(self.numDays + 1, dtype=numpy.int32);
+		numpy.cumsum(isBusinessDay, out=self.prefixCounts[1:]);
+		self.businessDays = dayNumbers[isBusinessDay];
+
+	def __repr__(self):
+		return "BusinessDayCalendar(" + self.name + ", " + str(self.firstYear) + "-" + str(self.lastYear) + ")";
+
+	def dayIndex(self, dates):
+		# Offset of each date into the calendar range, checking that all of the dates are covered.
+		index = toDayNumbers(dates) - self.firstDay;
+		if numpy.any(index < 0) or numpy.any(index >= self.numDays):
+			raise ValueError("Dates outside of calendar " + self.name + " range " + str(self.firstYear) + "-" + str(self.lastYear));
+		return index;
+
+	def businessDayFromRank(self, rank):
+		# The business day with the given count of business days before it.
+		if numpy.any(rank < 0) or numpy.any(rank >= len(self.businessDays)):
+			raise ValueError("Business day outside of calendar " + self.name + " range");
+		return self.businessDays[rank].astype('datetime64[D]');
+
+	def isBusinessDay(self, dates):
+		index = self.dayIndex(dates);
+		return ((self.bitmap[index >> 3] >> (7 - (index & 7))) & 1).astype(bool);
+
+	def isHoliday(self, dates):
+		return ~self.isBusinessDay(dates);
+
+	def businessDaysBetween(self, startDates, endDates):
+		# Number of business days from the start date up to, but not including, the end date.  Negative if end is before start.
+		return self.prefixCounts[self.dayIndex(endDates)] - self.prefixCounts[self.dayIndex(startDates)];
+
+	def businessDaysInYear(self, year):
+		# Number of business days in a calendar year, which can be used for the days argument to historicVolatility.
+		if year < self.firstYear or year > self.lastYear:
+			raise ValueError("Year " + str(year) + " outside of calendar " + self.name + " range");
+		start = int(toDayNumbers(datetime.date(year, 1, 1))) - self.firstDay;
+		end = int(toDayNumbers(datetime.date(year + 1, 1, 1))) - self.firstDay;
+		return int(self.prefixCounts[end] - self.prefixCounts[start]);
+
+	def rollFollowing(self, dates):
+		# Roll to the next business day, dates which are already business days are unchanged.
+		return self.businessDayFromRank(self.prefixCounts[self.dayIndex(dates)]);
+
+	def rollPreceding(self, dates):
+		# Roll back to the previous business day, dates which are already business days are unchanged.
+		return self.businessDayFromRank(self.prefixCounts[self.dayIndex(dates) + 1] - 1);
+
+	def rollModifiedFollowing(self, dates):
+		# Roll to the next business day, unless it is in the next month in which case roll back to the previous business day.
+		dates = toDates(dates);
+		following = self.rollFollowing(dates);
+		sameMonth = following.astype('datetime64[M]') == dates.astype('datetime64[M]');
+		if numpy.all(sameMonth):
+			return following;
+		return numpy.where(sameMonth, following, self.rollPreceding(dates));
+
+	def addBusinessDays(self, dates, numDays):
+		# Move forward (or backward for negative numDays) a number of business days.  Adding zero days rolls following.
+		index = self.dayIndex(dates);
+		numDays = numpy.asarray(numDays);
+		forward = self.prefixCounts[index + 1] - 1 + numDays;
+		backward = self.prefixCounts[index] + numDays;
+		return self.businessDayFromRank(numpy.where(numDays > 0, forward, backward));
+
+# Parse a .cal file into a calendar.
+def readCalendar(path):
+	name = os.path.splitext(os.path.basename(path))[0].upper();
+	firstYear = 1970;
+	lastYear = 2100;
+	weekend = [5, 6];
+	rules = [];
+
+	with open(path) as calendarFile:
+		for line in calendarFile:
+			fields = line.split("#")[0].split();
+			if len(fields) == 0:
+				continue;
+			key = fields[0].lower();
+			if key == "name":
+				name = fields[1];
+			elif key == "years":
+				firstYear = int(fields[1]);
+				lastYear = int(fields[2]);
+			elif key == "weekend":
+				weekend = [WEEKDAY_NAMES.index(day[:3].upper()) for day in fields[1:]];
+			elif key in ("fixed", "nth", "easter", "date"):
+				rules.append(fields);
+			else:
+				raise ValueError("Unknown calendar rule " + line.strip() + " in " + path);
+
+	holidays = set();
+	for fields in rules:
+		key = fields[0].lower();
+		if key == "date":
+			holidays.add(datetime.datetime.strptime(fields[1], "%Y-%m-%d").date());
+			continue;
+		for year in range(firstYear, lastYear + 1):
+			if key == "fixed":
+				month, day = [int(value) for value in fields[1].split("-")];
+				holiday = datetime.date(year, month, day);
+				if len(fields) > 2 and fields[2].lower() == "observed":
+					while holiday.weekday() in weekend or holiday in holidays:
+						holiday += datetime.timedelta(days=1);
+			elif key == "nth":
+				holiday = nthWeekdayOfMonth(year, int(fields[1]), int(fields[2]), WEEKDAY_NAMES.index(fields[3][:3].upper()));
+			else:
+				holiday = easterSunday(year) + datetime.timedelta(days=int(fields[1]));
+			holidays.add(holiday);
+
+	return BusinessDayCalendar(name, sorted(holidays), weekend, firstYear, lastYear);
+
+loadedCalendars = {};
+
+# Load a calendar by name from the Calendars directory, or from a path to a .cal file.  Calendars are only built once.
+def loadCalendar(name):
+	path = name;
+	if not os.path.exists(path):
+		path = os.path.join(calendarDirectory(), name.upper() + ".cal");
+	path = os.path.abspath(path);
+	if path not in loadedCalendars:
+		if not os.path.exists(path):
+			raise ValueError("Unknown calendar " + name);
+		loadedCalendars[path] = readCalendar(path);
+	return loadedCalendars[path];
+
+# List the names of the calendars shipped in the Calendars directory.
+def availableCalendars():
+	return sorted(os.path.splitext(item)[0] for item in os.listdir(calendarDirectory()) if item.endswith(".cal"));
+
+# Coupon schedule of a bond or CD from couponSchedule.  The day counts are in the form taken by dirtyBondPrice, Bond and
+#	BondUniverse (numCouponPaymentsRemaining, daysSinceLastCoupon, daysToNextCoupon) and by certificateOfDepositMultiCouponPrice
+#	and certificateOfDepositBook (daysToNextCoupon as daysBetweenPurchaseAndNextCoupon, daysToNextCoupons).
+CouponSchedule = namedtuple("CouponSchedule", ["paymentDates", "previousCouponDate", "numCouponPaymentsRemaining", "daysSinceLastCoupon", "daysToNextCoupon", "daysToNextCoupons"]);
+
+ROLL_CONVENTIONS = {"following": "rollFollowing", "preceding": "rollPreceding", "modifiedfollowing": "rollModifiedFollowing"};
+
+# Coupon dates numPeriods steps of step months back from maturity, oldest first, keeping the day of month of maturity clamped
+#	to the end of shorter months, or the last day of every month for a maturity on the last day of its month.
+def unrolledCouponDates(maturity, step, numPeriods):
+	maturityMonth = maturity.astype('datetime64[M]');
+	months = maturityMonth - step * numpy.arange(numPeriods)[::-1];
+	monthStarts = months.astype('datetime64[D]');
+	monthLengths = ((months + 1).astype('datetime64[D]') - monthStarts).astype(numpy.int64);
+	day = int((maturity - maturityMonth.astype('datetime64[D]')).astype(numpy.int64)) + 1;
+	if day == monthLengths[-1]:
+		return monthStarts + monthLengths - 1;
+	return monthStarts + numpy.minimum(day, monthLengths) - 1;
+
+# Get the coupon dates of a bond or CD paying couponFrequency coupons a year, stepping back 12/couponFrequency months at a time
+#	from maturity as in unrolledCouponDates until the coupon on or before settlement.  When a calendar (or the name of one for
+#	loadCalendar) is given, every coupon date is rolled to a business day with the roll convention, "following", "preceding" or
+#	"modifiedFollowing", and the day counts are taken between the rolled payment dates.
+def couponSchedule(settlementDate, maturityDate, couponFrequency, calendar=None, roll="modifiedFollowing"):
+	settlement = toDates(settlementDate);
+	maturity = toDates(maturityDate);
+	if couponFrequency <= 0 or 12 % couponFrequency != 0:
+		raise ValueError("Coupon frequency must divide 12 months, not " + str(couponFrequency));
+	if maturity <= settlement:
+		raise ValueError("Maturity " + str(maturity) + " must be after settlement " + str(settlement));
+	if roll.lower() not in ROLL_CONVENTIONS:
+		raise ValueError("Unknown roll convention " + roll);
+
+	if calendar is not None:
+		if isinstance(calendar, str):
+			calendar = loadCalendar(calendar);
+		rollDates = getattr(calendar, ROLL_CONVENTIONS[roll.lower()]);
+
+	# Start with enough periods that the first coupon month is before the settlement month, and add periods while rolling has
+	#	moved the first coupon past settlement, so there is always a coupon on or before settlement.
+	step = 12 // int(couponFrequency);
+	maturityMonth = maturity.astype('datetime64[M]');
+	numPeriods = int((maturityMonth - settlement.astype('datetime64[M]')).astype(numpy.int64)) // step + 2;
+	while True:
+		dates = unrolledCouponDates(maturity, step, numPeriods);
+		if calendar is not None:
+			dates = rollDates(dates);
+		if dates[0] <= settlement:
+			break;
+		numPeriods += 1;
+
+	# A coupon paid on the settlement date belongs to the seller, so the next coupon is the one after it.
+	nextCoupon = int(numpy.searchsorted(dates, settlement, side='right'));
+	paymentDates = dates[nextCoupon:];
+	previousCouponDate = dates[nextCoupon - 1];
+	daysToNextCoupons = numpy.diff(dates[nextCoupon - 1:]).astype(numpy.int64);
+	return CouponSchedule(paymentDates, previousCouponDate, len(paymentDates), int((settlement - previousCouponDate).astype(numpy.int64)), int((paymentDates[0] - settlement).astype(numpy.int64)), daysToNextCoupons);
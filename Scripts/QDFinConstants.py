@@ -34,13 +34,19 @@ def ACT365_DAYS_IN_YEAR():
 	# Bond market basis, number of days in year.
 	return 365;
 
-def ACTACT_DAYS_IN_YEAR():
-	# ACT/ACT days in year... currently set to 366... needs current year to give full result.
-	return 366;
+def ACTACT_DAYS_IN_YEAR(year=None):
+	# ACT/ACT days in year... the actual length of the year if one is given, otherwise 366.  Use a DayCountACTACTISDA from
+	#	QDFinDayCount to get year fractions for dates which span more than one year.
+	if year is None:
+		return 366;
+	if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+		return 366;
+	return 365;
 
 def ACT360_DAYS_IN_YEAR():
 	# Money market basis, number of days in year.
 	return 360;
 
 def WORKING_DAYS_IN_YEAR():
+	# Typical number of business days in a year, see QDFinCalendar for the actual count for a market and year.
 	return 252;
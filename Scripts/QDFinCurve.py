@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+from collections import namedtuple
+
+import math
+
+import numpy
+
+from QDFinArray import isArray
+from QDFinArray import log
+from QDFinArray import expm1
+
+from QDFinConstants import DEFAULT_BASIS_DAYS
+
+from QDFinDayCount import daysInYearFromBasis
+
+from QDFinInterest import simpleInterestRate
+
+from QDFinInterestRateInstruments import bondYield
+from QDFinInterestRateInstruments import dirtyBondPrice
+from QDFinInterestRateInstruments import forwardRateYieldFromFuturesPrice
+
+from QDFinStatistics import CurveInterpolator
+
+# The instruments a YieldCurve is bootstrapped from, with days counted from the curve date.  Rates and yields are percentages.
+#	Deposit						a deposit from today at a simple rate, as simpleInterestRate.
+#	ForwardRateAgreement		a forward forward rate between two future dates, as forwardForwardRate.
+#	InterestRateFuture			a STIR future price, whose rate over the contract period is forwardRateYieldFromFuturesPrice.
+#	CurveBond					a level coupon bond of 100 notional priced at its yield by dirtyBondPrice, with coupons every
+#								daysInYear / couponFrequency days from the next coupon, the last of them at maturity.
+Deposit = namedtuple("Deposit", ["rate", "days"]);
+ForwardRateAgreement = namedtuple("ForwardRateAgreement", ["rate", "startDays", "endDays"]);
+InterestRateFuture = namedtuple("InterestRateFuture", ["price", "startDays", "endDays"]);
+CurveBond = namedtuple("CurveBond", ["couponRate", "marketYield", "couponFrequency", "numCouponPaymentsRemaining", "daysToNextCoupon"]);
+
+# The field of each instrument that is quoted in the market, and ticks.
+QUOTE_FIELDS = {Deposit: "rate", ForwardRateAgreement: "rate", InterestRateFuture: "price", CurveBond: "marketYield"};
+
+def instrumentPeriod(instrument, daysInYear):
+	# The first and last day that an instrument depends on the curve for.
+	if isinstance(instrument, Deposit):
+		return 0, instrument.days;
+	if isinstance(instrument, (ForwardRateAgreement, InterestRateFuture)):
+		return instrument.startDays, instrument.endDays;
+	if isinstance(instrument, CurveBond):
+		return 0, instrument.daysToNextCoupon + (instrument.numCouponPaymentsRemaining - 1) * daysInYear / instrument.couponFrequency;
+	raise ValueError("Unknown curve instrument " + str(instrument));
+
+def instrumentRate(instrument):
+	# The quoted rate of a money market instrument, or the yield of a bond, as a percentage.
+	if isinstance(instrument, Deposit):
+		return instrument.rate;
+	if isinstance(instrument, ForwardRateAgreement):
+		return instrument.rate;
+	if isinstance(instrument, InterestRateFuture):
+		return forwardRateYieldFromFuturesPrice(instrument.price);
+	return instrument.marketYield;
+
+# A discount curve bootstrapped from a mixed set of deposits, FRAs, STIR futures and bonds, with a knot at the curve date and at
+#	the maturity of each instrument, which must all be different.  The log of the discount factor is linear in time between
+#	the knots (flat forward rates), carrying on from the last segment past the end of the curve.
+#
+#	The money market instruments are solved in stages, with every instrument that starts on the part of the curve already
+#	built, or on the maturity of the instrument before it (a strip of futures), done at once by adding the logs of their growth
+#	factors along each strip.  Each bond adds a knot whose discount factor is found by Newton's method, so that the coupons
+#	discounted on the curve add up to its dirtyBondPrice.  Instruments that start after the end of the curve built before
+#	them, rather than on it, can't be solved and raise a ValueError.
+#
+#	Which knots each quote feeds into only depends on the days of the instruments, so it is worked out once, along with the
+#	stages.  When a quote ticks, updateQuote re-solves just the stages and bonds at or after it with a knot that depends on it,
+#	which gives exactly the same curve as a full build, and bumps the version.  knotVersions holds the version each knot last
+#	changed at, and changedSince gives the first day whose discount factor may have changed since a version, so caches of
+#	discount factors before that day can be kept.
+class YieldCurve(object):
+	def __init__(self, instruments, daysInYear=DEFAULT_BASIS_DAYS()):
+		self.daysInYear = daysInYearFromBasis(daysInYear);
+		periods = [instrumentPeriod(instrument, self.daysInYear) for instrument in instruments];
+		order = sorted(range(len(instruments)), key=lambda index: periods[index][1]);
+		self.instruments = [instruments[index] for index in order];
+
+		self.startDays = numpy.array([periods[index][0] for index in order], dtype=numpy.float64);
+		self.endDays = numpy.array([periods[index][1] for index in order], dtype=numpy.float64);
+		self.rates = numpy.array([instrumentRate(instrument) for instrument in self.instruments], dtype=numpy.float64);
+		self.isBond = numpy.array([isinstance(instrument, CurveBond) for instrument in self.instruments], dtype=bool);
+		if len(self.instruments) == 0:
+			raise ValueError("A yield curve needs at least one instrument");
+		if self.endDays[0] <= 0 or numpy.any(self.endDays[1:] <= self.endDays[:-1]):
+			raise ValueError("Curve instruments should mature on different days after the curve date");
+		if numpy.any(self.startDays < 0) or numpy.any(self.startDays >= self.endDays):
+			raise ValueError("Curve instruments should start on or after the curve date and before they mature");
+
+		# Whether each instrument starts on the maturity of the one before, so it can be solved in the same stage.
+		self.chained = numpy.zeros(len(self.instruments), dtype=bool);
+		self.chained[1:] = (self.startDays[1:] == self.endDays[:-1]) & ~self.isBond[1:] & ~self.isBond[:-1];
+		self.knotDays = numpy.concatenate(([0.0], self.endDays));
+
+		# The cashflows of each bond split into those on the curve before its maturity knot, and those after the knot before it,
+		#	with their weights along the new segment.
+		self.bondSchedules = {};
+		for index in numpy.nonzero(self.isBond)[0]:
+			bond = self.instruments[index];
+			coupons = numpy.arange(bond.numCouponPaymentsRemaining);
+			days = bond.daysToNextCoupon + coupons * self.daysInYear / bond.couponFrequency;
+			cashflows = numpy.full(len(coupons), bond.couponRate / bond.couponFrequency);
+			cashflows[-1] += 100;
+			known = (days <= self.knotDays[index]);
+			weights = (days[~known] - self.knotDays[index]) / (self.endDays[index] - self.knotDays[index]);
+			self.bondSchedules[index] = (days[known], cashflows[known], cashflows[~known], weights);
+
+		self.logDiscountFactors = numpy.zeros(len(self.knotDays));
+		self.planStages();
+		self.version = 0;
+		self.knotVersions = numpy.zeros(len(self.knotDays), dtype=numpy.int64);
+		self.build();
+
+	def __len__(self):
+		return len(self.instruments);
+
+	def knotsUsed(self, days, lastKnot):
+		# The knots up to lastKnot that interpolating the log discount factor at each of the days reads.
+		lower = numpy.searchsorted(self.knotDays[:lastKnot + 1], days, side="right") - 1;
+		between = (self.knotDays[lower] != days);
+		return numpy.concatenate((lower, lower[between] + 1));
+
+	def planStages(self):
+		# Split the instruments into the stages solved together, as (first, last) index ranges with a bond on its own, and mark in
+		#	dependencies[knot, instrument] the quotes that each knot depends on.
+		count = len(self.instruments);
+		self.stages = [];
+		self.dependencies = numpy.zeros((count + 1, count), dtype=bool);
+		first = 0;
+		while first < count:
+			if self.isBond[first]:
+				used = self.knotsUsed(self.bondSchedules[first][0], first);
+				self.dependencies[first + 1] = numpy.any(self.dependencies[used], axis=0) | self.dependencies[first];
+				self.dependencies[first + 1, first] = True;
+				self.stages.append((first, first + 1));
+				first += 1;
+				continue;
+
+			curveEnd = self.knotDays[first];
+			last = first;
+			while last < count and not self.isBond[last] and (self.startDays[last] <= curveEnd or (last > first and self.chained[last])):
+				if self.startDays[last] <= curveEnd:
+					self.dependencies[last + 1] = numpy.any(self.dependencies[self.knotsUsed(self.startDays[last:last + 1], first)], axis=0);
+				else:
+					self.dependencies[last + 1] = self.dependencies[last];
+				self.dependencies[last + 1, last] = True;
+				last += 1;
+			if last == first:
+				raise ValueError("Curve instrument " + str(self.instruments[first]) + " starts after the curve built before it ends");
+			self.stages.append((first, last));
+			first = last;
+		self.stageFirsts = numpy.array([first for first, last in self.stages]);
+
+	def build(self):
+		# Bootstrap every knot of the curve from the instrument quotes.
+		self.solve(self.stages);
+
+	def solve(self, stages):
+		# Solve the knots of each of the stages in turn, with the knots before them already solved.
+		for first, last in stages:
+			if self.isBond[first]:
+				self.solveBond(first);
+			else:
+				self.solveStage(first, last);
+		self.interpolator = CurveInterpolator(self.knotDays / self.daysInYear, numpy.exp(self.logDiscountFactors), "logLinear");
+
+	def updateQuote(self, index, quote):
+		# Set the quote of self.instruments[index], its rate, FRA rate, futures price or bond yield, and re-solve the knots that
+		#	depend on it.  Returns the number of knots re-solved.
+		instrument = self.instruments[index];
+		self.instruments[index] = instrument._replace(**{QUOTE_FIELDS[type(instrument)]: quote});
+		self.rates[index] = instrumentRate(self.instruments[index]);
+
+		affected = self.dependencies[:, index];
+		affectedStages = numpy.logical_or.reduceat(affected[1:], self.stageFirsts);
+		self.solve([self.stages[stage] for stage in numpy.nonzero(affectedStages)[0]]);
+		self.version += 1;
+		self.knotVersions[affected] = self.version;
+		return int(numpy.count_nonzero(affected));
+
+	def updateBondPrice(self, index, dirtyPrice):
+		# Set the quote of the bond self.instruments[index] from its dirty price, through bondYield.
+		bond = self.instruments[index];
+		marketYield = bondYield(100, dirtyPrice, bond.couponRate, bond.couponFrequency, bond.numCouponPaymentsRemaining, bond.daysToNextCoupon, self.daysInYear);
+		return self.updateQuote(index, marketYield);
+
+	def changedSince(self, version):
+		# The first day whose discount factor may have changed since the curve was at version, or infinity if none have.
+		changed = numpy.nonzero(self.knotVersions > version)[0];
+		if len(changed) == 0:
+			return float("inf");
+		return float(self.knotDays[changed[0] - 1]);
+
+	def solveStage(self, first, last):
+		# Solve a run of money market instruments that start on the curve so far or on the maturity of the one before.
+		curveEnd = self.knotDays[first];
+		starts = self.startDays[first:last];
+		growth = numpy.log(simpleInterestRate(self.rates[first:last], self.endDays[first:last] - starts, self.daysInYear));
+		anchored = (starts <= curveEnd);
+		values = numpy.empty(last - first);
+		values[anchored] = numpy.interp(starts[anchored], self.knotDays[:first + 1], self.logDiscountFactors[:first + 1]) - growth[anchored];
+
+		# Carry along each strip a step at a time, for all of the strips at once, so each knot only sees its own strip.
+		positions = numpy.arange(last - first);
+		positions -= numpy.maximum.accumulate(numpy.where(anchored, positions, 0));
+		for position in range(1, positions.max() + 1):
+			at = numpy.nonzero(positions == position)[0];
+			values[at] = values[at - 1] - growth[at];
+		self.logDiscountFactors[first + 1:last + 1] = values;
+
+	def solveBond(self, index, maxIterations=50):
+		# Solve the discount factor at a bond's maturity, with coupons falling after the last knot so far interpolated between it
+		#	and the new knot.
+		bond = self.instruments[index];
+		knownDays, knownCashflows, newCashflows, weights = self.bondSchedules[index];
+		dirtyPrice = dirtyBondPrice(100, bond.couponRate, self.rates[index], bond.couponFrequency, bond.numCouponPaymentsRemaining, bond.daysToNextCoupon, self.daysInYear);
+		knownValue = knownCashflows.dot(numpy.exp(numpy.interp(knownDays, self.knotDays[:index + 1], self.logDiscountFactors[:index + 1])));
+		lastLog = self.logDiscountFactors[index];
+
+		logDiscountFactor = -math.log1p(self.rates[index] * 0.01) * self.endDays[index] / self.daysInYear;
+		for iteration in range(maxIterations):
+			values = newCashflows * numpy.exp(lastLog + weights * (logDiscountFactor - lastLog));
+			step = (knownValue + values.sum() - dirtyPrice) / values.dot(weights);
+			logDiscountFactor -= step;
+			if abs(step) < 1e-15:
+				break;
+		self.logDiscountFactors[index + 1] = logDiscountFactor;
+
+	def discountFactor(self, days):
+		# The discount factor for each of the days from the curve date.
+		return self.interpolator(days / self.daysInYear);
+
+	def zeroRate(self, days):
+		# The annually compounded zero rate to each of the days as a percentage, with the rate over the first segment at day 0.
+		discountFactors = self.discountFactor(days);
+		shortRate = expm1(-self.interpolator.slopeList[0]) * 100;
+		if isArray(discountFactors):
+			with numpy.errstate(divide="ignore", invalid="ignore"):
+				return numpy.where(days == 0, shortRate, expm1(-numpy.log(discountFactors) * self.daysInYear / days) * 100);
+		if days == 0:
+			return shortRate;
+		return expm1(-log(discountFactors) * self.daysInYear / days) * 100;
+
+	def forwardRate(self, startDays, endDays):
+		# The simple forward rate between the start and end days as a percentage, as forwardForwardRate.
+		return (self.discountFactor(startDays) / self.discountFactor(endDays) - 1) * (self.daysInYear / (endDays - startDays)) * 100;
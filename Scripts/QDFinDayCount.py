@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import datetime
+
+import numpy
+
+from QDFinConstants import ACT365_DAYS_IN_YEAR
+from QDFinConstants import ACT360_DAYS_IN_YEAR
+from QDFinConstants import ACTACT_DAYS_IN_YEAR
+
+#	Day count conventions work from real start and end dates, given as datetime.date, numpy.datetime64, ISO strings or
+#	arrays/lists of any of those.  All of the calculations are vectorised, so a whole schedule of dates is handled in one call.
+#	Any pricing function with a daysInYear argument will also take one of the convention objects below in its place.
+
+# Convert dates into a numpy datetime64[D] array (or scalar), so that they can be used for day arithmetic.
+def toDates(dates):
+	if isinstance(dates, datetime.datetime):
+		dates = dates.date();
+	return numpy.asarray(dates, dtype='datetime64[D]');
+
+# Convert dates into integer day numbers counted from 1970-01-01.
+def toDayNumbers(dates):
+	return toDates(dates).astype(numpy.int64);
+
+# Calendar lookup tables shared by all of the conventions.  The tables are built once for a range of years and only grown if a
+#	date falls outside of them, so repeated valuations of the same schedules don't redo any of the calendar arithmetic:
+#		yearStarts[y]	day number of the 1st of January of each year, with one extra entry for the year after the last.
+#		yearLengths[y]	number of days in each year.
+#		year/month/day	calendar fields for every day number in the table range, for the 30/360 family.
+class DayCountTables(object):
+	def __init__(self, firstYear=1900, lastYear=2200):
+		self.build(firstYear, lastYear);
+
+	def build(self, firstYear, lastYear):
+		years = numpy.arange(firstYear, lastYear + 2) - 1970;
+		starts = years.astype('datetime64[Y]').astype('datetime64[D]').astype(numpy.int64);
+
+		self.firstYear = firstYear;
+		self.lastYear = lastYear;
+		self.yearStarts = starts;
+		self.yearLengths = numpy.diff(starts);
+
+		dayNumbers = numpy.arange(starts[0], starts[-1]);
+		dates = dayNumbers.astype('datetime64[D]');
+		monthStarts = dates.astype('datetime64[M]');
+		self.firstDay = int(starts[0]);
+		self.years = (dates.astype('datetime64[Y]').astype(numpy.int64) + 1970).astype(numpy.int16);
+		self.months = (monthStarts.astype(numpy.int64) % 12 + 1).astype(numpy.int8);
+		self.days = ((dates - monthStarts.astype('datetime64[D]')).astype(numpy.int64) + 1).astype(numpy.int8);
+
+	def ensure(self, dayNumbers):
+		# Grow the tables if any of the day numbers are outside the current range.
+		if numpy.size(dayNumbers) == 0:
+			return;
+		low = int(numpy.min(dayNumbers));
+		high = int(numpy.max(dayNumbers));
+		if low < self.yearStarts[0] or high >= self.yearStarts[-1]:
+			firstYear = min(self.firstYear, int(numpy.datetime64(low, 'D').astype('datetime64[Y]').astype(numpy.int64)) + 1970);
+			lastYear = max(self.lastYear, int(numpy.datetime64(high, 'D').astype('datetime64[Y]').astype(numpy.int64)) + 1970);
+			self.build(firstYear, lastYear);
+
+	def fields(self, dayNumbers):
+		# Calendar year, month and day of month for each day number.
+		self.ensure(dayNumbers);
+		index = dayNumbers - self.firstDay;
+		return self.years[index].astype(numpy.int64), self.months[index].astype(numpy.int64), self.days[index].astype(numpy.int64);
+
+	def yearIndex(self, dayNumbers):
+		# Index into yearStarts/yearLengths for the year containing each day number, the tables must already cover the days.
+		return self.years[dayNumbers - self.firstDay].astype(numpy.int64) - self.firstYear;
+
+dayCountTables = DayCountTables();
+
+class DayCountConvention(object):
+	# Base class for the day count conventions, subclasses supply dayCount and yearFraction.
+	name = None;
+	daysInYear = None;
+
+	def dayCount(self, start, end):
+		return toDayNumbers(end) - toDayNumbers(start);
+
+	def yearFraction(self, start, end):
+		return self.dayCount(start, end) / self.daysInYear;
+
+	def __repr__(self):
+		return "DayCountConvention(" + self.name + ")";
+
+class DayCountACT365F(DayCountConvention):
+	# Actual days over a fixed 365 day year.  Bond market basis, and money markets in GBP and other ACT/365 currencies.
+	name = "ACT/365F";
+	daysInYear = ACT365_DAYS_IN_YEAR();
+
+class DayCountACT360(DayCountConvention):
+	# Actual days over a 360 day year.  Money market basis.
+	name = "ACT/360";
+	daysInYear = ACT360_DAYS_IN_YEAR();
+
+class DayCountACTACTISDA(DayCountConvention):
+	# Actual days, with the days falling in each calendar year divided by the actual length of that year.  When used in place
+	#	of daysInYear, the year length is taken from the optional year, otherwise ACTACT_DAYS_IN_YEAR() is used.
+	name = "ACT/ACT ISDA";
+
+	def __init__(self, year=None):
+		self.daysInYear = ACTACT_DAYS_IN_YEAR(year);
+
+	def yearFraction(self, start, end):
+		startDays = toDayNumbers(start);
+		endDays = toDayNumbers(end);
+		dayCountTables.ensure(startDays);
+		dayCountTables.ensure(endDays);
+		startIndex = dayCountTables.yearIndex(startDays);
+		endIndex = dayCountTables.yearIndex(endDays);
+		starts = dayCountTables.yearStarts;
+		lengths = dayCountTables.yearLengths;
+
+		# Days left in the start year, whole years in between, then the days used in the end year.  For dates in the
+		#	same year this collapses to (end - start) / year length.
+		firstPart = (starts[startIndex + 1] - startDays) / lengths[startIndex];
+		lastPart = (endDays - starts[endIndex]) / lengths[endIndex];
+		return firstPart + (endIndex - startIndex - 1) + lastPart;
+
+class DayCount30360(DayCountConvention):
+	# 30/360 bond basis (ISDA), each month is treated as having 30 days.
+	name = "30/360";
+	daysInYear = ACT360_DAYS_IN_YEAR();
+
+	def adjustDays(self, startDay, endDay):
+		startDay = numpy.minimum(startDay, 30);
+		endDay = numpy.where((endDay == 31) & (startDay == 30), 30, endDay);
+		return startDay, endDay;
+
+	def dayCount(self, start, end):
+		startYear, startMonth, startDay = dayCountTables.fields(toDayNumbers(start));
+		endYear, endMonth, endDay = dayCountTables.fields(toDayNumbers(end));
+		startDay, endDay = self.adjustDays(startDay, endDay);
+		return 360 * (endYear - startYear) + 30 * (endMonth - startMonth) + (endDay - startDay);
+
+class DayCount30E360(DayCount30360):
+	# 30E/360 eurobond basis, the 31st is always moved back to the 30th for both dates.
+	name = "30E/360";
+
+	def adjustDays(self, startDay, endDay):
+		return numpy.minimum(startDay, 30), numpy.minimum(endDay, 30);
+
+# Look up a day count convention from its usual market name.
+def dayCountConvention(name):
+	conventions = {
+		"ACT/365F": DayCountACT365F,
+		"ACT/365": DayCountACT365F,
+		"ACT/360": DayCountACT360,
+		"ACT/ACT": DayCountACTACTISDA,
+		"ACT/ACT ISDA": DayCountACTACTISDA,
+		"30/360": DayCount30360,
+		"30E/360": DayCount30E360,
+	};
+	key = name.upper();
+	if key not in conventions:
+		raise ValueError("Unknown day count convention " + name);
+	return conventions[key]();
+
+# Get the days in year to use for a daysInYear argument, which can either be a number of days or a day count convention.  A list
+#	of either, one per row of array inputs, gives an array of days in the year.
+def daysInYearFromBasis(daysInYear):
+	if isinstance(daysInYear, DayCountConvention):
+		return daysInYear.daysInYear;
+	if isinstance(daysInYear, (list, tuple)) or (isinstance(daysInYear, numpy.ndarray) and daysInYear.dtype == object):
+		return numpy.array([daysInYearFromBasis(basis) for basis in daysInYear], dtype=numpy.float64);
+	return daysInYear;
+
+# Get the number of days between dates for a convention.
+def dayCount(start, end, convention):
+	return convention.dayCount(start, end);
+
+# Get the year fraction between dates for a convention.
+def yearFraction(start, end, convention):
+	return convention.yearFraction(start, end);
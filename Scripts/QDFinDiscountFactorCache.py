@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import functools
+import threading
+
+# Bounded least recently used cache for discount factors, keyed on the discount factor function and its (rate, days, basis)
+#	arguments.  lookup is a functools.lru_cache, so a hit is done in C, is cheaper than working the factor out again, and is safe
+#	to share between threads, with the hits and misses counted by lru_cache.  Evictions are counted on the miss path, outside of
+#	lru_cache: a factor about to be stored in a full cache pushes out the least recently used one.  A function that raises adds
+#	nothing to the cache.  The one case this over counts is two threads missing on the same key at once in a full cache, where
+#	lru_cache only stores the factor once.  It is switched on with enableDiscountFactorCache in QDFinTimeValueMoney.
+class DiscountFactorCache(object):
+	def __init__(self, maxSize=100000):
+		if maxSize < 1:
+			raise ValueError("Discount factor cache size must be at least 1");
+		self.maxSize = maxSize;
+		self.lock = threading.Lock();
+		self.evictions = 0;
+		# Get the cached factor for function(*args), generating and storing it on a miss.  Raises TypeError for unhashable
+		#	arguments, such as arrays.
+		self.lookup = functools.lru_cache(maxsize=maxSize)(self.generate);
+
+	def __len__(self):
+		return self.lookup.cache_info().currsize;
+
+	def generate(self, function, *args):
+		# Called by lookup on a miss only.
+		factor = function(*args);
+		with self.lock:
+			if self.lookup.cache_info().currsize >= self.maxSize:
+				self.evictions += 1;
+		return factor;
+
+	def statistics(self):
+		info = self.lookup.cache_info();
+		total = info.hits + info.misses;
+		return {'size': info.currsize, 'maxSize': self.maxSize, 'hits': info.hits, 'misses': info.misses,
+			'evictions': self.evictions, 'hitRate': info.hits / total if total > 0 else 0.0};
+
+	def hitRate(self):
+		return self.statistics()['hitRate'];
+
+	def clear(self):
+		# Remove all of the entries and reset the counters.
+		with self.lock:
+			self.lookup.cache_clear();
+			self.evictions = 0;
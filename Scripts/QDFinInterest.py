@@ -24,13 +24,20 @@ __email__ = "dev@bedtimecomics.com"
 __status__ = "Development" 
 __version__ = "0.1.0"
 
-import math
+from QDFinArray import power
+from QDFinArray import log
+from QDFinArray import exp
+
+from QDFinDayCount import daysInYearFromBasis
 
 from QDFinConstants import DAYS_IN_YEAR
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 from QDFinConstants import ACT360_DAYS_IN_YEAR
 from QDFinConstants import DEFAULT_BASIS_DAYS
 
+# All of the rate functions accept NumPy arrays as well as scalars for any argument, and broadcast them against each other,
+#	so a whole set of quotes can be converted in a single call.
+
 # Normal elements for interest rate:
 # 1. Period investment/loan runs for... 6m,1y,2y etc.
 # 2. Absolute period for the quoted interest rate... usually a single year to allow IRs to be compared, but a 5 year term would compound the yearly figure and pay interest as a single lump at the end of the 5 years.
@@ -38,6 +45,7 @@ from QDFinConstants import DEFAULT_BASIS_DAYS
 
 # Get the simple interest rate for n days
 def simpleInterestRate(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return 1.0 + (interest / 100.0) * (days / daysInYear);
 
 # Get the simple interest rate for n days, in money market basis
@@ -46,7 +54,7 @@ def simpleInterestRateMoneyMarketBasis(interest, days):
 
 # Get the complex interest rate for n years
 def complexInterestRate(interest, years):
-	return math.pow(1.0 + (interest / 100.0), years);
+	return power(1.0 + (interest / 100.0), years);
 
 # Get the final amount after applying compounded interest over a number of years.
 def complexInterest(initialAmount, interest, years):
@@ -58,36 +66,41 @@ def simpleInterest(initialAmount, interest, days, daysInYear=DEFAULT_BASIS_DAYS(
 
 # This gives the equivalment annual rate to an interest rate with n payments a year.
 def effectiveRate(interest, numPayments):
-	return (math.pow(1.0 + ((interest / 100.0) / numPayments), numPayments) - 1.0) * 100;
+	return (power(1.0 + ((interest / 100.0) / numPayments), numPayments) - 1.0) * 100;
 
 # This gives the equivalent annual rate given some initial amount and the final proceeds from any cashflows
 def effectiveRateProceeds(initialAmount, totalProceeds, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return (math.pow(totalProceeds/initialAmount, daysInYear/days)  - 1) * 100;
+	daysInYear = daysInYearFromBasis(daysInYear);
+	return (power(totalProceeds/initialAmount, daysInYear/days)  - 1) * 100;
 
 # This gives the effective annual rate for a sub-yearly interest rate, with a single coupon paid at maturity.
 #	The coupon rate is compounded up to an actual year, rather than bond/market basis.
 def effectiveRateCouponAtMaturity(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return (math.pow(1.0 + (interest / 100.0) * (days/daysInYear), DAYS_IN_YEAR() / days) - 1.0) * 100;
+	daysInYear = daysInYearFromBasis(daysInYear);
+	return (power(1.0 + (interest / 100.0) * (days/daysInYear), DAYS_IN_YEAR() / days) - 1.0) * 100;
 
 # This gives the effective annual rate for sub-yearly interest rate, where a ratio of proceeds is already known.
 def effectiveRateRatioAtMaturity(ratio, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return (math.pow(1.0 + (ratio / 100.0), daysInYear / days) - 1.0) * 100;
+	daysInYear = daysInYearFromBasis(daysInYear);
+	return (power(1.0 + (ratio / 100.0), daysInYear / days) - 1.0) * 100;
 
 # This gives the daily equivalent rate to an interest rate r received on a known day.
 def dailyEffectiveRate(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return (math.pow(1.0 + ((interest / 100.0) / (daysInYear/days)), 1.0/days) - 1.0) * daysInYear * 100;
+	daysInYear = daysInYearFromBasis(daysInYear);
+	return (power(1.0 + ((interest / 100.0) / (daysInYear/days)), 1.0/days) - 1.0) * daysInYear * 100;
 
 # This gives the nominal rate of interest charged across n payments for the equivalent yearly effective rate.
 def nominalRate(interest, numPayments):
-	return ((math.pow(1.0 + (interest/100), 1.0 / numPayments) - 1.0) * numPayments) * 100;
+	return ((power(1.0 + (interest/100), 1.0 / numPayments) - 1.0) * numPayments) * 100;
 
 # This gives the continuously compounded interest rate 
 def continuouslyCompoundedRate(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return (daysInYear/days) * math.log(simpleInterestRate(interest, days)) * 100;
+	daysInYear = daysInYearFromBasis(daysInYear);
+	return (daysInYear/days) * log(simpleInterestRate(interest, days)) * 100;
 
 # This gives the effective (yearly) rate from a continually compounded rate
 def effectiveRateFromContinuallyCompoundedRate(interest):
-	return (math.exp(interest / 100.0) - 1.0) * 100.0;
+	return (exp(interest / 100.0) - 1.0) * 100.0;
 
 # Convert ACT/365 basis to ACT360 basis
 def convertRateToMoneyMarketBasis(interest):
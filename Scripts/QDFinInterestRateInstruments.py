@@ -24,15 +24,28 @@ __email__ = "dev@bedtimecomics.com"
 __status__ = "Development" 
 __version__ = "0.1.0"
 
+from collections import namedtuple
+
+import numpy
+
+from QDFinArray import isArray
+from QDFinArray import power
+from QDFinArray import exp
+from QDFinArray import expm1
+from QDFinArray import log1p
+
 from QDFinConstants import DAYS_IN_YEAR
 from QDFinConstants import DEFAULT_BASIS_DAYS
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 from QDFinConstants import ACT360_DAYS_IN_YEAR
 
+from QDFinDayCount import daysInYearFromBasis
+
 from QDFinStatistics import timeRatio
 from QDFinStatistics import linearInterpolation
 
 from QDFinTimeValueMoney import complexPresentValue
+from QDFinTimeValueMoney import simpleDiscountFactor
 from QDFinTimeValueMoney import simpleYield
 from QDFinTimeValueMoney import complexYieldFromDays
 from QDFinTimeValueMoney import internalRateOfReturnOfCashflowsWithDates
@@ -40,6 +53,7 @@ from QDFinTimeValueMoney import internalRateOfReturnOfCashflowsWithDates
 def forwardForwardRate(interestRateLending, interestRateBorrowing, daysInLending, daysInBorrowing, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Deposit/Lend at interest rate for the short period, and borrow at rate for the longer period, which gives rate for Forward Forward borrowing.
 	#	this is really just short term lending/borrowing.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	lendingRate = 1 + interestRateLending * 0.01 * (daysInLending/daysInYear);
 	borrowingRate = 1 + interestRateBorrowing * 0.01 * (daysInBorrowing/daysInYear);
 	return (borrowingRate / lendingRate - 1) * (daysInYear / (daysInBorrowing - daysInLending)) * 100;
@@ -52,6 +66,7 @@ def forwardRateAgreementSettlementPrice(notional, fraRate, libor, days, daysInYe
 	# Forward rate settlement price for a given notional principal amount with the agreed FRA rate, and LIBOR on the settlement date... 
 	#	Dates for FRAs in GBP are based on today's date.
 	#	Dates for FRAs traded internationally in other currencies are generally based on spot.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	timeRatio = days/daysInYear;
 	libor = libor * 0.01;
 	fraRate = fraRate * 0.01;
@@ -81,22 +96,25 @@ def cleanBondPriceExDividend(notional, couponRate, marketYield, couponFrequency,
 def dirtyBondPrice(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Calculate the bond price, given a coupon rate, number of coupon payments remaining and an expected yield.  This uses
 	#	a possibly faster algo based on formulation from Nic for calculating the total coupen return, discounted flow.
-	couponRate *= 0.01;
-	marketYield *= 0.01;
+	#	Any of the arguments can be NumPy arrays, to price a whole universe of bonds at once, see BondUniverse.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	couponRate = couponRate * 0.01;
+	marketYield = marketYield * 0.01;
 
 	yieldScale = 1 + marketYield/couponFrequency;
-	yieldDenominator = pow(yieldScale, numCouponPaymentsRemaining-1);
+	yieldDenominator = power(yieldScale, numCouponPaymentsRemaining-1);
 
 	a = couponRate - couponRate * (yieldDenominator * yieldScale); # a / b gives us the scale factor which is compounded to both give us the complete stream of coupon payments...
 	b = -marketYield * yieldDenominator;
 	c = 1 / yieldDenominator; # discount redemption payment by the total number of coupon payments minus the first payment
-	d = 1 / pow(yieldScale,daysToNextCoupon/daysInYear); # discount by days to next coupon payment
+	d = 1 / power(yieldScale,daysToNextCoupon/daysInYear); # discount by days to next coupon payment
 	# print("a b c d rate " +  str(a) + " " + str(b) + " " + str(c) + " " + str(d) + " " + str((couponRate/couponFrequency)*(a/b)));
 
 	return notional * (a/b + c) * d;
 
 def bondYield(notional, dirtyPrice, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), decimalPlaces = 12):
 	# Calculate a yield in the case that we know what the dirty price is, but don't know the yield...
+	daysInYear = daysInYearFromBasis(daysInYear);
 
 	difference = 1.0 / min(pow(10,decimalPlaces), pow(10,12));
 
@@ -155,9 +173,119 @@ def bondYield(notional, dirtyPrice, couponRate, couponFrequency, numCouponPaymen
 
 	return x * 100;
 
+def bondPriceAndDerivative(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, yearsToNextCoupon):
+	# The dirty price of dirtyBondPrice and its derivative with respect to the yield, from the same two powers.  couponRate and
+	#	marketYield are decimals.  With s = 1 + x/k, q = s^(1-h) and t the years to the next coupon, the price is
+	#		P = N s^-t [(a/x)(s - q) + q]
+	#	and as dq/dx = (1-h) q / (s k), the derivative is
+	#		dP/dx = N s^-t [dG - t G / (s k)], where G = (a/x)(s - q) + q and dG = -(a/x^2)(s - q) + (a/x)(1/k - dq/dx) + dq/dx
+	#	s - q is worked out as -s (s^-h - 1) with expm1 and log1p, as near a zero yield subtracting q from s loses the digits
+	#	that the division by x then magnifies.
+	a = couponRate;
+	x = marketYield;
+	k = couponFrequency;
+	yieldScale = 1 + x/k;
+	logYieldScale = log1p(x/k);
+	q = power(yieldScale, 1 - numCouponPaymentsRemaining);
+	discount = power(yieldScale, -yearsToNextCoupon);
+	scaleLessQ = -yieldScale * expm1(-numCouponPaymentsRemaining * logYieldScale);
+
+	g = (a/x) * scaleLessQ + q;
+	dq = (1 - numCouponPaymentsRemaining) * q / (yieldScale * k);
+	dg = -(a/(x*x)) * scaleLessQ + (a/x) * (1/k - dq) + dq;
+	return notional * g * discount, notional * discount * (dg - yearsToNextCoupon * g / (yieldScale * k));
+
+BondYields = namedtuple("BondYields", ["yields", "iterations", "converged"]);
+
+def bondYieldBatch(notionals, dirtyPrices, couponRates, couponFrequencies, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), decimalPlaces = 12, maxIterations = 100, initialYields = 5.0, priceTolerance = 1e-12):
+	# Calculate the yields of a whole set of bonds from their dirty prices, as bondYield does for one bond.  All of the bonds take
+	#	Newton-Raphson steps together as arrays, starting at 5% or the initialYields given (say the yields from the last tick),
+	#	and each step only works on the bonds which haven't converged yet.  A bond has converged when the step in yield is
+	#	below decimalPlaces, or its price is within priceTolerance of the dirty price as a fraction of it, so the test is as tight
+	#	for deep discount bonds priced at a tiny fraction of their notional.  Returns the yields as percentages, the
+	#	number of steps each bond took, and whether it converged.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	difference = 1.0 / min(pow(10,decimalPlaces), pow(10,12));
+
+	notionals, dirtyPrices, couponRates, couponFrequencies, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear = numpy.broadcast_arrays(
+		*[numpy.asarray(values, dtype=numpy.float64) for values in [notionals, dirtyPrices, couponRates, couponFrequencies, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear]]);
+	couponRates = couponRates * 0.01;
+	yearsToNextCoupon = daysToNextCoupon / daysInYear;
+
+	x = numpy.array(numpy.broadcast_to(numpy.asarray(initialYields, dtype=numpy.float64) * 0.01, notionals.shape));
+	iterations = numpy.zeros(notionals.shape, dtype=numpy.int64);
+	converged = numpy.zeros(notionals.shape, dtype=bool);
+	active = numpy.flatnonzero(numpy.ones(notionals.shape, dtype=bool));
+
+	for item in range(maxIterations):
+		if len(active) == 0:
+			break;
+
+		with numpy.errstate(invalid="ignore", divide="ignore", over="ignore"):
+			price, ddx = bondPriceAndDerivative(notionals.flat[active], couponRates.flat[active], x.flat[active], couponFrequencies.flat[active], numCouponPaymentsRemaining.flat[active], yearsToNextCoupon.flat[active]);
+			fx = price - dirtyPrices.flat[active];
+			step = fx / ddx;
+		x.flat[active] -= step;
+		iterations.flat[active] += 1;
+
+		# Freeze the bonds which have converged, and drop any which have run off to an invalid yield.
+		done = (numpy.abs(step) < difference) | (numpy.abs(fx) <= priceTolerance * numpy.abs(dirtyPrices.flat[active]));
+		converged.flat[active[done]] = True;
+		active = active[~done & numpy.isfinite(step)];
+
+	return BondYields(x * 100, iterations, converged);
+
+def bondYieldSafeguarded(notional, dirtyPrice, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), initialYield = 5.0, priceTolerance = 1e-12, decimalPlaces = 12, maxIterations = 100):
+	# Calculate the yield from the dirty price as bondYield does, but safely for deep discount, long dated and near zero yield bonds.
+	#	The price falls as the yield rises, so every price worked out narrows a bracket around the yield.  Newton-Raphson steps
+	#	are taken from the initialYield (pass the yield from the last tick to start right next to the answer) and a step which
+	#	would leave the bracket, or which isn't at least halving the error, is replaced by bisecting the bracket.  Stops when the
+	#	price is within priceTolerance of the dirty price, as a fraction of it as in bondYieldBatch, or the step is below
+	#	decimalPlaces, and returns the yield as a percentage, the number of steps taken and whether it converged, with the
+	#	same fields as bondYieldBatch.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	difference = 1.0 / min(pow(10,decimalPlaces), pow(10,12));
+	couponRate = couponRate * 0.01;
+	yearsToNextCoupon = daysToNextCoupon / daysInYear;
+
+	# Below -couponFrequency the yield scale would go negative, and no real bond trades at over 1000%.
+	low = -0.99 * couponFrequency;
+	high = 10.0;
+	x = min(max(initialYield * 0.01, low), high);
+	previousStep = high - low;
+
+	for item in range(maxIterations):
+		if x == 0.0:
+			x = difference; # The price formula has a removable singularity at a yield of exactly zero.
+
+		price, ddx = bondPriceAndDerivative(notional, couponRate, x, couponFrequency, numCouponPaymentsRemaining, yearsToNextCoupon);
+		fx = price - dirtyPrice;
+		if abs(fx) <= priceTolerance * abs(dirtyPrice):
+			return BondYields(x * 100, item, True);
+
+		if fx > 0:
+			low = x;
+		else:
+			high = x;
+
+		newton = ddx < 0 and abs(2 * fx) < abs(previousStep * ddx);
+		if newton:
+			step = fx / ddx;
+			newton = low < x - step < high;
+		if not newton:
+			step = x - 0.5 * (low + high);
+
+		previousStep = step;
+		x -= step;
+		if abs(step) < difference:
+			return BondYields(x * 100, item + 1, True);
+
+	return BondYields(x * 100, maxIterations, False);
+
 def bondPriceUsingMoosmullerYield(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Get the bond price using Moosmuller yield which is used in some German markets and the US Treasury for yield and prices on new issues.
 	#	This uses simple interest for the coupon period between purchase and following coupon, but compound otherwise.]
+	daysInYear = daysInYearFromBasis(daysInYear);
 	couponRate *= 0.01;
 	marketYield *= 0.01;
 
@@ -176,6 +304,8 @@ def bondPriceUsingMoosmullerYield(notional, couponRate, marketYield, couponFrequ
 def bondPriceUsingMoneyMarketYield(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), bondDaysInYear=DEFAULT_BASIS_DAYS()):
 	# Get the bond price using simple interest for the near coupon, and we can use a money market basis rather than compound interest... 
 	#	but this gives us a different yield than the version that uses the calculator optimised version!
+	daysInYear = daysInYearFromBasis(daysInYear);
+	bondDaysInYear = daysInYearFromBasis(bondDaysInYear);
 	couponRate *= 0.01;
 	marketYield *= 0.01;
 
@@ -204,12 +334,15 @@ def bondPriceZeroCoupon(notional, marketYield, couponFrequency, numCouponPayment
 
 def bondYieldZeroCoupon(notional, dirtyPrice, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Get the yield for a bond with 0 coupon.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	exponent = 1 / (daysToNextCoupon/daysInYear + (numCouponPaymentsRemaining - 1))
 	return (pow(notional / dirtyPrice, exponent) - 1) * couponFrequency * 100;
 
 def bondPriceUsingMoneyMarketYieldForCalculators(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), bondDaysInYear=DEFAULT_BASIS_DAYS()):
 	# Get the bond price using simple interest rather than compound interest for the near coupon, and use a money market basis rather than
 	#	compound interest.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	bondDaysInYear = daysInYearFromBasis(bondDaysInYear);
 	couponRate *= 0.01;
 	marketYield *= 0.01;
 
@@ -225,6 +358,8 @@ def bondPriceUsingMoneyMarketYieldForCalculators(notional, couponRate, marketYie
 
 def bondMoneyMarketYield(notional, dirtyPrice, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), bondDaysInYear=DEFAULT_BASIS_DAYS(), decimalPlaces = 12):
 	# Calculate a money market yield in the case that we know what the dirty price is, but don't know the yield...
+	daysInYear = daysInYearFromBasis(daysInYear);
+	bondDaysInYear = daysInYearFromBasis(bondDaysInYear);
 
 	difference = 1.0 / min(pow(10,decimalPlaces), pow(10,12));
 
@@ -283,6 +418,7 @@ def bondMoneyMarketYield(notional, dirtyPrice, couponRate, couponFrequency, numC
 
 def dirtyBondPriceForCalculators(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Bond price calculation using CFA equivalent pricing model	
+	daysInYear = daysInYearFromBasis(daysInYear);
 	couponRate *= 0.01;
 	marketYield *= 0.01;
 
@@ -298,8 +434,127 @@ def dirtyBondPriceForCalculators(notional, couponRate, marketYield, couponFreque
 
 def bondAccruedInterest(notional, couponRate, daysSinceLastCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Calculate the amount relative to the notional of the bond that we have accrued by holding it.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return notional * couponRate * 0.01 * (daysSinceLastCoupon/daysInYear);
 
+class BondUniverse(object):
+	# A universe of bonds held as contiguous arrays, one entry per bond, with the same parameters as dirtyBondPrice and
+	#	cleanBondPrice.  The whole universe is priced with one vectorised call to the bond functions rather than a call
+	#	per bond.  Single values are broadcast to every bond, and the day count bases can be a list with one per bond.
+	def __init__(self, notionals, couponRates, couponFrequencies, numCouponPaymentsRemaining, daysSinceLastCoupon, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS(), accruedDaysInYear=DEFAULT_BASIS_DAYS()):
+		size = len(notionals);
+		self.notionals = numpy.ascontiguousarray(notionals, dtype=numpy.float64);
+		self.couponRates = self.column(couponRates, size, numpy.float64);
+		self.couponFrequencies = self.column(couponFrequencies, size, numpy.float64);
+		self.numCouponPaymentsRemaining = self.column(numCouponPaymentsRemaining, size, numpy.int64);
+		self.daysSinceLastCoupon = self.column(daysSinceLastCoupon, size, numpy.float64);
+		self.daysToNextCoupon = self.column(daysToNextCoupon, size, numpy.float64);
+		self.daysInYear = self.column(daysInYearFromBasis(daysInYear), size, numpy.float64);
+		self.accruedDaysInYear = self.column(daysInYearFromBasis(accruedDaysInYear), size, numpy.float64);
+
+	def column(self, values, size, dtype):
+		return numpy.ascontiguousarray(numpy.broadcast_to(numpy.asarray(values, dtype=dtype), (size,)));
+
+	def __len__(self):
+		return len(self.notionals);
+
+	def subset(self, rows):
+		# A new universe of just the bonds picked by an index array, slice or boolean mask.
+		return BondUniverse(self.notionals[rows], self.couponRates[rows], self.couponFrequencies[rows], self.numCouponPaymentsRemaining[rows], self.daysSinceLastCoupon[rows], self.daysToNextCoupon[rows], self.daysInYear[rows], self.accruedDaysInYear[rows]);
+
+	def dirtyPrices(self, marketYields):
+		# Dirty price of every bond, marketYields is either one yield for all of them or a yield per bond.
+		return dirtyBondPrice(self.notionals, self.couponRates, numpy.asarray(marketYields, dtype=numpy.float64), self.couponFrequencies, self.numCouponPaymentsRemaining, self.daysToNextCoupon, self.daysInYear);
+
+	def accruedInterest(self):
+		return bondAccruedInterest(self.notionals, self.couponRates, self.daysSinceLastCoupon, self.accruedDaysInYear);
+
+	def cleanPrices(self, marketYields):
+		# Clean price of every bond, the dirty price less the accrued interest as cleanBondPrice.
+		return self.dirtyPrices(marketYields) - self.accruedInterest();
+
+	def yields(self, dirtyPrices, decimalPlaces = 12, maxIterations = 100, initialYields = 5.0, priceTolerance = 1e-12):
+		# Yield of every bond from its dirty price, see bondYieldBatch.  Pass the yields from the last tick as initialYields to
+		#	re-solve the universe from next to the answer.
+		return bondYieldBatch(self.notionals, dirtyPrices, self.couponRates, self.couponFrequencies, self.numCouponPaymentsRemaining, self.daysToNextCoupon, self.daysInYear, decimalPlaces, maxIterations, initialYields, priceTolerance);
+
+class Bond(object):
+	# A single bond, with the same parameters as dirtyBondPrice and cleanBondPrice, whose cashflow schedule is built once.  Coupon
+	#	j of the numCouponPaymentsRemaining is discounted over daysToNextCoupon/daysInYear + j coupon periods, as in
+	#	dirtyBondPrice, with the notional repaid with the last coupon.  The years to each cashflow are the periods divided
+	#	by the coupon frequency, in the form taken by bondDuration and bondConvexity.
+	#	The price, duration and convexity at a yield all come from one discounting pass of the schedule, which is kept until
+	#	a different yield is asked for, so asking for each of them in turn at the same yield only discounts once.
+	__slots__ = ["notional", "couponRate", "couponFrequency", "numCouponPaymentsRemaining", "daysToNextCoupon", "daysSinceLastCoupon", "daysInYear", "accruedDaysInYear",
+		"cashflows", "periods", "years", "accrued", "lastYield", "cachedYield", "presentValues", "cachedPrice", "cachedDuration", "cachedConvexity"];
+
+	def __init__(self, notional, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysSinceLastCoupon=0, daysInYear=DEFAULT_BASIS_DAYS(), accruedDaysInYear=DEFAULT_BASIS_DAYS()):
+		self.notional = notional;
+		self.couponRate = couponRate;
+		self.couponFrequency = couponFrequency;
+		self.numCouponPaymentsRemaining = numCouponPaymentsRemaining;
+		self.daysToNextCoupon = daysToNextCoupon;
+		self.daysSinceLastCoupon = daysSinceLastCoupon;
+		self.daysInYear = daysInYearFromBasis(daysInYear);
+		self.accruedDaysInYear = daysInYearFromBasis(accruedDaysInYear);
+
+		self.cashflows = numpy.full(numCouponPaymentsRemaining, notional * couponRate * 0.01 / couponFrequency);
+		self.cashflows[-1] += notional;
+		self.periods = daysToNextCoupon / self.daysInYear + numpy.arange(numCouponPaymentsRemaining);
+		self.years = self.periods / couponFrequency;
+		self.accrued = bondAccruedInterest(notional, couponRate, daysSinceLastCoupon, self.accruedDaysInYear);
+		self.lastYield = None;
+		self.cachedYield = None;
+
+	def discount(self, marketYield):
+		# Present value of each cashflow at the yield, only worked out again when the yield changes.
+		if marketYield != self.cachedYield:
+			self.presentValues = self.cashflows * numpy.power(1 + marketYield * 0.01 / self.couponFrequency, -self.periods);
+			self.cachedPrice = float(numpy.sum(self.presentValues));
+			self.cachedDuration = None;
+			self.cachedConvexity = None;
+			self.cachedYield = marketYield;
+		return self.presentValues;
+
+	def dirtyPrice(self, marketYield):
+		self.discount(marketYield);
+		return self.cachedPrice;
+
+	def accruedInterest(self):
+		return self.accrued;
+
+	def cleanPrice(self, marketYield):
+		return self.dirtyPrice(marketYield) - self.accrued;
+
+	def duration(self, marketYield):
+		# Macaulay duration in years, discounting at the coupon frequency in the same way as the price.  For an annual bond this is
+		#	bondDuration of the schedule.
+		presentValues = self.discount(marketYield);
+		if self.cachedDuration is None:
+			self.cachedDuration = float(numpy.dot(presentValues, self.years)) / self.cachedPrice;
+		return self.cachedDuration;
+
+	def modifiedDuration(self, marketYield):
+		return bondModifiedDuration(self.duration(marketYield), marketYield, self.couponFrequency);
+
+	def convexity(self, marketYield):
+		# bondConvexity of the schedule at the bond's own dirty price.
+		presentValues = self.discount(marketYield);
+		if self.cachedConvexity is None:
+			yieldScale = 1 + marketYield * 0.01 / self.couponFrequency;
+			self.cachedConvexity = float(numpy.dot(presentValues, self.years * (self.years + 1 / self.couponFrequency))) / (yieldScale * yieldScale * self.cachedPrice);
+		return self.cachedConvexity;
+
+	def marketYield(self, dirtyPrice, priceTolerance = 1e-12):
+		# Yield from a dirty price with bondYieldSafeguarded, starting from the last yield found for this bond.
+		initialYield = 5.0;
+		if self.lastYield is not None:
+			initialYield = self.lastYield;
+		result = bondYieldSafeguarded(self.notional, dirtyPrice, self.couponRate, self.couponFrequency, self.numCouponPaymentsRemaining, self.daysToNextCoupon, self.daysInYear, initialYield, priceTolerance);
+		if result.converged:
+			self.lastYield = result.yields;
+		return result.yields;
+
 def bondDuration(marketYield, cashflows, yearsToMaturity):
 	# Calculate the bond duration... sum pv of cashflow x time to cashflow/sum pv of cashflow... this gives us the point where
 	#	changes to the yield should balance the price change from discounting changes and the coupon reinvestment rate changes.
@@ -325,7 +580,7 @@ def bondModifiedDuration(duration, marketYield, couponFrequency):
 	#	the dirty price... or the slope of the curve divided by the dirty price.  The steeper the curve, the faster that
 	#	the price will change for any change in yield!  This approximates to the duration discounted by the yield
 
-	marketYield *= 0.01;
+	marketYield = marketYield * 0.01;
 
 	return duration / (1 + marketYield/couponFrequency);
 
@@ -349,6 +604,87 @@ def bondConvexity(dirtyPrice, marketYield, couponFrequency, cashflows, yearsToMa
 
 	return sumCashflows / dirtyPrice;
 
+FLAT_GEOMETRIC_EXPONENT = 0.01; # below this |numTerms x log ratio| geometricSums adds the terms up directly
+
+def directGeometricSums(logRatio, numTerms):
+	# The sums of geometricSums added up term by term.
+	sum0 = sum1 = sum2 = 0.0;
+	for j in range(int(numTerms)):
+		term = exp(j * logRatio);
+		sum0 += term;
+		sum1 += j * term;
+		sum2 += j * j * term;
+	return sum0, sum1, sum2;
+
+def geometricSums(logRatio, numTerms):
+	# The sums over j = 0 .. numTerms - 1 of w^j, j w^j and j^2 w^j for the ratio w = exp(logRatio), each found from the one
+	#	before by the usual shift and subtract, (1 - w) S = S - w S.  Each step divides by 1 - w, which loses digits when the whole
+	#	series is close to flat, so there (a yield of nearly zero) the terms are just added up.
+	if isArray(logRatio, numTerms):
+		logRatio, numTerms = numpy.broadcast_arrays(numpy.asarray(logRatio, dtype=numpy.float64), numTerms);
+		with numpy.errstate(divide="ignore", invalid="ignore"):
+			sums = geometricSumsByShift(logRatio, numTerms);
+		sums = [numpy.array(values, dtype=numpy.float64) for values in sums];
+		for index in zip(*numpy.nonzero(numpy.abs(numTerms * logRatio) < FLAT_GEOMETRIC_EXPONENT)):
+			for values, value in zip(sums, directGeometricSums(logRatio[index], numTerms[index])):
+				values[index] = value;
+		return tuple(sums);
+
+	if abs(numTerms * logRatio) < FLAT_GEOMETRIC_EXPONENT:
+		return directGeometricSums(logRatio, numTerms);
+	return geometricSumsByShift(logRatio, numTerms);
+
+def geometricSumsByShift(logRatio, numTerms):
+	oneMinusRatio = -expm1(logRatio);
+	ratioPower = exp(numTerms * logRatio);
+	lastTerm = numTerms - 1;
+
+	sum0 = -expm1(numTerms * logRatio) / oneMinusRatio;
+	sum1 = (sum0 - 1 - lastTerm * ratioPower) / oneMinusRatio;
+	sum2 = (2 * sum1 - sum0 + 1 - lastTerm * lastTerm * ratioPower) / oneMinusRatio;
+	return sum0, sum1, sum2;
+
+def levelCouponBondSums(notional, couponRate, logRatio, numCouponPaymentsRemaining):
+	# The present values of a level coupon bond's cashflows, each multiplied by 1, j and j^2 for coupon j = 0, 1, ..., discounted
+	#	by the ratio w = exp(logRatio) per coupon period to the next coupon date.
+	coupon = notional * couponRate;
+	sum0, sum1, sum2 = geometricSums(logRatio, numCouponPaymentsRemaining);
+	lastTerm = numCouponPaymentsRemaining - 1;
+	redemption = notional * exp(lastTerm * logRatio);
+
+	return coupon * sum0 + redemption, coupon * sum1 + lastTerm * redemption, coupon * sum2 + lastTerm * lastTerm * redemption;
+
+def levelCouponBondDuration(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
+	# Calculate bondDuration in closed form, from the same arguments as dirtyBondPrice rather than a list of cashflows, so a 30 year
+	#	monthly bond costs the same as a 1 year one.  The cashflows fall daysToNextCoupon/daysInYear + j coupon periods away
+	#	and are discounted annually at the yield, as in bondDuration.  Any of the arguments can be NumPy arrays.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	periodsToNextCoupon = daysToNextCoupon / daysInYear;
+	logRatio = -log1p(marketYield * 0.01) / couponFrequency;
+
+	sum0, sum1, sum2 = levelCouponBondSums(notional, couponRate * 0.01 / couponFrequency, logRatio, numCouponPaymentsRemaining);
+
+	return (periodsToNextCoupon + sum1 / sum0) / couponFrequency;
+
+def levelCouponBondModifiedDuration(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
+	# Calculate bondModifiedDuration in closed form, from the same arguments as dirtyBondPrice.
+	duration = levelCouponBondDuration(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear);
+
+	return bondModifiedDuration(duration, marketYield, couponFrequency);
+
+def levelCouponBondConvexity(notional, couponRate, marketYield, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DEFAULT_BASIS_DAYS()):
+	# Calculate bondConvexity in closed form, from the same arguments as dirtyBondPrice, with the dirty price being that of
+	#	dirtyBondPrice.  The cashflows are discounted at the coupon frequency and t (t + 1/k) splits into h (h + 1) + (2h + 1) j + j^2
+	#	in periods h + j, so only the three geometric sums are needed.  Any of the arguments can be NumPy arrays.
+	daysInYear = daysInYearFromBasis(daysInYear);
+	periodsToNextCoupon = daysToNextCoupon / daysInYear;
+	logRatio = -log1p(marketYield * 0.01 / couponFrequency);
+
+	sum0, sum1, sum2 = levelCouponBondSums(notional, couponRate * 0.01 / couponFrequency, logRatio, numCouponPaymentsRemaining);
+	weightedSum = periodsToNextCoupon * (periodsToNextCoupon + 1) * sum0 + (2 * periodsToNextCoupon + 1) * sum1 + sum2;
+
+	return exp(2 * logRatio) * weightedSum / (couponFrequency * couponFrequency * sum0);
+
 def bondPriceChange(dirtyPrice, marketYield, marketYieldDelta, couponFrequency, cashflows, yearsToMaturity):
 	# Calcluate very rough price change due to yield change, using duration and modified duration.
 
@@ -374,6 +710,83 @@ def bondPriceChangeUsingConvexity(dirtyPrice, marketYield, marketYieldDelta, cou
 
 	return -dirtyPrice * modifiedDuration * marketYieldDelta + 0.5 * dirtyPrice * convexity * marketYieldDelta * marketYieldDelta;
 
+BondRisk = namedtuple("BondRisk", ["presentValue", "duration", "modifiedDuration", "convexity", "dv01", "priceChange"]);
+
+def bondRiskArrays(dirtyPrices, marketYields, marketYieldDeltas, couponFrequencies, cashflows, yearsToMaturity):
+	# The work behind bondRisk and bondPortfolioRisk, for a (bond x cashflow) array of cashflows and years to each, padded with
+	#	zero cashflows, with the other arguments having a value per bond.  Every cashflow is discounted once at the yield, and
+	#	once more at the coupon frequency unless the bond is annual, where the two are the same.
+	cashflows = numpy.asarray(cashflows, dtype=numpy.float64);
+	years = numpy.asarray(yearsToMaturity, dtype=numpy.float64);
+	dirtyPrices = numpy.asarray(dirtyPrices, dtype=numpy.float64);
+	scaledYields = numpy.asarray(marketYields, dtype=numpy.float64)[:, numpy.newaxis] * 0.01;
+	k = numpy.broadcast_to(numpy.asarray(couponFrequencies, dtype=numpy.float64), dirtyPrices.shape)[:, numpy.newaxis];
+	deltas = numpy.asarray(marketYieldDeltas, dtype=numpy.float64) * 0.01;
+
+	annualValues = cashflows * numpy.power(1 + scaledYields, -years);
+	periodScale = 1 + scaledYields / k;
+	if numpy.all(k == 1):
+		periodValues = annualValues;
+	else:
+		periodValues = cashflows * numpy.power(periodScale, -k * years);
+
+	# Duration as bondDuration, convexity as bondConvexity, from the two sets of present values.
+	duration = numpy.sum(annualValues * years, axis=1) / numpy.sum(annualValues, axis=1);
+	modifiedDuration = duration / periodScale[:, 0];
+	convexity = numpy.sum(periodValues * years * (years + 1 / k), axis=1) / (periodScale[:, 0] * periodScale[:, 0] * dirtyPrices);
+
+	presentValue = numpy.sum(periodValues, axis=1);
+	dv01 = dirtyPrices * modifiedDuration * 0.0001;
+	priceChange = -dirtyPrices * modifiedDuration * deltas + 0.5 * dirtyPrices * convexity * deltas * deltas;
+	return BondRisk(presentValue, duration, modifiedDuration, convexity, dv01, priceChange);
+
+def bondRisk(dirtyPrice, marketYield, marketYieldDelta, couponFrequency, cashflows, yearsToMaturity):
+	# Calculate the risk figures of a bond together, with the same arguments as bondPriceChangeUsingConvexity, in one call rather
+	#	than one each to bondDuration, bondConvexity and the price change functions.  The results match those functions, so they
+	#	keep their conventions: duration discounts annually at the yield and convexity at the coupon frequency, which for
+	#	anything but an annual bond means the cashflows are discounted twice.  dv01 and priceChange are for the dirtyPrice
+	#	passed in, as in bondPriceChangeUsingConvexity, not for presentValue:
+	#		presentValue		the cashflows discounted at the yield compounded at the coupon frequency.
+	#		duration			bondDuration.
+	#		modifiedDuration	bondModifiedDuration.
+	#		convexity			bondConvexity.
+	#		dv01				the fall in dirtyPrice for a one basis point rise in the yield, by modified duration.
+	#		priceChange			bondPriceChangeUsingConvexity for the marketYieldDelta.
+	risk = bondRiskArrays([dirtyPrice], [marketYield], [marketYieldDelta], [couponFrequency], [cashflows], [yearsToMaturity]);
+	return BondRisk(*[float(values[0]) for values in risk]);
+
+def bondPortfolioRisk(quantities, dirtyPrices, marketYields, marketYieldDeltas, couponFrequencies, cashflows, yearsToMaturity):
+	# Calculate the risk of a portfolio of bond positions in one call.  cashflows and yearsToMaturity hold the schedule of each bond,
+	#	either as lists of different lengths or as arrays padded with zero cashflows, and the rest have a value per position
+	#	(or one value for all of them).  quantities are the number of each bond held.  Returns the BondRisk of each bond and the
+	#	BondRisk of the portfolio, where the present value, DV01 and price change are summed over the positions and the
+	#	durations and convexity are weighted by the market value (quantity times dirty price) of each position.
+	if not isinstance(cashflows, numpy.ndarray):
+		width = max(len(flows) for flows in cashflows);
+		paddedCashflows = numpy.zeros((len(cashflows), width));
+		paddedYears = numpy.zeros((len(cashflows), width));
+		for bond in range(len(cashflows)):
+			paddedCashflows[bond, :len(cashflows[bond])] = cashflows[bond];
+			paddedYears[bond, :len(yearsToMaturity[bond])] = yearsToMaturity[bond];
+		cashflows, yearsToMaturity = paddedCashflows, paddedYears;
+
+	numBonds = len(cashflows);
+	dirtyPrices = numpy.broadcast_to(numpy.asarray(dirtyPrices, dtype=numpy.float64), (numBonds,));
+	marketYields = numpy.broadcast_to(numpy.asarray(marketYields, dtype=numpy.float64), (numBonds,));
+	marketYieldDeltas = numpy.broadcast_to(numpy.asarray(marketYieldDeltas, dtype=numpy.float64), (numBonds,));
+	positions = bondRiskArrays(dirtyPrices, marketYields, marketYieldDeltas, couponFrequencies, cashflows, yearsToMaturity);
+
+	quantities = numpy.broadcast_to(numpy.asarray(quantities, dtype=numpy.float64), (numBonds,));
+	marketValues = quantities * dirtyPrices;
+	totalValue = numpy.sum(marketValues);
+	portfolio = BondRisk(float(numpy.dot(quantities, positions.presentValue)),
+		float(numpy.dot(marketValues, positions.duration) / totalValue),
+		float(numpy.dot(marketValues, positions.modifiedDuration) / totalValue),
+		float(numpy.dot(marketValues, positions.convexity) / totalValue),
+		float(numpy.dot(quantities, positions.dv01)),
+		float(numpy.dot(quantities, positions.priceChange)));
+	return positions, portfolio;
+
 def bondYieldToMaturity(notional, cleanPrice, couponRate, yearsToMaturity):
 	# Calculate the yield from the notional amount, the clean price paid and the coupon cashflows...
 	# internalRateOfReturnOfCashflowsWithDates
@@ -436,6 +849,7 @@ def bondFuturesPrice(dirtyPrice, couponRate, marketYield, couponFrequency, conve
 
 def bondForwardsPrice(dirtyPrice, couponRate, marketYield, couponFrequency, conversionFactor, daysSinceLastCoupon, daysToMaturity, daysInCouponPeriod, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Calculate the bond forward price for delivery at some point in the future.
+	daysInYear = daysInYearFromBasis(daysInYear);
 
 	marketYield *= 0.01;
 
@@ -450,7 +864,7 @@ def bondForwardsPrice(dirtyPrice, couponRate, marketYield, couponFrequency, conv
 
 def bondHedgeRatio(marketYield, conversionFactor, daysToMaturity, daysInYear=DEFAULT_BASIS_DAYS()):
 	# This is the hedge ratio which when multiplied by the bond face value gives us the notional futures value that we need to hedge...
-	return conversionFactor / (1 + marketYield * 0.01 * (daysToMaturity/daysInYear));
+	return conversionFactor * simpleDiscountFactor(marketYield, daysToMaturity, daysInYear);
 
 def bondFuturesHedgeNotional(faceValue, marketYield, conversionFactor, daysToMaturity, daysInYear=DEFAULT_BASIS_DAYS()):
 	# This gives us the notional value of the futures contracts which we need to hedge a given face value of bond that we are short.
@@ -458,6 +872,7 @@ def bondFuturesHedgeNotional(faceValue, marketYield, conversionFactor, daysToMat
 
 def bondImpliedRepoRate(cleanPrice, futuresPrice, accruedCouponNow, accruedCouponDelivery, couponReinvested, conversionFactor, daysToMaturity, daysInYear=DEFAULT_BASIS_DAYS()):
 	# This gives us the implied repo rate, which we can use to check whether cash-and-carry arbitrage will make money or not.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	
 	numerator = (futuresPrice * conversionFactor) + accruedCouponDelivery + couponReinvested;
 	denominator = cleanPrice + accruedCouponNow;
@@ -466,6 +881,7 @@ def bondImpliedRepoRate(cleanPrice, futuresPrice, accruedCouponNow, accruedCoupo
 
 def bondCashAndCarryArbitrage(notional, cleanPrice, futuresPrice, repoRate, accruedCouponNow, accruedCouponDelivery, conversionFactor, daysToMaturity, daysInYear=DEFAULT_BASIS_DAYS()):
 	# Calculate the cash-and-carry arbitrage profit given by buying bond, repo bond, sell future for bond, futures delivery.
+	daysInYear = daysInYearFromBasis(daysInYear);
 
 	repoRate *= 0.01;
 
@@ -485,6 +901,7 @@ def interestRateStrip(interestRates, days, daysInYear=DEFAULT_BASIS_DAYS()):
 	# You can construct an interest rate from the cash interest rate and the forward-forward/FRA rates for a series of consecutive
 	#	time periods.  This works as you can refinance at LIBOR for the time periods and offset by an FRA which would give you
 	#	a set of known hedged interest rates.
+	daysInYear = daysInYearFromBasis(daysInYear);
 	
 	count = len(interestRates);
 	rate = 1.0;
@@ -508,6 +925,7 @@ def interestRateFutureNumberContracts(notional, notionalPerContract, libor, days
 	#	current futures period, which should be something like 90 / 360 for a strict three month future etc.  The days figure cover the 
 	#	equivalent days for an FRA which would be constructed for this forward rate... it could be the same as the future period, or 
 	#	some other time...
+	daysInYear = daysInYearFromBasis(daysInYear);
 	numContracts = notional / notionalPerContract;
 	return round((numContracts * (days / futureDays)) / (1 + libor * 0.01 * (days / daysInYear)));
 
@@ -25,14 +25,23 @@ __status__ = "Development"
 __version__ = "0.1.0"
 
 import math
+from collections import namedtuple
+
+import numpy
+
+from QDFinArray import isArray
+from QDFinArray import sqrt
 
-from QDFinInterest import complexInterestRate
 from QDFinInterest import simpleInterestRate
 from QDFinInterest import effectiveRateProceeds
 from QDFinInterest import convertRateToBondMarketBasis
 
+from QDFinTimeValueMoney import simpleDiscountFactor
+from QDFinTimeValueMoney import complexDiscountFactor
 from QDFinTimeValueMoney import simpleDiscountFactorMoneyMarketBasis
 
+from QDFinDayCount import daysInYearFromBasis
+
 from QDFinConstants import ACT360_DAYS_IN_YEAR
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 from QDFinConstants import DAYS_IN_YEAR
@@ -47,26 +56,26 @@ from QDFinConstants import DAYS_IN_YEAR
 # The annuity is received at the end, rather than the beginning of a year, and the lump sum/initial cost has interest applied after each coupon payment is taken.
 def annuityDeferred(initialCost, interest, years):
 	a = initialCost * (interest/100.0);
-	b = 1 - (1 / complexInterestRate(interest, years));
+	b = 1 - complexDiscountFactor(interest, years);
 	return a / b;
 
 # Annuity received at the end of the year, initial cost is calculated from the complete cashflows for removing the annual amount, discounted for the entire period.
 # This gives the same result as calculating the NPV of N cashflows with an expected yield.
 def annuityDeferredInitialCost(annuity, interest, years):
 	a = annuity / (interest / 100.0);
-	b = 1 - (1 / complexInterestRate(interest, years));
+	b = 1 - complexDiscountFactor(interest, years);
 	return a * b;
 
 def annuityDue(initialCost, interest, years):
 	a = initialCost * (interest/100.0);
-	b = 1 + (interest/100.0) - (1 / complexInterestRate(interest, years-1));
+	b = 1 + (interest/100.0) - complexDiscountFactor(interest, years-1);
 	return a / b;
 
 # Annuity received at the beginning of the year, initial cost is calculated from the complete cashflows for removing the annual amount, discounted for the entire period.
 # This gives a similar result as calculating the NPV of N cashflows with an expected yield, but the first amount 
 def annuityDueInitialCost(annuity, interest, years):
 	a = annuity / (interest / 100.0);
-	b = 1 + (interest/100.0) - (1 / complexInterestRate(interest, years-1));
+	b = 1 + (interest/100.0) - complexDiscountFactor(interest, years-1);
 	return a * b;a
 
 # For the given initial cost we are calculating the amount you will get for perpetuity for a given yield.
@@ -88,11 +97,12 @@ def certificateOfDepositMaturityProceeds(faceValue, interest, days, daysInYear=A
 # 		Yield goes down, the price of the instrument goes up.
 # The secondary market price, is the amount that for a given yield, gives the maturity proceeds of the CD.
 def certificateOfDepositSecondaryMarketPrice(proceeds, marketYield, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
-	return proceeds / simpleInterestRate(marketYield, daysToMaturity, daysInYear);
+	return proceeds * simpleDiscountFactor(marketYield, daysToMaturity, daysInYear);
 
 # Generate the return on investment for hold a CD for a length of time. The maturity proceeds are fixed, as the yield reduces, 
 #	returns increase...
 def certificateOfDepositSimpleYield(interest, saleInterest, initialMaturity, daysHeld, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	daysToMaturity = initialMaturity - daysHeld;
 	cdYield = simpleInterestRate(interest, initialMaturity, daysInYear);
 	marketYield = simpleInterestRate(saleInterest, daysToMaturity, daysInYear);
@@ -108,6 +118,7 @@ def certificateOfDepositSimpleYield(interest, saleInterest, initialMaturity, day
 #		a is days till maturity at purchase
 #		b is days till maturity at sale
 def certificateOfDepositSimpleYieldWhichReturnsTargetYield(targetYield, interest, initialMaturity, daysHeld, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	interest = interest / 100;
 	targetYield = targetYield / 100;
 
@@ -123,6 +134,7 @@ def certificateOfDepositSimpleYieldWhichReturnsTargetYield(targetYield, interest
 #	the total proceeds are fixed, so for the same return, the initial value/price must go up to deliver the same proceeds at maturity.
 #	The maturity proceeds are fixed, as the yield reduces, the price will increase...
 def certificateOfDepositComplexYield(purchaseYield, saleYield, daysPurchaseToMaturity, daysSaleToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	purchaseTotal = 1 + purchaseYield * 0.01 * (daysPurchaseToMaturity/daysInYear);
 	saleTotal = 1 + saleYield * 0.01 * (daysSaleToMaturity/daysInYear);
 	days = daysPurchaseToMaturity - daysSaleToMaturity
@@ -133,26 +145,24 @@ def certificateOfDepositComplexYield(purchaseYield, saleYield, daysPurchaseToMat
 #	We need the date between the purchase date and the next coupon coming up, and the number of days between each of the coupons
 #	going forward till the maturity date.
 def certificateOfDepositMultiCouponPrice(faceValue, interest, marketYield, daysBetweenPurchaseAndNextCoupon, daysToNextCoupons, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	interest = interest / 100;
 	marketYield = marketYield / 100;
 	
-	discountedDays = 0;
 	discountedFaceValue = 0;
 	discountedCoupons = 0;
 	count = len(daysToNextCoupons);
+	compounded = 1;
 
 	for i in range(count):
-		# For each coupon period, we need to aggregate all the discounts that affect it, do give us the present value
-		#	of all of the coupons.
+		# Each coupon is discounted by all of the coupon periods up to it, so keep a running product of the period discounts
+		#	rather than rebuilding it from the first period for every coupon.
 		days = daysToNextCoupons[i]/daysInYear;
-		discount = 1;
-		for j in range(i+1):
-			discountDays = daysToNextCoupons[j];
-			if j == 0:
-				discountDays = daysBetweenPurchaseAndNextCoupon;
-			couponDiscount = 1 + marketYield * (discountDays/daysInYear);
-			discount *= couponDiscount;
-		discount = 1.0 / discount;
+		discountDays = daysToNextCoupons[i];
+		if i == 0:
+			discountDays = daysBetweenPurchaseAndNextCoupon;
+		compounded *= 1 + marketYield * (discountDays/daysInYear);
+		discount = 1.0 / compounded;
 		discountedCoupons += (faceValue * interest * days * discount);
 
 		# We've generated a discount covering the entire coupon range, we can get the present value of the face value
@@ -161,19 +171,82 @@ def certificateOfDepositMultiCouponPrice(faceValue, interest, marketYield, daysB
 
 	return discountedFaceValue + discountedCoupons;
 
+# Valuation of each line of a CD book, from certificateOfDepositBook.
+CertificateOfDepositValuation = namedtuple("CertificateOfDepositValuation", ["price", "secondaryMarketPrice", "holdingPeriodYield"]);
+
+# Lay out ragged coupon schedules as a (line x coupon) array, padded with 0 days after each line's last coupon.
+def couponDaySchedule(daysToNextCoupons):
+	if isinstance(daysToNextCoupons, numpy.ndarray):
+		return daysToNextCoupons.astype(numpy.float64);
+	schedule = numpy.zeros((len(daysToNextCoupons), max(len(days) for days in daysToNextCoupons)));
+	for line, days in enumerate(daysToNextCoupons):
+		schedule[line, :len(days)] = days;
+	return schedule;
+
+# Value a whole book of CDs in one call.  The face values, coupon interest, market yields and days to the next coupon are arrays
+#	with a value per line (or single values for all lines), and daysToNextCoupons holds each line's coupon periods as in
+#	certificateOfDepositMultiCouponPrice, either as a list of lists of different lengths or an array padded with 0 days.  A
+#	padded period discounts by 1 and pays no coupon, so the running product of the discounts is a cumulative product along
+#	each row.  For every line this gives:
+#		price					certificateOfDepositMultiCouponPrice.
+#		secondaryMarketPrice	certificateOfDepositSecondaryMarketPrice of the proceeds over the days to maturity for a single
+#								coupon line.  With more coupons the intermediate ones count too, so this is the price.
+#		holdingPeriodYield		the yield from holding the CD daysHeld days and selling at saleYields, None unless both are
+#								given.  Every line is bought at the price, collects the coupons paid while it is held, and is
+#								sold for the rest of its cashflows discounted at the sale yield from the sale date with the same
+#								running product, the periods being cut to the days left after the sale.  For a single coupon
+#								line bought at issue at its coupon rate, this is certificateOfDepositSimpleYield.
+def certificateOfDepositBook(faceValues, interests, marketYields, daysBetweenPurchaseAndNextCoupon, daysToNextCoupons, saleYields=None, daysHeld=None, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	schedule = couponDaySchedule(daysToNextCoupons);
+	numLines = len(schedule);
+	faceValues = numpy.broadcast_to(numpy.asarray(faceValues, dtype=numpy.float64), (numLines,));
+	interests = numpy.broadcast_to(numpy.asarray(interests, dtype=numpy.float64), (numLines,));
+	marketYields = numpy.broadcast_to(numpy.asarray(marketYields, dtype=numpy.float64), (numLines,));
+
+	discountDays = numpy.array(schedule);
+	discountDays[:, 0] = daysBetweenPurchaseAndNextCoupon;
+	discounts = 1.0 / numpy.cumprod(1 + (marketYields[:, numpy.newaxis] / 100) * (discountDays/daysInYear), axis=1);
+	coupons = faceValues[:, numpy.newaxis] * (interests[:, numpy.newaxis] / 100) * (schedule/daysInYear) * discounts;
+	price = faceValues * discounts[:, -1] + numpy.sum(coupons, axis=1);
+
+	numCoupons = numpy.count_nonzero(schedule, axis=1);
+	singleCoupon = (numCoupons == 1);
+	finalDays = schedule[numpy.arange(numLines), numCoupons - 1];
+	daysToMaturity = numpy.sum(discountDays, axis=1);
+	proceeds = certificateOfDepositMaturityProceeds(faceValues, interests, finalDays, daysInYear);
+	secondaryMarketPrice = numpy.where(singleCoupon, certificateOfDepositSecondaryMarketPrice(proceeds, marketYields, daysToMaturity, daysInYear), price);
+
+	holdingPeriodYield = None;
+	if saleYields is not None and daysHeld is not None:
+		daysHeld = numpy.broadcast_to(numpy.asarray(daysHeld, dtype=numpy.float64), (numLines,));
+		saleYields = numpy.broadcast_to(numpy.asarray(saleYields, dtype=numpy.float64), (numLines,));
+		# Days from purchase to each coupon, the coupons paid up to the sale, and the rest discounted from the sale date.
+		couponDays = numpy.cumsum(discountDays, axis=1);
+		cashflows = faceValues[:, numpy.newaxis] * (interests[:, numpy.newaxis] / 100) * (schedule/daysInYear);
+		cashflows[numpy.arange(numLines), numCoupons - 1] += faceValues;
+		saleDays = numpy.clip(couponDays - daysHeld[:, numpy.newaxis], 0, discountDays);
+		saleDiscounts = 1.0 / numpy.cumprod(1 + (saleYields[:, numpy.newaxis] / 100) * (saleDays/daysInYear), axis=1);
+		paid = (couponDays <= daysHeld[:, numpy.newaxis]);
+		salePrice = numpy.sum(numpy.where(paid, 0.0, cashflows * saleDiscounts), axis=1);
+		received = numpy.sum(numpy.where(paid, cashflows, 0.0), axis=1);
+		holdingPeriodYield = ((salePrice + received) / price - 1) * (daysInYear/daysHeld) * 100;
+	return CertificateOfDepositValuation(price, secondaryMarketPrice, holdingPeriodYield);
+
 # The maturity proceeds of a discount instrument is just the face value of the instrument.
 def discountInstrumentMaturityProceeds(faceValue):
 	return faceValue;
 
 # The secondary market price is the present value of the instrument... essentially the discounted price.
 def discountInstrumentPriceUsingYield(faceValue, marketYield, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
-	return discountInstrumentMaturityProceeds(faceValue) / simpleInterestRate(marketYield, daysToMaturity, daysInYear);
+	return discountInstrumentMaturityProceeds(faceValue) * simpleDiscountFactor(marketYield, daysToMaturity, daysInYear);
 
 # Generate the discount rate, used by instruments quoted on a discount rate.
 #	Instruments which we know are quoted on a discount rate...
 #	USA: T-bills, BA, CP
 #	UK: T-bills (gilts), BA
 def discountInstrumentDiscountRate(discountRate, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return ((discountRate / 100) * (daysToMaturity / daysInYear)) * 100;
 
 # Generate hte discount rate from the price and face value.  Solve:
@@ -183,6 +256,7 @@ def discountInstrumentDiscountRate(discountRate, daysToMaturity, daysInYear=ACT3
 #		y is days in year
 #		d is days to maturity
 def discountInstrumentDiscountRateFromPriceAndFaceValue(faceValue, price, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return  (1 - price/faceValue) * (daysInYear/daysToMaturity) * 100;
 
 # For instruments quoted on a discount rate, what is the discount.  Rate scaled by days remaining, scaled by the face value.
@@ -196,6 +270,8 @@ def discountInstrumentPriceUsingDiscountRate(faceValue, discountRate, daysToMatu
 # Generate the return on investment for hold a Discount Instrument for a length of time. 
 #	The total proceeds are divided through by the inital amount... 
 def discountInstrumentSimpleYield(discountRate, saleDiscountRate, initialMaturity, daysHeld, daysInYear=ACT360_DAYS_IN_YEAR(), basis=DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	basis = daysInYearFromBasis(basis);
 	daysToMaturity = initialMaturity - daysHeld;
 	purchaseDiscount = 1 - discountRate*0.01 * (initialMaturity/daysInYear);
 	saleDiscount = 1 - saleDiscountRate*0.01 * (daysToMaturity/daysInYear);
@@ -208,21 +284,28 @@ def discountInstrumentSimpleYield(discountRate, saleDiscountRate, initialMaturit
 # 	P = F x (1 + i x (days/year)); if we wanted the price which multiplied by yield, gives us the face value.
 #	...subst for P and rebalance to get in terms of D = i / (1 + i x (days/year))
 def discountInstrumentDiscountRateFromYield(marketYield, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	my = marketYield / 100;
 	return (my / (1 + my * (daysToMaturity / daysInYear))) * 100.0;
 
 # Conversely then, discount rate can give us the yield...
 def discountInstrumentYieldFromDiscountRate(discountRate, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	dr = discountRate * 0.01;
 	return (dr / (1 - dr * (daysToMaturity / daysInYear))) * 100.0;
 
 # Generate the equivalent yield in the case that we want to match a bond with one or two coupons left to pay with a treasury bill or similar.
+#	Over half a year the yield is the root of a quadratic, and for arrays of bills the two cases are picked per row with a mask.
 def discountInstrumentBondEquivalentYield(discountRate, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR(), bondDaysInYear=ACT365_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	bondDaysInYear = daysInYearFromBasis(bondDaysInYear);
+	vectorised = isArray(discountRate, daysToMaturity, daysInYear, bondDaysInYear);
 
-	if daysToMaturity <= 182:
-		return convertRateToBondMarketBasis(discountInstrumentYieldFromDiscountRate(discountRate, daysToMaturity, daysInYear));
+	halfYear = convertRateToBondMarketBasis(discountInstrumentYieldFromDiscountRate(discountRate, daysToMaturity, daysInYear));
+	if not vectorised and daysToMaturity <= 182:
+		return halfYear;
 
-	discountRate *= 0.01;
+	discountRate = discountRate * 0.01;
 
 	daysInMoneyMarketBasis = daysToMaturity/daysInYear;
 	daysInBondMarketBasis = daysToMaturity/bondDaysInYear;
@@ -231,17 +314,23 @@ def discountInstrumentBondEquivalentYield(discountRate, daysToMaturity, daysInYe
 	b = (2 * daysToMaturity) / bondDaysInYear;
 	c = 2 * (1 - (1/ (1 - discountRate * (daysToMaturity/daysInYear))));
 
-	quadratic = (-b + pow(b*b - 4*a*c, 0.5))/ (2*a); 
+	quadratic = halfYearQuadraticRoot(a, b, c);
 
+	if vectorised:
+		return numpy.where(daysToMaturity <= 182, halfYear, quadratic * 100);
 	return quadratic * 100;
 
 # Generate the equivalent discount rate from a bond equivalent yield.  We want to match a bond with one or two coupons left to pay with a treasury bill or similar.
 def discountInstrumentRateFromBondEquivalentYield(marketYield, daysToMaturity, daysInYear=ACT360_DAYS_IN_YEAR(), bondDaysInYear=ACT365_DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	bondDaysInYear = daysInYearFromBasis(bondDaysInYear);
+	vectorised = isArray(marketYield, daysToMaturity, daysInYear, bondDaysInYear);
 
-	if daysToMaturity <= 182:
-		return convertRateToBondMarketBasis(discountInstrumentDiscountRateFromYield(marketYield, daysToMaturity, daysInYear))
+	halfYear = convertRateToBondMarketBasis(discountInstrumentDiscountRateFromYield(marketYield, daysToMaturity, daysInYear));
+	if not vectorised and daysToMaturity <= 182:
+		return halfYear;
 
-	marketYield *= 0.01;
+	marketYield = marketYield * 0.01;
 
 	daysInMoneyMarketBasis = daysToMaturity/daysInYear;
 	daysInBondMarketBasis = daysToMaturity/bondDaysInYear;
@@ -250,9 +339,15 @@ def discountInstrumentRateFromBondEquivalentYield(marketYield, daysToMaturity, d
 	b = (2 * daysToMaturity) / daysInYear;
 	c = 2 * (1 - (1/ (1 + marketYield * (daysToMaturity/bondDaysInYear))));
 
-	quadratic = (-b + pow(b*b - 4*a*c, 0.5))/ (2*a); 
+	quadratic = halfYearQuadraticRoot(a, b, c);
 
+	if vectorised:
+		return numpy.where(daysToMaturity <= 182, halfYear, abs(quadratic) * 100);
 	return abs(quadratic) * 100;
 
-
-	
\ No newline at end of file
+# Root of the quadratic for the bond equivalent conversions over half a year.  The square root is correctly rounded in both math
+#	and NumPy, so single values and arrays give the same result to the bit.  Rows of an array which fall in the half year
+#	case can give an invalid root here, which is masked out by the caller.
+def halfYearQuadraticRoot(a, b, c):
+	with numpy.errstate(invalid="ignore", divide="ignore"):
+		return (-b + sqrt(b*b - 4*a*c))/ (2*a);
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import math
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from QDFinConstants import DAYS_IN_YEAR
+from QDFinDayCount import daysInYearFromBasis
+from QDFinStatistics import CurveInterpolator
+from QDFinStatistics import RunningStatistics
+
+# Monte Carlo valuation of cashflows under a simulated short rate, rather than a single flat market yield.  Rates and
+#	volatilities are percentages as elsewhere (a volatility of 1 moves the short rate by about 1% a year), times are in years.
+#	Paths are simulated in blocks of blockSize, and each block draws from its own random stream spawned from the seed, so the
+#	blocks can be spread over a process pool and the result is the same whatever the number of workers.
+MonteCarloValuation = namedtuple("MonteCarloValuation", ["value", "standardError", "numPaths"]);
+
+# Standard deviation of the change in an Ornstein-Uhlenbeck process over each step, exactly rather than by Euler steps.
+def ornsteinUhlenbeckSteps(meanReversion, volatility, steps):
+	if meanReversion == 0.0:
+		return numpy.exp(-meanReversion * steps), volatility * numpy.sqrt(steps);
+	decay = numpy.exp(-meanReversion * steps);
+	return decay, volatility * numpy.sqrt((1.0 - decay * decay) / (2.0 * meanReversion));
+
+# Integral of each path of values (rows) over the times (columns) by the trapezium rule, from 0 at the first time.
+def trapeziumIntegral(values, times):
+	integral = numpy.zeros(values.shape);
+	integral[:, 1:] = numpy.cumsum(0.5 * (values[:, 1:] + values[:, :-1]) * numpy.diff(times), axis=1);
+	return integral;
+
+# Vasicek model, dr = meanReversion (longTermRate - r) dt + volatility dW.
+class VasicekModel(object):
+	def __init__(self, initialRate, meanReversion, longTermRate, volatility):
+		self.initialRate = initialRate * 0.01;
+		self.meanReversion = meanReversion;
+		self.longTermRate = longTermRate * 0.01;
+		self.volatility = volatility * 0.01;
+
+	def simulate(self, generator, numPaths, times):
+		# Short rates as decimals for each path (row) at each of the times (columns), which start at 0.
+		decay, deviation = ornsteinUhlenbeckSteps(self.meanReversion, self.volatility, numpy.diff(times));
+		rates = numpy.empty((numPaths, len(times)));
+		rates[:, 0] = self.initialRate;
+		for step in range(len(times) - 1):
+			rates[:, step + 1] = rates[:, step] * decay[step] + self.longTermRate * (1.0 - decay[step]) + deviation[step] * generator.standard_normal(numPaths);
+		return rates;
+
+	def integrate(self, generator, numPaths, times):
+		# Integral of the short rate from 0 to each of the times on each path.
+		return trapeziumIntegral(self.simulate(generator, numPaths, times), times);
+
+# Hull-White one factor model, dr = (theta(t) - meanReversion r) dt + volatility dW, with theta fitted to an initial curve of
+#	continuously compounded zero rates.  The short rate is simulated as x(t) + alpha(t), where x is an Ornstein-Uhlenbeck
+#	process from 0 and alpha(t) = f(0, t) + volatility^2 / (2 meanReversion^2) (1 - e^(-meanReversion t))^2 is found from
+#	the instantaneous forwards of the curve, which are flat between the knots.  The first zero rate is held back to time 0.
+#	The forwards jump at the knots, so rather than by the trapezium rule alpha is integrated exactly between the simulation
+#	times: the forwards integrate to the zero rate times the time and the volatility term has a closed form.
+class HullWhiteModel(object):
+	def __init__(self, times, zeroRates, meanReversion, volatility):
+		times = numpy.asarray(times, dtype=numpy.float64);
+		zeroRates = numpy.asarray(zeroRates, dtype=numpy.float64) * 0.01;
+		if times[0] > 0.0:
+			times = numpy.concatenate(([0.0], times));
+			zeroRates = numpy.concatenate((zeroRates[:1], zeroRates));
+		self.curve = CurveInterpolator(times, zeroRates, "flatForward");
+		self.meanReversion = meanReversion;
+		self.volatility = volatility * 0.01;
+
+	def forwardRate(self, times):
+		# Instantaneous forward rate, the slope of rate * time on the segment each time falls in.
+		return self.curve.slopes[self.curve.segments(times)];
+
+	def alpha(self, times):
+		if self.meanReversion == 0.0:
+			return self.forwardRate(times) + 0.5 * self.volatility * self.volatility * times * times;
+		shape = (1.0 - numpy.exp(-self.meanReversion * times)) / self.meanReversion;
+		return self.forwardRate(times) + 0.5 * self.volatility * self.volatility * shape * shape;
+
+	def alphaIntegral(self, times):
+		# Integral of alpha from 0 to each of the times.  For small meanReversion * time the closed form loses its digits to
+		#	cancellation, so the start of its series is used instead.
+		index = self.curve.segments(times);
+		forwards = self.curve.knots[index] + self.curve.slopes[index] * (times - self.curve.times[index]);
+		meanReversion = self.meanReversion;
+		series = times ** 3 / 3.0 - meanReversion * times ** 4 / 4.0 + 7.0 * meanReversion * meanReversion * times ** 5 / 60.0;
+		if meanReversion == 0.0:
+			shapes = series;
+		else:
+			decay = numpy.exp(-meanReversion * times);
+			closedForm = (times - 2.0 * (1.0 - decay) / meanReversion + (1.0 - decay * decay) / (2.0 * meanReversion)) / (meanReversion * meanReversion);
+			shapes = numpy.where(numpy.abs(meanReversion * times) < 1e-3, series, closedForm);
+		return forwards + 0.5 * self.volatility * self.volatility * shapes;
+
+	def simulateFactor(self, generator, numPaths, times):
+		# The Ornstein-Uhlenbeck part x of the short rate on each path at each of the times.
+		decay, deviation = ornsteinUhlenbeckSteps(self.meanReversion, self.volatility, numpy.diff(times));
+		factor = numpy.zeros((numPaths, len(times)));
+		for step in range(len(times) - 1):
+			factor[:, step + 1] = factor[:, step] * decay[step] + deviation[step] * generator.standard_normal(numPaths);
+		return factor;
+
+	def simulate(self, generator, numPaths, times):
+		return self.simulateFactor(generator, numPaths, times) + self.alpha(times);
+
+	def integrate(self, generator, numPaths, times):
+		# Integral of the short rate from 0 to each of the times on each path, x by the trapezium rule and alpha exactly.
+		return trapeziumIntegral(self.simulateFactor(generator, numPaths, times), times) + self.alphaIntegral(times);
+
+# Times the paths are simulated at, steps of no more than 1 / stepsPerYear with each of the cashflow times included exactly.
+def simulationTimes(years, stepsPerYear):
+	horizon = float(numpy.max(years));
+	numSteps = max(int(math.ceil(horizon * stepsPerYear)), 1);
+	return numpy.unique(numpy.concatenate(([0.0], numpy.linspace(0.0, horizon, numSteps + 1), numpy.asarray(years, dtype=numpy.float64))));
+
+# Value the cashflows on one block of paths, returning RunningStatistics of the present value on each path.  The discount factor
+#	to each time is e^-(integral of the short rate), with the integral from the model's integrate over the simulation times.
+def simulateBlock(task):
+	model, cashflows, years, times, numPaths, seedSequence = task;
+	generator = numpy.random.default_rng(seedSequence);
+	integral = model.integrate(generator, numPaths, times);
+	columns = numpy.searchsorted(times, years);
+	values = numpy.exp(-integral[:, columns]) @ cashflows;
+	return RunningStatistics().addMany(values);
+
+# Present value of cashflows received at times in years under the model, with the Monte Carlo standard error.  workers above 1
+#	spreads the blocks of paths over a process pool.
+def monteCarloPresentValue(model, cashflows, years, numPaths=10000, stepsPerYear=52, seed=0, blockSize=1000, workers=1):
+	cashflows = numpy.asarray(cashflows, dtype=numpy.float64);
+	years = numpy.asarray(years, dtype=numpy.float64);
+	times = simulationTimes(years, stepsPerYear);
+
+	blockPaths = [min(blockSize, numPaths - start) for start in range(0, numPaths, blockSize)];
+	seeds = numpy.random.SeedSequence(seed).spawn(len(blockPaths));
+	tasks = [(model, cashflows, years, times, blockPaths[block], seeds[block]) for block in range(len(blockPaths))];
+
+	if workers > 1:
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			blocks = list(executor.map(simulateBlock, tasks));
+	else:
+		blocks = [simulateBlock(task) for task in tasks];
+
+	statistics = RunningStatistics();
+	for block in blocks:
+		statistics.merge(block);
+	return MonteCarloValuation(statistics.mean(), statistics.standardDeviation(1) / math.sqrt(statistics.count), statistics.count);
+
+# Cashflows of a bond and the years to each of them, in the form taken by bondDuration and bondConvexity.  The next coupon is
+#	paid in daysToNextCoupon days and the rest follow each 1 / couponFrequency years, with the notional repaid on the last.
+def bondCashflows(notional, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	coupon = notional * couponRate * 0.01 / couponFrequency;
+	cashflows = [coupon] * numCouponPaymentsRemaining;
+	cashflows[-1] += notional;
+	years = [daysToNextCoupon / daysInYear + payment / couponFrequency for payment in range(numCouponPaymentsRemaining)];
+	return cashflows, years;
+
+# Monte Carlo dirty price of a bond, with the same bond parameters as dirtyBondPrice.
+def monteCarloBondPrice(model, notional, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear=DAYS_IN_YEAR(), numPaths=10000, stepsPerYear=52, seed=0, blockSize=1000, workers=1):
+	cashflows, years = bondCashflows(notional, couponRate, couponFrequency, numCouponPaymentsRemaining, daysToNextCoupon, daysInYear);
+	return monteCarloPresentValue(model, cashflows, years, numPaths, stepsPerYear, seed, blockSize, workers);
+
+# Monte Carlo value of an annuity paid at the end of each year, the stream from annuityDeferred.  With a flat rate this is
+#	annuityDeferredInitialCost.
+def monteCarloAnnuityValue(model, annuity, years, numPaths=10000, stepsPerYear=52, seed=0, blockSize=1000, workers=1):
+	return monteCarloPresentValue(model, [annuity] * years, list(range(1, years + 1)), numPaths, stepsPerYear, seed, blockSize, workers);
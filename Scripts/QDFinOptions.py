@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import math
+from collections import namedtuple
+
+import numpy
+
+from QDFinArray import isArray
+from QDFinArray import log
+from QDFinArray import exp
+from QDFinArray import sqrt
+
+from QDFinConstants import DAYS_IN_YEAR
+from QDFinDayCount import daysInYearFromBasis
+from QDFinStatistics import gaussian
+
+# European option values and Greeks.  Rates, dividend yields and volatilities are percentages in the same way as the rest of the
+#	scripts (5 is 5%), and the time to expiry is given in days with the days in the year for the convention used.  Any of the
+#	inputs can be NumPy arrays, which broadcast against each other, so a whole book can be valued in one call.
+#		price	value of the option.
+#		delta	change in value for a change of 1 in the spot or futures price.
+#		gamma	change in delta for a change of 1 in the spot or futures price.
+#		vega	change in value for a 1% change in volatility.
+#		theta	change in value for one day passing.
+#		rho		change in value for a 1% change in the interest rate.
+OptionValuation = namedtuple("OptionValuation", ["price", "delta", "gamma", "vega", "theta", "rho"]);
+
+# Cumulative normal distribution, the probability that a standard normal variable is at most x.  Single values use math.erfc,
+#	arrays use Hart's double precision approximation as given by West, "Better approximations to cumulative normal functions",
+#	which agrees with erfc to within 1e-16 absolute error.
+def cumulativeNormal(x):
+	if not isArray(x):
+		return 0.5 * math.erfc(-x / math.sqrt(2.0));
+
+	x = numpy.asarray(x, dtype=numpy.float64);
+	xAbs = numpy.abs(x);
+	exponential = numpy.exp(-0.5 * xAbs * xAbs);
+
+	numerator = 3.52624965998911e-02 * xAbs + 0.700383064443688;
+	for coefficient in [6.37396220353165, 33.912866078383, 112.079291497871, 221.213596169931, 220.206867912376]:
+		numerator = numerator * xAbs + coefficient;
+	denominator = 8.83883476483184e-02 * xAbs + 1.75566716318264;
+	for coefficient in [16.064177579207, 86.7807322029461, 296.564248779674, 637.333633378831, 793.826512519948, 440.413735824752]:
+		denominator = denominator * xAbs + coefficient;
+	near = exponential * numerator / denominator;
+
+	# Continued fraction for the tail.
+	fraction = xAbs + 0.65;
+	for coefficient in [4.0, 3.0, 2.0, 1.0]:
+		fraction = xAbs + coefficient / fraction;
+	far = exponential / fraction / 2.506628274631;
+
+	tail = numpy.where(xAbs < 7.07106781186547, near, far);
+	tail = numpy.where(xAbs > 37.0, 0.0, tail);
+	return numpy.where(x > 0.0, 1.0 - tail, tail);
+
+# Pick the call or put value, isCall can be a boolean array.
+def callOrPut(isCall, callValue, putValue):
+	if isArray(isCall, callValue, putValue):
+		return numpy.where(isCall, callValue, putValue);
+	if isCall:
+		return callValue;
+	return putValue;
+
+# Generalised Black-Scholes on an underlying price with a cost of carry, everything worked out from one evaluation of d1, d2 and
+#	the normal distribution.  carryRate and rate are decimals and time is in years.  onFutures gives the rho of Black-76, where
+#	the futures price doesn't move with the interest rate.
+def blackValuation(isCall, price, strike, time, rate, carryRate, volatility, onFutures):
+	rootTime = sqrt(time);
+	volatilityRootTime = volatility * rootTime;
+	d1 = (log(price / strike) + (carryRate + 0.5 * volatility * volatility) * time) / volatilityRootTime;
+	d2 = d1 - volatilityRootTime;
+
+	carryDiscount = exp((carryRate - rate) * time);
+	strikeDiscount = strike * exp(-rate * time);
+	normalD1 = cumulativeNormal(d1);
+	normalD2 = cumulativeNormal(d2);
+	normalMinusD1 = cumulativeNormal(-d1);
+	normalMinusD2 = cumulativeNormal(-d2);
+	densityD1 = gaussian(d1);
+
+	callPrice = price * carryDiscount * normalD1 - strikeDiscount * normalD2;
+	putPrice = strikeDiscount * normalMinusD2 - price * carryDiscount * normalMinusD1;
+	optionPrice = callOrPut(isCall, callPrice, putPrice);
+
+	delta = callOrPut(isCall, carryDiscount * normalD1, -carryDiscount * normalMinusD1);
+	gamma = carryDiscount * densityD1 / (price * volatilityRootTime);
+	vega = price * carryDiscount * densityD1 * rootTime;
+
+	decay = -price * carryDiscount * densityD1 * volatility / (2.0 * rootTime);
+	callTheta = decay - (carryRate - rate) * price * carryDiscount * normalD1 - rate * strikeDiscount * normalD2;
+	putTheta = decay + (carryRate - rate) * price * carryDiscount * normalMinusD1 + rate * strikeDiscount * normalMinusD2;
+	theta = callOrPut(isCall, callTheta, putTheta);
+
+	if onFutures:
+		rho = -time * optionPrice;
+	else:
+		rho = callOrPut(isCall, time * strikeDiscount * normalD2, -time * strikeDiscount * normalMinusD2);
+	return optionPrice, delta, gamma, vega, theta, rho;
+
+# Scale the Greeks to the units given at the top of the file.
+def optionValuation(values, daysInYear):
+	price, delta, gamma, vega, theta, rho = values;
+	return OptionValuation(price, delta, gamma, vega / 100.0, theta / daysInYear, rho / 100.0);
+
+# Black-Scholes value and Greeks of a European option on a spot price, with a continuous dividend yield.
+def blackScholes(isCall, spot, strike, days, interest, volatility, dividendYield=0.0, daysInYear=DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	rate = interest / 100.0;
+	values = blackValuation(isCall, spot, strike, days / daysInYear, rate, rate - dividendYield / 100.0, volatility / 100.0, False);
+	return optionValuation(values, daysInYear);
+
+# Black-76 value and Greeks of a European option on a futures or forward price, discounted at the interest rate.
+def black76(isCall, futuresPrice, strike, days, interest, volatility, daysInYear=DAYS_IN_YEAR()):
+	daysInYear = daysInYearFromBasis(daysInYear);
+	values = blackValuation(isCall, futuresPrice, strike, days / daysInYear, interest / 100.0, 0.0, volatility / 100.0, True);
+	return optionValuation(values, daysInYear);
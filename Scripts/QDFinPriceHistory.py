@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import os
+
+import numpy
+
+from QDFinConstants import WORKING_DAYS_IN_YEAR
+from QDFinDayCount import toDates
+
+# Columnar store of daily prices on disk, one directory per history:
+#	prices.npy		float64 (date x instrument) array stored in Fortran order, so each instrument's prices are one contiguous column.
+#	dates.npy		the dates of the rows as datetime64[D], in increasing order.
+#	instruments.txt	the instrument names, one per line, in column order.
+# The prices are opened memory mapped, so a column is a zero-copy view of the file which can be passed straight into the
+#	statistics functions, and only the pages that are read are loaded.
+PRICES_FILE = "prices.npy";
+DATES_FILE = "dates.npy";
+INSTRUMENTS_FILE = "instruments.txt";
+
+# Write a price history, prices is a (date x instrument) array with a row for each of the dates and a column per instrument.
+def writePriceHistory(directory, dates, instruments, prices):
+	dates = toDates(dates);
+	prices = numpy.asarray(prices, dtype=numpy.float64);
+	if prices.shape != (len(dates), len(instruments)):
+		raise ValueError("Prices should have a row for each date and a column for each instrument");
+	if len(dates) > 1 and numpy.any(dates[1:] <= dates[:-1]):
+		raise ValueError("Dates should be in increasing order");
+
+	if not os.path.exists(directory):
+		os.makedirs(directory);
+	stored = numpy.lib.format.open_memmap(os.path.join(directory, PRICES_FILE), mode="w+", dtype=numpy.float64, shape=prices.shape, fortran_order=True);
+	stored[:] = prices;
+	stored.flush();
+	del stored;
+	numpy.save(os.path.join(directory, DATES_FILE), dates);
+	with open(os.path.join(directory, INSTRUMENTS_FILE), "w") as instrumentFile:
+		for instrument in instruments:
+			instrumentFile.write(instrument + "\n");
+	return PriceHistory(directory);
+
+# A price history opened from disk.  The prices stay memory mapped, read only unless opened with mode "r+".
+class PriceHistory(object):
+	def __init__(self, directory, mode="r"):
+		self.directory = directory;
+		self.prices = numpy.load(os.path.join(directory, PRICES_FILE), mmap_mode=mode);
+		self.dates = numpy.load(os.path.join(directory, DATES_FILE));
+		with open(os.path.join(directory, INSTRUMENTS_FILE)) as instrumentFile:
+			self.instruments = [line.strip() for line in instrumentFile if line.strip()];
+		self.columns = dict((instrument, index) for index, instrument in enumerate(self.instruments));
+
+	def __len__(self):
+		return len(self.dates);
+
+	def rows(self, startDate=None, endDate=None):
+		# Slice of the rows from startDate up to and including endDate, either can be left open.
+		start = 0;
+		end = len(self.dates);
+		if startDate is not None:
+			start = int(numpy.searchsorted(self.dates, toDates(startDate), side="left"));
+		if endDate is not None:
+			end = int(numpy.searchsorted(self.dates, toDates(endDate), side="right"));
+		return slice(start, end);
+
+	def column(self, instrument, startDate=None, endDate=None):
+		# Zero-copy view of one instrument's prices between the dates.
+		return self.prices[self.rows(startDate, endDate), self.columns[instrument]];
+
+	def volatilities(self, days=WORKING_DAYS_IN_YEAR(), startDate=None, endDate=None, blockSize=256):
+		# Historic volatility of every instrument between the dates, the same as historicVolatility on each column.  The columns are
+		#	read blockSize instruments at a time, so the whole history never has to be in memory at once.
+		rows = self.rows(startDate, endDate);
+		numPrices = rows.stop - rows.start;
+		offset = 0;
+		if days != numPrices:
+			offset = 1;
+
+		volatilities = numpy.empty(len(self.instruments));
+		for start in range(0, len(self.instruments), blockSize):
+			prices = numpy.asarray(self.prices[rows, start:start + blockSize]);
+			returns = numpy.log(prices[1:] / prices[:-1]);
+			volatilities[start:start + blockSize] = 100.0 * numpy.std(returns, axis=0, ddof=offset) * numpy.sqrt(days);
+		return volatilities;
+
+	def logReturns(self, startDate=None, endDate=None):
+		# Log of the relative price movements of every instrument between the dates, as a (date x instrument) array for
+		#	covarianceMatrix and correlationMatrix.
+		prices = self.prices[self.rows(startDate, endDate)];
+		return numpy.log(prices[1:] / prices[:-1]);
@@ -24,8 +24,14 @@ __email__ = "dev@bedtimecomics.com"
 __status__ = "Development" 
 __version__ = "0.1.0"
 
+import bisect
 import math
 
+import numpy
+
+from QDFinArray import isArray
+from QDFinArray import exp
+
 from QDFinConstants import DAYS_IN_YEAR
 from QDFinConstants import WORKING_DAYS_IN_YEAR
 
@@ -43,8 +49,76 @@ def logInterpolation(sourceValue, destinationValue, sourceTime, destinationTime,
 	logx = math.log(sourceValue) + (math.log(destinationValue) - math.log(sourceValue)) * time;	
 	return math.exp(logx);
 
-# Calculate the mean average of a set of numbers
+# Interpolation along a curve of knots, built once from sorted knot times and values and then queried for one time or an array
+#	of times.  The bracketing knots are found with a binary search (numpy.searchsorted for arrays, bisect for a single time)
+#	and the slope of each segment is worked out once when the curve is built.  Times before the first knot or after the last
+#	are extrapolated from the first or last segment, in the same way as linearInterpolation.  The schemes are:
+#		linear			straight lines between the values, as linearInterpolation.
+#		logLinear		straight lines between the logs of the values, as logInterpolation, for discount factors.
+#		flatForward		the values are continuously compounded zero rates and rate * time is linear between the knots,
+#						so the forward rate is flat across each segment.  Before the first knot the first zero rate is
+#						held flat rather than extrapolated, which would give nonsense rates close to time 0.
+INTERPOLATION_SCHEMES = ["linear", "logLinear", "flatForward"];
+
+class CurveInterpolator(object):
+	def __init__(self, times, values, scheme="linear"):
+		if scheme not in INTERPOLATION_SCHEMES:
+			raise ValueError("Unknown interpolation scheme " + str(scheme) + ", expected one of " + ", ".join(INTERPOLATION_SCHEMES));
+		self.times = numpy.asarray(times, dtype=numpy.float64);
+		self.values = numpy.asarray(values, dtype=numpy.float64);
+		if self.times.ndim != 1 or self.times.shape != self.values.shape or len(self.times) < 2:
+			raise ValueError("Interpolation needs at least two knots with a value for each time");
+		if numpy.any(self.times[1:] <= self.times[:-1]):
+			raise ValueError("Knot times should be in increasing order");
+		self.scheme = scheme;
+
+		# The interpolated quantity at each knot and the slope of each segment.
+		if scheme == "logLinear":
+			self.knots = numpy.log(self.values);
+		elif scheme == "flatForward":
+			self.knots = self.values * self.times;
+		else:
+			self.knots = self.values.copy();
+		self.slopes = numpy.diff(self.knots) / numpy.diff(self.times);
+		self.timeList = self.times.tolist();
+		self.knotList = self.knots.tolist();
+		self.slopeList = self.slopes.tolist();
+
+	def segments(self, times):
+		# Index of the segment used for each time, the first and last segments carry on past the ends of the curve.
+		return numpy.clip(numpy.searchsorted(self.times, times, side="right") - 1, 0, len(self.times) - 2);
+
+	def interpolate(self, times):
+		if not isArray(times):
+			return self.interpolateOne(times);
+		index = self.segments(times);
+		result = self.knots[index] + self.slopes[index] * (times - self.times[index]);
+		if self.scheme == "logLinear":
+			return numpy.exp(result);
+		if self.scheme == "flatForward":
+			with numpy.errstate(divide="ignore", invalid="ignore"):
+				return numpy.where((times < self.times[0]) | (times == 0.0), self.values[0], result / times);
+		return result;
+
+	def interpolateOne(self, time):
+		index = min(max(bisect.bisect_right(self.timeList, time) - 1, 0), len(self.timeList) - 2);
+		result = self.knotList[index] + self.slopeList[index] * (time - self.timeList[index]);
+		if self.scheme == "logLinear":
+			return math.exp(result);
+		if self.scheme == "flatForward":
+			if time < self.timeList[0] or time == 0.0:
+				return float(self.values[0]);
+			return result / time;
+		return result;
+
+	def __call__(self, times):
+		return self.interpolate(times);
+
+# Calculate the mean average of a set of numbers.  NumPy arrays, including memory mapped columns from QDFinPriceHistory, are
+#	summed with NumPy rather than item by item here and in the functions below.
 def mean(numbers):
+	if isArray(numbers):
+		return float(numpy.mean(numbers));
 	numberSum = 0.0;
 	for item in numbers:
 		numberSum += item;
@@ -52,6 +126,8 @@ def mean(numbers):
 
 # Calculate the variance, the mean of all the differences from the mean squared.  You can offset the item count in numbers by an arbitrary amount.
 def variance(numbers, offset = 0):
+	if isArray(numbers):
+		return float(numpy.sum(numpy.square(numbers - numpy.mean(numbers)))) / (len(numbers) - offset);
 	meanAv = mean(numbers);
 	numberSum = 0.0;
 	for item in numbers:
@@ -64,33 +140,19 @@ def standardDeviation(numbers, offset = 0):
 
 # Calculate the volatility of a set of numbers... vol of an option is the annualised standard deviation of the log of relative price movements
 # Assumes that there is more than 1 number, and that we're reducing the vol by 1 if we don't have data points for the entire date range.
+# The days default to WORKING_DAYS_IN_YEAR(), businessDaysInYear on a calendar from QDFinCalendar gives the figure for an actual market and year.
+# This is a single pass over the prices using RunningVolatility.
 def historicVolatility(numbers, days=WORKING_DAYS_IN_YEAR()):
-	lastItem = numbers[0];
-	numItems = len(numbers);
-	differences = list();
-
-	# Calculate a list of the log of the relative price difference
-	for i in range(1, numItems):
-		item = numbers[i];
-		differences.append(math.log(item / lastItem));
-		lastItem = item;
-
-	# If the number of data points is not the same as our annualised count, then we offset the variance calc by one to get
-	# a more accurate volatility... and generate the standard deviation of the ln(price movement).
-	offset = 0;
-	if days != numItems:
-		offset = 1;
-	differenceVariance = variance(differences, offset);
-
-	diffsStandardDeviation = standardDeviation(differences, offset);
-
-	# Volatility is the standard deviation * square root of frequency per year of the data.  Scale to percentage amount.
-	return 100.0 * diffsStandardDeviation * math.sqrt(days);
+	return RunningVolatility().addMany(numbers).volatility(days);
 
 # Correlation coefficient, calculate a value that lies between +1 and -1.  If they are perfectly correlated, their coefficient is +1,
 # if they move exactly in line but in opposite directions, their correlation is -1.  If there is no correlation, their coefficient is 0.
 # Assumes that both lists are non-empty and have the same length
 def correlationCoefficient(listA, listB):
+	if isArray(listA, listB):
+		differencesA = numpy.asarray(listA) - numpy.mean(listA);
+		differencesB = numpy.asarray(listB) - numpy.mean(listB);
+		return float(numpy.dot(differencesA, differencesB) / math.sqrt(numpy.dot(differencesA, differencesA) * numpy.dot(differencesB, differencesB)));
 	numItems = len(listA);
 	meanA = mean(listA);
 	meanB = mean(listB);
@@ -143,6 +205,8 @@ def covariance(listA, listB, days=WORKING_DAYS_IN_YEAR()):
 #  Sum of the product of differences to the mean of both lists over N - 1.
 def fastCovariance(listA, listB):
 	numItems = len(listA);
+	if isArray(listA, listB):
+		return float(numpy.dot(numpy.asarray(listA) - numpy.mean(listA), numpy.asarray(listB) - numpy.mean(listB))) / (numItems - 1);
 
 	meanA = mean(listA);
 	meanB = mean(listB);
@@ -155,8 +219,357 @@ def fastCovariance(listA, listB):
 	return total / (numItems - 1);
 
 # Gives the output for a given input value when put through a gaussian
-# distribution function.  1  / ( sqrt(2 * PI) * e^(0.5 * x^2) ) where
-# e is approx 2.71828.
+# distribution function.  e^(-0.5 * x^2) / sqrt(2 * PI) where
+# e is approx 2.71828.  x can also be a NumPy array.  The exponent is
+# negated rather than dividing by e^(0.5 * x^2), which overflows a float
+# for |x| above about 37.7.
 def gaussian(x):
-	denominator = math.sqrt(2.0 * math.pi) * math.exp(0.5 * math.pow(x,2)); 
-	return 1 / denominator;
+	return exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi);
+
+# Running mean and variance of a stream of numbers, in a single pass and constant memory using Welford's method.  Numbers can
+#	be added one at a time or in chunks, and accumulators built over separate parts of the data (say by parallel workers) can be
+#	merged to give the same result as a single accumulator over all of it.
+class RunningStatistics(object):
+	def __init__(self):
+		self.count = 0;
+		self.runningMean = 0.0;
+		self.sumSquaredDifferences = 0.0;
+
+	def add(self, value):
+		self.count += 1;
+		delta = value - self.runningMean;
+		self.runningMean += delta / self.count;
+		self.sumSquaredDifferences += delta * (value - self.runningMean);
+		return self;
+
+	def addMany(self, values):
+		# Add a chunk of numbers, the chunk's own mean and squared differences are found with NumPy and merged in.
+		values = numpy.asarray(values, dtype=numpy.float64);
+		if values.size == 0:
+			return self;
+		chunk = RunningStatistics();
+		chunk.count = values.size;
+		chunk.runningMean = float(numpy.mean(values));
+		chunk.sumSquaredDifferences = float(numpy.sum(numpy.square(values - chunk.runningMean)));
+		return self.merge(chunk);
+
+	def merge(self, other):
+		# Combine with the statistics of another set of numbers (Chan et al's parallel update).
+		if other.count == 0:
+			return self;
+		count = self.count + other.count;
+		delta = other.runningMean - self.runningMean;
+		self.runningMean += delta * other.count / count;
+		self.sumSquaredDifferences += other.sumSquaredDifferences + delta * delta * self.count * other.count / count;
+		self.count = count;
+		return self;
+
+	def mean(self):
+		return self.runningMean;
+
+	# Variance and standard deviation, offsetting the item count by an arbitrary amount in the same way as variance().
+	def variance(self, offset = 0):
+		return self.sumSquaredDifferences / (self.count - offset);
+
+	def standardDeviation(self, offset = 0):
+		return math.sqrt(self.variance(offset));
+
+# Running historic volatility of a stream of prices, keeping RunningStatistics of the log of the relative price movements.  Prices
+#	can be added one at a time or in chunks, and a later run of prices can be merged onto an earlier one, which adds the price
+#	movement between the last price of this run and the first of the next.
+class RunningVolatility(object):
+	def __init__(self):
+		self.returns = RunningStatistics();
+		self.numPrices = 0;
+		self.firstPrice = None;
+		self.lastPrice = None;
+
+	def add(self, price):
+		if self.lastPrice is not None:
+			self.returns.add(math.log(price / self.lastPrice));
+		else:
+			self.firstPrice = price;
+		self.lastPrice = price;
+		self.numPrices += 1;
+		return self;
+
+	def addMany(self, prices):
+		prices = numpy.asarray(prices, dtype=numpy.float64);
+		if prices.size == 0:
+			return self;
+		if self.lastPrice is not None:
+			self.returns.add(math.log(prices[0] / self.lastPrice));
+		else:
+			self.firstPrice = float(prices[0]);
+		self.returns.addMany(numpy.log(prices[1:] / prices[:-1]));
+		self.lastPrice = float(prices[-1]);
+		self.numPrices += prices.size;
+		return self;
+
+	def merge(self, other):
+		# Merge a run of prices which follows on from this one.
+		if other.numPrices == 0:
+			return self;
+		if self.lastPrice is not None:
+			self.returns.add(math.log(other.firstPrice / self.lastPrice));
+		else:
+			self.firstPrice = other.firstPrice;
+		self.returns.merge(other.returns);
+		self.lastPrice = other.lastPrice;
+		self.numPrices += other.numPrices;
+		return self;
+
+	def volatility(self, days=WORKING_DAYS_IN_YEAR()):
+		# Annualised volatility as a percentage, with the same offset rule as historicVolatility.
+		offset = 0;
+		if days != self.numPrices:
+			offset = 1;
+		return 100.0 * self.returns.standardDeviation(offset) * math.sqrt(days);
+
+# Ring buffer holding the last N values of a stream, so the value leaving a window can be found in constant time.
+class RingBuffer(object):
+	def __init__(self, size):
+		self.values = [0.0] * size;
+		self.size = size;
+		self.count = 0;
+
+	def append(self, value):
+		self.values[self.count % self.size] = value;
+		self.count += 1;
+
+	def back(self, n):
+		# Value added n items before the latest one, back(0) is the latest.
+		return self.values[(self.count - 1 - n) % self.size];
+
+	def latest(self, n):
+		# The last n values, oldest first.
+		return [self.back(i) for i in range(n - 1, -1, -1)];
+
+# Rolling historic volatility over several windows at once, updated in constant time per price.  A window is a number of prices,
+#	so the volatility for a window of 20 is the same as historicVolatility on the last 20 prices.  Each window keeps a running
+#	mean and sum of squared differences of the log price movements, adding the newest and removing the one which has left the
+#	window.  To stop rounding drift, each window's sums are rebuilt from the buffer every refreshInterval prices.
+class RollingVolatility(object):
+	def __init__(self, windows=(20, 60, 252), refreshInterval=10000):
+		self.windows = sorted(windows);
+		self.returns = RingBuffer(self.windows[-1]);
+		self.lastPrice = None;
+		self.numPrices = 0;
+		self.refreshInterval = refreshInterval;
+		self.statistics = dict((window, RunningStatistics()) for window in self.windows);
+
+	def add(self, price):
+		if self.lastPrice is not None:
+			value = math.log(price / self.lastPrice);
+			self.returns.append(value);
+			for window in self.windows:
+				statistics = self.statistics[window];
+				statistics.add(value);
+				if statistics.count > window - 1:
+					# Remove the movement which has just left the window (Welford's update in reverse).
+					old = self.returns.back(window - 1);
+					statistics.count -= 1;
+					delta = old - statistics.runningMean;
+					statistics.runningMean -= delta / statistics.count;
+					statistics.sumSquaredDifferences -= delta * (old - statistics.runningMean);
+				if self.returns.count % self.refreshInterval == 0:
+					self.statistics[window] = RunningStatistics().addMany(self.returns.latest(statistics.count));
+		self.lastPrice = price;
+		self.numPrices += 1;
+		return self;
+
+	def addMany(self, prices):
+		for price in prices:
+			self.add(price);
+		return self;
+
+	def ready(self, window):
+		# True once there are enough prices to fill the window.
+		return self.numPrices >= window;
+
+	def volatility(self, window, days=WORKING_DAYS_IN_YEAR()):
+		# Annualised volatility as a percentage for the window, with the same offset rule as historicVolatility.
+		numPrices = min(window, self.numPrices);
+		offset = 0;
+		if days != numPrices:
+			offset = 1;
+		return 100.0 * self.statistics[window].standardDeviation(offset) * math.sqrt(days);
+
+	def volatilities(self, days=WORKING_DAYS_IN_YEAR()):
+		# Volatility for each of the windows which are full.
+		return dict((window, self.volatility(window, days)) for window in self.windows if self.ready(window));
+
+# Rolling covariance and correlation between two streams over several windows at once, updated in constant time per pair of
+#	observations.  Results for a window match covariance, fastCovariance and correlationCoefficient on the last window items.
+class RollingCorrelation(object):
+	def __init__(self, windows=(20, 60, 252), refreshInterval=10000):
+		self.windows = sorted(windows);
+		self.valuesA = RingBuffer(self.windows[-1] + 1);
+		self.valuesB = RingBuffer(self.windows[-1] + 1);
+		self.refreshInterval = refreshInterval;
+		self.state = dict((window, self.emptyState()) for window in self.windows);
+
+	def emptyState(self):
+		# count, mean A, mean B, sum of squared differences A and B, and sum of products of differences.
+		return [0, 0.0, 0.0, 0.0, 0.0, 0.0];
+
+	def rebuildState(self, count):
+		a = numpy.array(self.valuesA.latest(count));
+		b = numpy.array(self.valuesB.latest(count));
+		da = a - numpy.mean(a);
+		db = b - numpy.mean(b);
+		return [count, float(numpy.mean(a)), float(numpy.mean(b)), float(numpy.dot(da, da)), float(numpy.dot(db, db)), float(numpy.dot(da, db))];
+
+	def update(self, state, a, b, sign):
+		# Add (sign 1) or remove (sign -1) a pair from the window's running co-moments.
+		count = state[0] + sign;
+		if count == 0:
+			state[:] = self.emptyState();
+			return;
+		deltaA = a - state[1];
+		deltaB = b - state[2];
+		meanA = state[1] + sign * deltaA / count;
+		meanB = state[2] + sign * deltaB / count;
+		state[3] += sign * deltaA * (a - meanA);
+		state[4] += sign * deltaB * (b - meanB);
+		state[5] += sign * deltaA * (b - meanB);
+		state[0], state[1], state[2] = count, meanA, meanB;
+
+	def add(self, a, b):
+		self.valuesA.append(a);
+		self.valuesB.append(b);
+		for window in self.windows:
+			state = self.state[window];
+			self.update(state, a, b, 1);
+			if state[0] > window:
+				self.update(state, self.valuesA.back(window), self.valuesB.back(window), -1);
+			if self.valuesA.count % self.refreshInterval == 0:
+				self.state[window] = self.rebuildState(state[0]);
+		return self;
+
+	def addMany(self, listA, listB):
+		for i in range(len(listA)):
+			self.add(listA[i], listB[i]);
+		return self;
+
+	def ready(self, window):
+		return self.valuesA.count >= window;
+
+	def covariance(self, window, days=WORKING_DAYS_IN_YEAR()):
+		# Covariance with the same offset rule as covariance().
+		state = self.state[window];
+		offset = 0;
+		if days != state[0]:
+			offset = 1;
+		return state[5] / (state[0] - offset);
+
+	def fastCovariance(self, window):
+		state = self.state[window];
+		return state[5] / (state[0] - 1);
+
+	def correlation(self, window):
+		state = self.state[window];
+		return state[5] / math.sqrt(state[3] * state[4]);
+
+# Sums of values over every window of a series, from a cumulative sum.  The first window - 1 entries are nan.
+def rollingSums(values, window):
+	sums = numpy.full(len(values), numpy.nan);
+	if len(values) >= window:
+		cumulative = numpy.concatenate(([0.0], numpy.cumsum(values)));
+		sums[window - 1:] = cumulative[window:] - cumulative[:-window];
+	return sums;
+
+# Rolling historic volatility over a whole price series in one call.  Entry i is historicVolatility of the window prices ending at
+#	price i, and the first window - 1 entries are nan.  The log price movements are centred on their overall mean before the
+#	cumulative sums are taken, which keeps the sums of squares accurate.
+def rollingHistoricVolatility(prices, window, days=WORKING_DAYS_IN_YEAR()):
+	prices = numpy.asarray(prices, dtype=numpy.float64);
+	returns = numpy.log(prices[1:] / prices[:-1]);
+	returns = returns - numpy.mean(returns);
+	count = window - 1;
+
+	sums = rollingSums(returns, count);
+	sumSquares = rollingSums(returns * returns, count);
+	squaredDifferences = numpy.maximum(sumSquares - sums * sums / count, 0.0);
+
+	offset = 0;
+	if days != window:
+		offset = 1;
+	volatility = numpy.full(len(prices), numpy.nan);
+	volatility[1:] = 100.0 * numpy.sqrt(squaredDifferences / (count - offset)) * math.sqrt(days);
+	return volatility;
+
+# Rolling sums of squared differences for A and B and of the products of differences, over every window of the two series.
+def rollingCoMoments(listA, listB, window):
+	a = numpy.asarray(listA, dtype=numpy.float64);
+	b = numpy.asarray(listB, dtype=numpy.float64);
+	a = a - numpy.mean(a);
+	b = b - numpy.mean(b);
+	sumA = rollingSums(a, window);
+	sumB = rollingSums(b, window);
+	squaresA = rollingSums(a * a, window) - sumA * sumA / window;
+	squaresB = rollingSums(b * b, window) - sumB * sumB / window;
+	products = rollingSums(a * b, window) - sumA * sumB / window;
+	return squaresA, squaresB, products;
+
+# Rolling covariance over two whole series in one call, entry i matches covariance() of the window items ending at item i.
+def rollingCovariance(listA, listB, window, days=WORKING_DAYS_IN_YEAR()):
+	squaresA, squaresB, products = rollingCoMoments(listA, listB, window);
+	offset = 0;
+	if days != window:
+		offset = 1;
+	return products / (window - offset);
+
+# Rolling correlation coefficient over two whole series in one call, entry i matches correlationCoefficient of the window items
+#	ending at item i.
+def rollingCorrelationCoefficient(listA, listB, window):
+	squaresA, squaresB, products = rollingCoMoments(listA, listB, window);
+	return products / numpy.sqrt(squaresA * squaresB);
+
+# Count, means and matrix of summed products of differences from the mean for a (time x asset) array, from one centred matrix
+#	product.  With a chunkSize the rows are read that many at a time and the chunks merged (Chan et al), so the data can be a
+#	memory mapped array too large to hold in memory.
+def coMomentMatrix(data, chunkSize=None):
+	if not isinstance(data, numpy.ndarray):
+		data = numpy.asarray(data, dtype=numpy.float64);
+	numItems = data.shape[0];
+	if chunkSize is None:
+		chunkSize = max(numItems, 1);
+
+	count = 0;
+	means = numpy.zeros(data.shape[1]);
+	coMoments = numpy.zeros((data.shape[1], data.shape[1]));
+	for start in range(0, numItems, chunkSize):
+		chunk = numpy.asarray(data[start:start + chunkSize], dtype=numpy.float64);
+		chunkCount = chunk.shape[0];
+		chunkMeans = chunk.mean(axis=0);
+		centred = chunk - chunkMeans;
+		chunkCoMoments = centred.T @ centred;
+
+		total = count + chunkCount;
+		delta = chunkMeans - means;
+		coMoments += chunkCoMoments + numpy.outer(delta, delta) * (count * chunkCount / total);
+		means += delta * (chunkCount / total);
+		count = total;
+	return count, means, coMoments;
+
+# Covariance matrix of the columns of a (time x asset) array, with the same days/offset rule as covariance.
+def covarianceMatrix(data, days=WORKING_DAYS_IN_YEAR(), chunkSize=None):
+	numItems, means, coMoments = coMomentMatrix(data, chunkSize);
+	offset = 0;
+	if days != numItems:
+		offset = 1;
+	return coMoments / (numItems - offset);
+
+# Covariance matrix of the columns with the item count reduced by one, as fastCovariance.
+def fastCovarianceMatrix(data, chunkSize=None):
+	numItems, means, coMoments = coMomentMatrix(data, chunkSize);
+	return coMoments / (numItems - 1);
+
+# Correlation matrix of the columns of a (time x asset) array, as correlationCoefficient for each pair.
+def correlationMatrix(data, chunkSize=None):
+	numItems, means, coMoments = coMomentMatrix(data, chunkSize);
+	scale = 1.0 / numpy.sqrt(numpy.diag(coMoments));
+	correlation = coMoments * numpy.outer(scale, scale);
+	numpy.fill_diagonal(correlation, 1.0);
+	return correlation;
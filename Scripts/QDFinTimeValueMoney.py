@@ -25,6 +25,15 @@ __status__ = "Development"
 __version__ = "0.1.0"
 
 import math
+import sys
+import collections
+
+import numpy
+
+from QDFinDiscountFactorCache import DiscountFactorCache
+
+from QDFinDayCount import daysInYearFromBasis
+from QDFinDayCount import toDayNumbers
 
 from QDFinConstants import DEFAULT_BASIS_DAYS
 
@@ -32,6 +41,22 @@ from QDFinInterest import simpleInterestRate
 from QDFinInterest import complexInterestRate
 from QDFinInterest import simpleInterestRateMoneyMarketBasis
 
+# Discount factor cache used by the discount factor functions, this is None (off) until enableDiscountFactorCache is called.
+discountFactorCache = None;
+
+# Switch on memoisation of the discount factor functions, with at most maxSize factors kept.  Anything built on the discount factors,
+#	such as the present values, CD and discount instrument prices, annuities and bond duration, will then use the cache.
+#	Returns the cache so that the hit/miss/eviction counts can be checked.
+def enableDiscountFactorCache(maxSize=100000):
+	global discountFactorCache;
+	discountFactorCache = DiscountFactorCache(maxSize);
+	return discountFactorCache;
+
+# Switch off memoisation of the discount factor functions.
+def disableDiscountFactorCache():
+	global discountFactorCache;
+	discountFactorCache = None;
+
 # Get the discounted future value based on the present value
 def simpleFutureValue(amount, interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
 	return amount * (simpleInterestRate(interest, days, daysInYear));
@@ -42,14 +67,15 @@ def complexFutureValue(amount, interest, years):
 
 # Get the present value based on the future value
 def simplePresentValue(amount, interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return amount * (1.0 / simpleInterestRate(interest, days, daysInYear));
+	return amount * simpleDiscountFactor(interest, days, daysInYear);
 
 # Get the present value based on the compounded future value
 def complexPresentValue(amount, interest, years):
-	return amount / complexInterestRate(interest, years);
+	return amount * complexDiscountFactor(interest, years);
 
 # Get the yield based on the purchase value, sale value and the number of days for the investment
 def simpleYield(purchaseValue, saleValue, days, daysInYear=DEFAULT_BASIS_DAYS()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return 100.0 * ((saleValue/purchaseValue - 1) * (daysInYear / days));
 
 # Get the compounded yield based on the purchase value, sale value and the number of days for the investment
@@ -58,23 +84,64 @@ def complexYield(purchaseValue, saleValue, years):
 
 # Get the compounded yield based on the purchase value, sale value and the number of days for the investment.  
 def complexYieldFromDays(purchaseValue, saleValue, days, daysInYear=DEFAULT_BASIS_DAYS()):
+	daysInYear = daysInYearFromBasis(daysInYear);
 	return 100.0 * (math.pow(saleValue/purchaseValue, daysInYear/days) - 1);
 
+# The discount factor functions without the cache, which are what the cache calls on a miss.  The discount factor functions
+#	below repeat these formulas, and look up the cache themselves, rather than calling through a wrapper, so that with the cache
+#	off they cost no more than the formula and a hit is cheaper than working the factor out.  Arrays can't be hashed, so they
+#	always bypass the cache.
+def uncachedSimpleDiscountFactor(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
+	return 1.0 / simpleInterestRate(interest, days, daysInYear);
+
+def uncachedComplexDiscountFactor(interest, years):
+	return 1.0 / complexInterestRate(interest, years);
+
+def uncachedSimpleDiscountFactorMoneyMarketBasis(interest, days):
+	return 1.0 / simpleInterestRateMoneyMarketBasis(interest, days);
+
+def uncachedContinuouslyCompoundedDiscountFactor(interest, days):
+	return math.exp(-(interest/100) * (days / DEFAULT_BASIS_DAYS()));
+
 # Get the simple discount factor for a time period
 def simpleDiscountFactor(interest, days, daysInYear=DEFAULT_BASIS_DAYS()):
-	return 1.0 / simpleInterestRate(interest, days, daysInYear);
+	cache = discountFactorCache;
+	if cache is None:
+		return 1.0 / simpleInterestRate(interest, days, daysInYear);
+	try:
+		return cache.lookup(uncachedSimpleDiscountFactor, interest, days, daysInYear);
+	except TypeError:
+		return uncachedSimpleDiscountFactor(interest, days, daysInYear);
 
 # Get the complex discount factor for a time period
 def complexDiscountFactor(interest, years):
-	return 1.0 / complexInterestRate(interest, years);
+	cache = discountFactorCache;
+	if cache is None:
+		return 1.0 / complexInterestRate(interest, years);
+	try:
+		return cache.lookup(uncachedComplexDiscountFactor, interest, years);
+	except TypeError:
+		return uncachedComplexDiscountFactor(interest, years);
 
 # Get the simple discount factor for time period, for money market basis
 def simpleDiscountFactorMoneyMarketBasis(interest, days):
-	return 1.0 / simpleInterestRateMoneyMarketBasis(interest, days);
+	cache = discountFactorCache;
+	if cache is None:
+		return 1.0 / simpleInterestRateMoneyMarketBasis(interest, days);
+	try:
+		return cache.lookup(uncachedSimpleDiscountFactorMoneyMarketBasis, interest, days);
+	except TypeError:
+		return uncachedSimpleDiscountFactorMoneyMarketBasis(interest, days);
 
 # Get the continuously compounded discount factor for an interest rate over a number of days
 def continuouslyCompoundedDiscountFactor(interest, days):
-	return math.exp(-(interest/100) * (days / DEFAULT_BASIS_DAYS()));
+	cache = discountFactorCache;
+	if cache is None:
+		return math.exp(-(interest/100) * (days / DEFAULT_BASIS_DAYS()));
+	try:
+		return cache.lookup(uncachedContinuouslyCompoundedDiscountFactor, interest, days);
+	except TypeError:
+		return uncachedContinuouslyCompoundedDiscountFactor(interest, days);
 
 # Get the Net Present Value (NPV) for a series of cashfows assuming yearly returns starting at year 1
 def netPresentValueOfCashflows(cashflows, interest):
@@ -95,47 +162,316 @@ def netPresentValueOfCashflowsWithDates(cashflows, years, interest):
 		npv += complexPresentValue(cashflow, interest, year);
 	return npv;
 
-# Generate the internal rate of return for a set of cashflows against the initial negative cashflow/investment, assuming yearly returns starting at year 1
-# Solution uses secant formula with error correction.  There is no forced break after N iterations as solution of IRR guaranteed after some time.
-def internalRateOfReturnOfCashflows(initialInvestment, cashflows):
+# Get the NPV profile for a set of portfolios across a set of interest rates.  The cashflows are a (portfolio x period) matrix, with
+#	yearly returns starting at year 1 as for netPresentValueOfCashflows, and the result is a (portfolio x interest rate) matrix.
+#	This uses Horner's rule, working back from the final period and discounting by one year each step, so each period is a
+#	single multiply-add across the whole matrix, rather than a pow for every cashflow at every rate.
+def netPresentValueProfile(cashflows, interests):
+	cashflows = numpy.atleast_2d(numpy.asarray(cashflows, dtype=numpy.float64));
+	discount = 1.0 / (1.0 + numpy.asarray(interests, dtype=numpy.float64).reshape(-1) / 100.0);
+
+	numPortfolios, numPeriods = cashflows.shape;
+	npv = numpy.zeros((numPortfolios, len(discount)));
+
+	for period in range(numPeriods - 1, -1, -1):
+		npv += cashflows[:, period, None];
+		npv *= discount;
+
+	return npv;
+
+# Get the NPV profile for a set of portfolios across a set of interest rates, where cashflows are received at given years.  The
+#	years are either shared by all of the portfolios (one per period) or given per portfolio with the same shape as the cashflows.
+#	The discount factors for every year and rate are generated in a single vectorised pow, then applied as one matrix product.
+def netPresentValueProfileWithDates(cashflows, years, interests, blockSize=1024):
+	cashflows = numpy.atleast_2d(numpy.asarray(cashflows, dtype=numpy.float64));
+	years = numpy.asarray(years, dtype=numpy.float64);
+	scale = 1.0 + numpy.asarray(interests, dtype=numpy.float64).reshape(-1) / 100.0;
+
+	if years.ndim == 1:
+		discountFactors = numpy.power(scale[None, :], -years[:, None]);
+		return cashflows @ discountFactors;
+
+	# Years per portfolio, work through blocks of portfolios to keep the (portfolio x period x rate) factors a sensible size.
+	logScale = numpy.log(scale);
+	npv = numpy.empty((cashflows.shape[0], len(scale)));
+	for start in range(0, cashflows.shape[0], blockSize):
+		end = start + blockSize;
+		discountFactors = numpy.exp(-years[start:end, :, None] * logScale);
+		npv[start:end] = numpy.einsum('pt,ptr->pr', cashflows[start:end], discountFactors);
+	return npv;
+
+# Result of an internal rate of return solve, for the batch solver each of the fields is an array with one entry per row.
+#	rate			IRR as a percentage.
+#	iterations		number of NPV evaluations used by the solve.
+#	converged		True if the solve converged, False if it failed (in which case rate is the last estimate, or nan).
+InternalRateOfReturn = collections.namedtuple('InternalRateOfReturn', ['rate', 'iterations', 'converged']);
+
+# Rates (as percentages) scanned for a change in sign of the NPV, when the secant iterations can't find the IRR.
+IRR_BRACKET_RATES = [-99.0, -90.0, -75.0, -50.0, -25.0, -10.0, -5.0, 0.0, 5.0, 10.0, 15.0, 20.0, 25.0, 35.0, 50.0, 75.0,
+	100.0, 150.0, 200.0, 300.0, 500.0, 1000.0];
+
+# Get the NPV (less the initial investment) of each row of a cashflow matrix at a rate per row.  With no years, the cashflows are
+#	yearly starting at year 1 and are discounted using Horner's rule, otherwise years are shared by all rows or given per row.
+def netPresentValueOfRows(initialInvestments, cashflows, years, interests):
+	scale = 1.0 + interests / 100.0;
+	if years is None:
+		discount = 1.0 / scale;
+		npv = numpy.zeros(len(scale));
+		for period in range(cashflows.shape[1] - 1, -1, -1):
+			npv += cashflows[:, period];
+			npv *= discount;
+	else:
+		npv = numpy.sum(cashflows * numpy.power(scale[:, None], -years), axis=1);
+	return npv - initialInvestments;
+
+# Find the IRR of a single set of cashflows using Brent's method, inside a bracket where the NPV changes sign.  Returns the
+#	rate, the number of NPV evaluations, and whether a root was found.
+def internalRateOfReturnBrent(npvFunction, maxIterations, tolerance):
+	# Scan out from 0% for a change in sign of the NPV.
+	values = {};
+	bracket = None;
+	evaluations = 0;
+	for rate in sorted(IRR_BRACKET_RATES, key=abs):
+		value = npvFunction(rate);
+		evaluations += 1;
+		if value == 0.0:
+			return rate, evaluations, True;
+		if not math.isfinite(value):
+			continue;
+		for other in values:
+			if (value < 0) != (values[other] < 0):
+				bracket = (other, rate);
+				break;
+		values[rate] = value;
+		if bracket is not None:
+			break;
+
+	if bracket is None:
+		return math.nan, evaluations, False;
+
+	# Brent's method, mixing inverse quadratic interpolation, secant and bisection steps so the bracket always shrinks.
+	a, b = bracket;
+	fa, fb = values[a], values[b];
+	c, fc = b, fb;
+	d = e = b - a;
+
+	for item in range(maxIterations):
+		if (fb > 0) == (fc > 0):
+			c, fc = a, fa;
+			d = e = b - a;
+		if abs(fc) < abs(fb):
+			a, b, c = b, c, b;
+			fa, fb, fc = fb, fc, fb;
+
+		tol = 2.0 * sys.float_info.epsilon * abs(b) + 0.5 * tolerance * max(1.0, abs(b));
+		midpoint = 0.5 * (c - b);
+		if abs(midpoint) <= tol or fb == 0.0:
+			return b, evaluations, True;
+
+		if abs(e) >= tol and abs(fa) > abs(fb):
+			ratio = fb / fa;
+			if a == c:
+				p = 2.0 * midpoint * ratio;
+				q = 1.0 - ratio;
+			else:
+				q = fa / fc;
+				r = fb / fc;
+				p = ratio * (2.0 * midpoint * q * (q - r) - (b - a) * (r - 1.0));
+				q = (q - 1.0) * (r - 1.0) * (ratio - 1.0);
+			if p > 0:
+				q = -q;
+			p = abs(p);
+			if 2.0 * p < min(3.0 * midpoint * q - abs(tol * q), abs(e * q)):
+				e = d;
+				d = p / q;
+			else:
+				d = e = midpoint;
+		else:
+			d = e = midpoint;
+
+		a, fa = b, fb;
+		b += d if abs(d) > tol else math.copysign(tol, midpoint);
+		fb = npvFunction(b);
+		evaluations += 1;
+
+	return b, evaluations, False;
+
+# Generate the internal rate of return for a set of cashflows against the initial investment.  With no years, the cashflows are
+#	yearly starting at year 1, otherwise each cashflow is received at the given year.
+# Solution uses the secant method from 0.25% and 0.2%, carrying the previous NPV between iterations so there is a single NPV per
+#	step.  If that hasn't converged within maxIterations (or steps off to a non-finite value) Brent's method is run in a bracket
+#	where the NPV changes sign, which always converges if a bracket can be found.
+def internalRateOfReturn(initialInvestment, cashflows, years=None, maxIterations=100, tolerance=1e-10):
+	cashflows = numpy.asarray(cashflows, dtype=numpy.float64);
+	if years is None:
+		years = numpy.arange(1, len(cashflows) + 1, dtype=numpy.float64);
+	years = numpy.asarray(years, dtype=numpy.float64);
+
+	def npvFunction(interest):
+		if interest <= -100.0:
+			return math.nan;
+		return float(numpy.dot(cashflows, numpy.power(1.0 + interest / 100.0, -years))) - initialInvestment;
 
 	prev = 0.25;
 	curr = 0.2;
-	c = -initialInvestment;
+	npvPrev = npvFunction(prev);
+	npvCurr = npvFunction(curr);
+	evaluations = 2;
 
-	while not math.isclose(prev, curr, rel_tol=0.0001):
-		npvPrev = netPresentValueOfCashflows(cashflows, prev) + c;
-		npvCurr = netPresentValueOfCashflows(cashflows, curr) + c;
+	for item in range(maxIterations):
+		if npvCurr == 0.0 or abs(curr - prev) <= tolerance * max(1.0, abs(curr)):
+			return InternalRateOfReturn(curr, evaluations, True);
+		if npvCurr == npvPrev or not math.isfinite(npvCurr):
+			break;
 
-		a = (curr - prev)/(npvCurr - npvPrev);
-		b = 1 - 1.4 * (npvPrev / ( npvPrev - 3 * npvCurr + 2 * c ));
-		next = curr - npvCurr * a * b;
+		next = curr - npvCurr * (curr - prev) / (npvCurr - npvPrev);
+		if next <= -100.0:
+			next = (curr - 100.0) / 2;
 
-		prev = curr;
+		prev, npvPrev = curr, npvCurr;
 		curr = next;
+		npvCurr = npvFunction(curr);
+		evaluations += 1;
 
-		#print("Prev " + str(prev));
-		#print("Curr " + str(curr));
+	rate, brentEvaluations, converged = internalRateOfReturnBrent(npvFunction, maxIterations, tolerance);
+	return InternalRateOfReturn(rate, evaluations + brentEvaluations, converged);
 
-	return curr;
+# Generate the internal rate of return for a set of cashflows against the initial negative cashflow/investment, assuming yearly returns starting at year 1
+def internalRateOfReturnOfCashflows(initialInvestment, cashflows):
+	return internalRateOfReturn(initialInvestment, cashflows).rate;
 
 # Generate the internal rate of return for a set of cashflows against the initial negative cashflow/investment, with dates for the cashdlows.
-# Solution use the secant formula with error correction.  There is no forced break after N iterations as solution of IRR guaranteed after some time.
-# FIXME: This should be a single function, with a selector for the version of the NPV calculation.
 def internalRateOfReturnOfCashflowsWithDates(initialInvestment, cashflows, years):
-	prev = 0.25;
-	curr = 0.2;
-	c = -initialInvestment;
+	return internalRateOfReturn(initialInvestment, cashflows, years).rate;
 
-	while not math.isclose(prev, curr, rel_tol=0.0001):
-		npvPrev = netPresentValueOfCashflowsWithDates(cashflows, years, prev) + c;
-		npvCurr = netPresentValueOfCashflowsWithDates(cashflows, years, curr) + c;
+# Generate the internal rate of return for many sets of cashflows at once.  The cashflows are a (row x period) matrix, with the
+#	initial investments one per row, and the years (if given) are either shared by all rows or a matrix matching the cashflows.
+#	All of the rows are iterated together with the secant method, rows which have converged are masked out so they are no
+#	longer evaluated, and any rows left after maxIterations are solved with Brent's method one at a time.  Returns an
+#	InternalRateOfReturn of arrays, with the iterations and converged status per row.
+def internalRateOfReturnBatch(initialInvestments, cashflows, years=None, maxIterations=100, tolerance=1e-10):
+	cashflows = numpy.atleast_2d(numpy.asarray(cashflows, dtype=numpy.float64));
+	numRows = cashflows.shape[0];
+	initialInvestments = numpy.broadcast_to(numpy.asarray(initialInvestments, dtype=numpy.float64), (numRows,)).copy();
+	if years is not None:
+		years = numpy.broadcast_to(numpy.asarray(years, dtype=numpy.float64), cashflows.shape);
 
-		a = (curr - prev)/(npvCurr - npvPrev);
-		b = 1 - 1.4 * (npvPrev / ( npvPrev - 3 * npvCurr + 2 * c ));
-		next = curr - npvCurr * a * b;
+	prev = numpy.full(numRows, 0.25);
+	curr = numpy.full(numRows, 0.2);
+	npvPrev = netPresentValueOfRows(initialInvestments, cashflows, years, prev);
+	npvCurr = netPresentValueOfRows(initialInvestments, cashflows, years, curr);
+	iterations = numpy.full(numRows, 2, dtype=numpy.int64);
+	converged = numpy.zeros(numRows, dtype=bool);
+	failed = numpy.zeros(numRows, dtype=bool);
 
-		prev = curr;
-		curr = next;
+	for item in range(maxIterations):
+		converged |= ~failed & ((npvCurr == 0.0) | (numpy.abs(curr - prev) <= tolerance * numpy.maximum(1.0, numpy.abs(curr))));
+		failed |= ~converged & ((npvCurr == npvPrev) | ~numpy.isfinite(npvCurr));
+		active = numpy.flatnonzero(~converged & ~failed);
+		if len(active) == 0:
+			break;
+
+		c, p = curr[active], prev[active];
+		fc, fp = npvCurr[active], npvPrev[active];
+		next = c - fc * (c - p) / (fc - fp);
+		next = numpy.where(next <= -100.0, (c - 100.0) / 2, next);
+
+		prev[active], npvPrev[active] = c, fc;
+		curr[active] = next;
+		npvCurr[active] = netPresentValueOfRows(initialInvestments[active], cashflows[active], None if years is None else years[active], next);
+		iterations[active] += 1;
+
+	# Anything still left is pathological, so use the bracketed solver on each row.
+	for row in numpy.flatnonzero(~converged):
+		rowYears = None if years is None else years[row:row + 1];
+		def npvFunction(interest):
+			if interest <= -100.0:
+				return math.nan;
+			return float(netPresentValueOfRows(initialInvestments[row:row + 1], cashflows[row:row + 1], rowYears, numpy.array([interest]))[0]);
+		curr[row], evaluations, converged[row] = internalRateOfReturnBrent(npvFunction, maxIterations, tolerance);
+		iterations[row] += evaluations;
+
+	return InternalRateOfReturn(curr, iterations, converged);
+
+# Generate the extended internal rate of return (XIRR) for cashflows received on actual dates.  Time for each cashflow is the days
+#	since the earliest date over daysInYear, the same basis as complexYieldFromDays, and the investments are given as negative
+#	cashflows.  Solution uses Newton's method from the guess, where the derivative comes from the same discount factors as the NPV,
+#	falling back to the bracketed solver if it hasn't converged within maxIterations.
+def extendedInternalRateOfReturn(cashflows, dates, daysInYear=DEFAULT_BASIS_DAYS(), guess=10.0, maxIterations=100, tolerance=1e-10):
+	cashflows = numpy.asarray(cashflows, dtype=numpy.float64);
+	days = toDayNumbers(dates);
+	years = (days - numpy.min(days)) / daysInYearFromBasis(daysInYear);
+
+	def npvFunction(interest):
+		if interest <= -100.0:
+			return math.nan;
+		return float(numpy.dot(cashflows, numpy.power(1.0 + interest / 100.0, -years)));
+
+	# The NPV is close enough to zero when it is within the tolerance of the total size of the cashflows.
+	npvTolerance = tolerance * float(numpy.sum(numpy.abs(cashflows)));
+
+	rate = float(guess);
+	newtonSteps = 0;
+	for item in range(maxIterations):
+		scale = 1.0 + rate / 100.0;
+		if scale <= 0.0:
+			break;
+		newtonSteps = item + 1;
+		discounted = cashflows * numpy.power(scale, -years);
+		npv = float(numpy.sum(discounted));
+		slope = -float(numpy.dot(discounted, years)) / (100.0 * scale);
+		if abs(npv) <= npvTolerance:
+			return InternalRateOfReturn(rate, item + 1, True);
+		if slope == 0.0 or not math.isfinite(npv) or not math.isfinite(slope):
+			break;
+
+		step = npv / slope;
+		rate -= step;
+		if abs(step) <= tolerance * max(1.0, abs(rate)):
+			return InternalRateOfReturn(rate, item + 1, True);
+
+	rate, evaluations, converged = internalRateOfReturnBrent(npvFunction, maxIterations, tolerance);
+	return InternalRateOfReturn(rate, newtonSteps + evaluations, converged);
+
+# Keeps the cashflows and last XIRR for a set of ledgers, so that re-solving a ledger after a new cashflow arrives starts from the
+#	previous solution.  A single new cashflow usually moves the rate very little, so Newton's method converges in a couple of
+#	iterations instead of starting again from the default guess.
+class ExtendedInternalRateOfReturnCache(object):
+	def __init__(self, daysInYear=DEFAULT_BASIS_DAYS(), guess=10.0, maxIterations=100, tolerance=1e-10):
+		self.daysInYear = daysInYear;
+		self.guess = guess;
+		self.maxIterations = maxIterations;
+		self.tolerance = tolerance;
+		self.ledgers = {};
+
+	def __contains__(self, ledgerId):
+		return ledgerId in self.ledgers;
+
+	def __len__(self):
+		return len(self.ledgers);
+
+	def solveLedger(self, ledger):
+		guess = self.guess if ledger['result'] is None or not ledger['result'].converged else ledger['result'].rate;
+		ledger['result'] = extendedInternalRateOfReturn(ledger['cashflows'], ledger['dates'], self.daysInYear, guess, self.maxIterations, self.tolerance);
+		return ledger['result'];
+
+	def solve(self, ledgerId, cashflows, dates):
+		# Set the complete cashflows for a ledger and solve, starting from the ledger's last rate if we have one.
+		ledger = self.ledgers.setdefault(ledgerId, {'result': None});
+		ledger['cashflows'] = list(cashflows);
+		ledger['dates'] = list(toDayNumbers(dates));
+		return self.solveLedger(ledger);
+
+	def appendCashflow(self, ledgerId, cashflow, date):
+		# Add a single new cashflow to a ledger and re-solve from the last rate.
+		ledger = self.ledgers.setdefault(ledgerId, {'result': None, 'cashflows': [], 'dates': []});
+		ledger['cashflows'].append(cashflow);
+		ledger['dates'].append(int(toDayNumbers(date)));
+		return self.solveLedger(ledger);
+
+	def rate(self, ledgerId):
+		# Last solved XIRR for a ledger.
+		return self.ledgers[ledgerId]['result'].rate;
 
-	return curr;
+	def remove(self, ledgerId):
+		del self.ledgers[ledgerId];
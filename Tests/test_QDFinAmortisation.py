@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import numpy
+
+from QDFinAmortisation import levelPaymentSchedule
+from QDFinAmortisation import floatingRateSchedule
+from QDFinAmortisation import amortisationSchedules
+from QDFinAmortisation import bookCashflowProjection
+
+from QDFinMoneyMarket import annuityDeferred
+
+class AmortisationTests(unittest.TestCase):
+	def testLevelPaymentSchedule(self):
+		schedule = levelPaymentSchedule([100000, 5000, 1200], [6, 0, 12], [360, 12, 6]);
+		self.assertEqual(schedule.payment.shape, (3, 360));
+		self.assertAlmostEqual(schedule.payment[0][0], annuityDeferred(100000, 0.5, 360), 10);
+		self.assertAlmostEqual(schedule.payment[0][0], 599.55, 2);
+		self.assertAlmostEqual(schedule.interest[0][0], 500.0, 10);
+		self.assertAlmostEqual(schedule.payment[0][359], schedule.payment[0][0], 6);
+		self.assertAlmostEqual(schedule.payment[1][0], 5000 / 12.0, 10);
+		for loan, principal, periods in [(0, 100000, 360), (1, 5000, 12), (2, 1200, 6)]:
+			self.assertAlmostEqual(numpy.sum(schedule.principal[loan]), principal, 6);
+			self.assertEqual(schedule.balance[loan][periods - 1], 0.0);
+			self.assertEqual(numpy.count_nonzero(schedule.payment[loan]), periods);
+			for period in range(1, periods):
+				self.assertAlmostEqual(schedule.balance[loan][period], schedule.balance[loan][period - 1] - schedule.principal[loan][period], 6);
+
+	def testFloatingRateScheduleWithConstantRatesIsLevel(self):
+		level = levelPaymentSchedule([100000, 5000], [6, 3], [120, 24]);
+		floating = floatingRateSchedule([100000, 5000], numpy.array([[6.0] * 120, [3.0] * 120]), [120, 24]);
+		for field in range(1, 5):
+			self.assertTrue(numpy.allclose(level[field], floating[field], rtol=0, atol=1e-8));
+		rates = numpy.array([[4.0] * 12 + [8.0] * 12]);
+		repriced = floatingRateSchedule([10000], rates, 24);
+		self.assertAlmostEqual(repriced.payment[0][12], annuityDeferred(repriced.balance[0][11], 8.0 / 12, 12), 8);
+		self.assertAlmostEqual(numpy.sum(repriced.principal), 10000, 8);
+
+	def testChunkedSchedulesAndBookProjection(self):
+		principals = numpy.array([250000.0, 80000.0, 12000.0, 150000.0, 30000.0]);
+		interests = numpy.array([5.5, 7.0, 0.0, 4.25, 9.9]);
+		terms = numpy.array([360, 120, 24, 240, 60]);
+		whole = levelPaymentSchedule(principals, interests, terms);
+		chunks = list(amortisationSchedules(principals, interests, terms, chunkSize=2));
+		self.assertEqual([chunk.firstLoan for chunk in chunks], [0, 2, 4]);
+		for chunk in chunks:
+			rows = whole.payment[chunk.firstLoan:chunk.firstLoan + len(chunk.payment), :chunk.payment.shape[1]];
+			self.assertTrue(numpy.allclose(chunk.payment, rows, rtol=0, atol=1e-9));
+		projection = bookCashflowProjection(principals, interests, terms, chunkSize=2);
+		self.assertTrue(numpy.allclose(projection.payment, numpy.sum(whole.payment, axis=0), rtol=0, atol=1e-8));
+		self.assertAlmostEqual(numpy.sum(projection.principal), numpy.sum(principals), 6);
+		self.assertAlmostEqual(projection.balance[0], numpy.sum(principals) - numpy.sum(whole.principal[:, 0]), 6);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(AmortisationTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import datetime
+import tempfile
+
+import numpy
+
+from QDFinCalendar import BusinessDayCalendar
+from QDFinCalendar import loadCalendar
+from QDFinCalendar import readCalendar
+from QDFinCalendar import availableCalendars
+from QDFinCalendar import easterSunday
+from QDFinCalendar import couponSchedule
+from QDFinInterestRateInstruments import Bond
+from QDFinInterestRateInstruments import dirtyBondPrice
+from QDFinMoneyMarket import certificateOfDepositMultiCouponPrice
+
+class CalendarTests(unittest.TestCase):
+	def testShippedCalendarsLoad(self):
+		for name in availableCalendars():
+			self.assertTrue(loadCalendar(name).businessDaysInYear(2020) > 240);
+
+	def testEasterSunday(self):
+		self.assertEqual(easterSunday(2020), datetime.date(2020, 4, 12));
+		self.assertEqual(easterSunday(2024), datetime.date(2024, 3, 31));
+
+	def testHolidaysAndObservedDays(self):
+		calendar = loadCalendar('SYNTHETIC_LDN');
+		dates = ['2020-04-10', '2020-04-13', '2020-04-14', '2020-12-28', '2021-12-27', '2021-12-28', '2021-12-29'];
+		self.assertEqual(list(calendar.isBusinessDay(dates)), [False, False, True, False, False, False, True]);
+
+	def testFridaySaturdayWeekend(self):
+		calendar = loadCalendar('SYNTHETIC_GULF');
+		self.assertEqual(list(calendar.isBusinessDay(['2020-05-22', '2020-05-23', '2020-05-24', '2020-05-26'])), [False, False, False, True]);
+
+	def testBusinessDaysBetweenMatchesDayByDayCount(self):
+		calendar = loadCalendar('SYNTHETIC_NYC');
+		start = numpy.datetime64('2019-11-15');
+		days = start + numpy.arange(120);
+		expected = numpy.cumsum(calendar.isBusinessDay(days)) - calendar.isBusinessDay(days);
+		self.assertEqual(list(calendar.businessDaysBetween(start, days)), list(expected));
+
+	def testBusinessDaysInYear(self):
+		self.assertEqual(loadCalendar('WEEKENDS_ONLY').businessDaysInYear(2020), 262);
+		self.assertEqual(loadCalendar('SYNTHETIC_LDN').businessDaysInYear(2020), 254);
+
+	def testRolls(self):
+		calendar = loadCalendar('SYNTHETIC_LDN');
+		self.assertEqual(calendar.rollFollowing('2020-04-10'), numpy.datetime64('2020-04-14'));
+		self.assertEqual(calendar.rollPreceding('2020-04-13'), numpy.datetime64('2020-04-09'));
+		self.assertEqual(calendar.rollFollowing('2020-04-09'), numpy.datetime64('2020-04-09'));
+		rolled = calendar.rollModifiedFollowing(['2020-05-30', '2020-02-29']);
+		self.assertEqual(list(rolled), list(numpy.array(['2020-05-29', '2020-02-28'], dtype='datetime64[D]')));
+
+	def testAddBusinessDays(self):
+		calendar = loadCalendar('SYNTHETIC_LDN');
+		added = calendar.addBusinessDays('2020-04-09', [1, 2, 0, -1, -2]);
+		expected = numpy.array(['2020-04-14', '2020-04-15', '2020-04-09', '2020-04-08', '2020-04-07'], dtype='datetime64[D]');
+		self.assertEqual(list(added), list(expected));
+		self.assertEqual(calendar.addBusinessDays('2020-04-11', 1), numpy.datetime64('2020-04-14'));
+
+	def testDatesOutsideRangeRaise(self):
+		calendar = BusinessDayCalendar('TEST', [], (5, 6), 2000, 2001);
+		with self.assertRaises(ValueError):
+			calendar.isBusinessDay('2002-01-01');
+
+	def testReadCalendarFile(self):
+		with tempfile.NamedTemporaryFile('w', suffix='.cal', delete=False) as calendarFile:
+			calendarFile.write('name TEST\nyears 2020 2021\nweekend Sat Sun\nfixed 07-04 observed\ndate 2020-03-02\n');
+		calendar = readCalendar(calendarFile.name);
+		os.remove(calendarFile.name);
+		self.assertEqual(list(calendar.isBusinessDay(['2020-03-02', '2020-07-06', '2021-07-05'])), [False, False, False]);
+
+	def testCouponScheduleRollsToBusinessDays(self):
+		calendar = loadCalendar('SYNTHETIC_LDN');
+		schedule = couponSchedule('2019-11-01', '2021-04-13', 2, calendar);
+		self.assertTrue(numpy.all(calendar.isBusinessDay(schedule.paymentDates)));
+		self.assertEqual(list(schedule.paymentDates), list(numpy.array(['2020-04-14', '2020-10-13', '2021-04-13'], dtype='datetime64[D]')));
+		self.assertEqual(schedule.previousCouponDate, numpy.datetime64('2019-10-14'));
+		self.assertEqual(schedule.numCouponPaymentsRemaining, 3);
+		self.assertEqual(schedule.daysSinceLastCoupon, 18);
+		self.assertEqual(schedule.daysToNextCoupon, 165);
+		self.assertEqual(list(schedule.daysToNextCoupons), [183, 182, 182]);
+		self.assertEqual(couponSchedule('2019-11-01', '2021-04-13', 2, 'SYNTHETIC_LDN', 'preceding').previousCouponDate, numpy.datetime64('2019-10-11'));
+
+		unadjusted = couponSchedule('2019-11-01', '2021-04-13', 2);
+		self.assertEqual(unadjusted.paymentDates[0], numpy.datetime64('2020-04-13'));
+		self.assertEqual(list(unadjusted.daysToNextCoupons), [183, 183, 182]);
+
+	def testCouponScheduleMonthEnds(self):
+		endOfMonth = couponSchedule('2020-03-15', '2021-02-28', 4);
+		self.assertEqual(list(endOfMonth.paymentDates), list(numpy.array(['2020-05-31', '2020-08-31', '2020-11-30', '2021-02-28'], dtype='datetime64[D]')));
+		clamped = couponSchedule('2020-01-15', '2020-11-30', 12);
+		self.assertEqual(clamped.paymentDates[1], numpy.datetime64('2020-02-29'));
+		dayKept = couponSchedule('2020-03-15', '2021-01-30', 4);
+		self.assertEqual(dayKept.previousCouponDate, numpy.datetime64('2020-01-30'));
+
+	def testCouponScheduleFirstCouponRolledPastSettlement(self):
+		# 2022-04-30 is a Saturday, so the April coupon rolls following to 2022-05-02, after settlement, and the previous coupon
+		#	is the March one.
+		schedule = couponSchedule('2022-05-01', '2023-04-30', 12, 'WEEKENDS_ONLY', 'following');
+		self.assertEqual(schedule.previousCouponDate, numpy.datetime64('2022-03-31'));
+		self.assertEqual(schedule.paymentDates[0], numpy.datetime64('2022-05-02'));
+		self.assertEqual(schedule.paymentDates[-1], numpy.datetime64('2023-05-01'));
+		self.assertEqual(schedule.numCouponPaymentsRemaining, 13);
+		self.assertEqual(schedule.daysSinceLastCoupon, 31);
+		self.assertEqual(schedule.daysToNextCoupon, 1);
+		self.assertEqual(int(numpy.sum(schedule.daysToNextCoupons)), schedule.daysSinceLastCoupon + int((schedule.paymentDates[-1] - numpy.datetime64('2022-05-01')).astype(numpy.int64)));
+
+	def testCouponScheduleOnCouponDate(self):
+		schedule = couponSchedule('2020-04-13', '2021-04-13', 2);
+		self.assertEqual(schedule.numCouponPaymentsRemaining, 2);
+		self.assertEqual(schedule.daysSinceLastCoupon, 0);
+		self.assertEqual(schedule.daysToNextCoupon, 183);
+		with self.assertRaises(ValueError):
+			couponSchedule('2021-04-13', '2021-04-13', 2);
+		with self.assertRaises(ValueError):
+			couponSchedule('2020-04-13', '2021-04-13', 5);
+		with self.assertRaises(ValueError):
+			couponSchedule('2020-04-13', '2021-04-13', 2, 'SYNTHETIC_LDN', 'nearest');
+
+	def testCouponScheduleFeedsPricing(self):
+		schedule = couponSchedule('2019-11-01', '2021-04-13', 2, 'SYNTHETIC_LDN');
+		bond = Bond(100, 5, 2, schedule.numCouponPaymentsRemaining, schedule.daysToNextCoupon, schedule.daysSinceLastCoupon);
+		self.assertAlmostEqual(bond.dirtyPrice(4), dirtyBondPrice(100, 5, 4, 2, 3, 165), places=10);
+		self.assertAlmostEqual(certificateOfDepositMultiCouponPrice(100, 5, 4, schedule.daysToNextCoupon, schedule.daysToNextCoupons), certificateOfDepositMultiCouponPrice(100, 5, 4, 165, [183, 182, 182]), places=10);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(CalendarTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import numpy
+
+from QDFinCurve import YieldCurve
+from QDFinCurve import Deposit
+from QDFinCurve import ForwardRateAgreement
+from QDFinCurve import InterestRateFuture
+from QDFinCurve import CurveBond
+from QDFinCurve import QUOTE_FIELDS
+
+from QDFinInterestRateInstruments import dirtyBondPrice
+from QDFinInterestRateInstruments import forwardForwardRate
+
+def curveInstruments():
+	return [Deposit(4.0, 1), Deposit(4.1, 7), Deposit(4.2, 30), Deposit(4.3, 91),
+		ForwardRateAgreement(4.5, 91, 182),
+		InterestRateFuture(95.3, 182, 273), InterestRateFuture(95.2, 273, 364), InterestRateFuture(95.1, 364, 455), InterestRateFuture(95.0, 455, 546),
+		ForwardRateAgreement(4.9, 364, 637),
+		CurveBond(5, 5.0, 2, 6, 100), CurveBond(5.5, 5.2, 2, 10, 40), CurveBond(4, 5.3, 1, 10, 200), CurveBond(6, 5.5, 2, 60, 10)];
+
+class CurveTests(unittest.TestCase):
+	def testCurveRepricesInstruments(self):
+		instruments = curveInstruments();
+		curve = YieldCurve(list(reversed(instruments)));
+		self.assertEqual(len(curve), len(instruments));
+		self.assertEqual(curve.discountFactor(0), 1.0);
+		for instrument in instruments:
+			if isinstance(instrument, Deposit):
+				self.assertAlmostEqual(curve.forwardRate(0, instrument.days), instrument.rate, 10);
+			elif isinstance(instrument, ForwardRateAgreement):
+				self.assertAlmostEqual(curve.forwardRate(instrument.startDays, instrument.endDays), instrument.rate, 10);
+			elif isinstance(instrument, InterestRateFuture):
+				self.assertAlmostEqual(curve.forwardRate(instrument.startDays, instrument.endDays), 100 - instrument.price, 10);
+			else:
+				days = instrument.daysToNextCoupon + numpy.arange(instrument.numCouponPaymentsRemaining) * curve.daysInYear / instrument.couponFrequency;
+				cashflows = numpy.full(len(days), instrument.couponRate / instrument.couponFrequency);
+				cashflows[-1] += 100;
+				self.assertAlmostEqual(numpy.dot(cashflows, curve.discountFactor(days)),
+					dirtyBondPrice(100, instrument.couponRate, instrument.marketYield, instrument.couponFrequency, instrument.numCouponPaymentsRemaining, instrument.daysToNextCoupon), 10);
+
+	def testCurveQueries(self):
+		curve = YieldCurve(curveInstruments());
+		days = numpy.array([0, 1, 15, 91, 400, 3650, 20000], dtype=numpy.float64);
+		discountFactors = curve.discountFactor(days);
+		zeroRates = curve.zeroRate(days);
+		for index in range(len(days)):
+			self.assertAlmostEqual(discountFactors[index], curve.discountFactor(days[index]), 14);
+			self.assertAlmostEqual(zeroRates[index], curve.zeroRate(days[index]), 12);
+			if days[index] > 0:
+				self.assertAlmostEqual(discountFactors[index], (1 + zeroRates[index] * 0.01) ** (-days[index] / curve.daysInYear), 14);
+		self.assertTrue(numpy.all(numpy.diff(discountFactors) < 0));
+		self.assertAlmostEqual(zeroRates[0], zeroRates[1], 12);
+		self.assertAlmostEqual(curve.forwardRate(7, 30), forwardForwardRate(4.1, 4.2, 7, 30), 10);
+		forwards = curve.forwardRate(days[:-1], days[1:]);
+		self.assertAlmostEqual(forwards[2], curve.forwardRate(15, 91), 12);
+
+	def testCurveRejectsBadInstruments(self):
+		self.assertRaises(ValueError, YieldCurve, []);
+		self.assertRaises(ValueError, YieldCurve, [Deposit(4.0, 30), ForwardRateAgreement(4.5, 0, 30)]);
+		self.assertRaises(ValueError, YieldCurve, [Deposit(4.0, 30), ForwardRateAgreement(4.5, 60, 120)]);
+		self.assertRaises(ValueError, YieldCurve, [Deposit(4.0, 30), "swap"]);
+
+	def testIncrementalUpdatesMatchFullBuild(self):
+		curve = YieldCurve(curveInstruments());
+		random = numpy.random.default_rng(3);
+		for tick in range(100):
+			index = int(random.integers(len(curve)));
+			instrument = curve.instruments[index];
+			curve.updateQuote(index, getattr(instrument, QUOTE_FIELDS[type(instrument)]) + random.normal(0.0, 0.05));
+			self.assertTrue(numpy.array_equal(curve.logDiscountFactors, YieldCurve(curve.instruments).logDiscountFactors));
+		self.assertEqual(curve.version, 100);
+
+	def testUpdateOnlyResolvesDependentKnots(self):
+		curve = YieldCurve(curveInstruments());
+		before = curve.logDiscountFactors.copy();
+		self.assertEqual(curve.updateQuote(0, 4.05), 1);
+		self.assertEqual(curve.version, 1);
+		self.assertEqual(list(numpy.nonzero(curve.logDiscountFactors != before)[0]), [1]);
+		self.assertEqual(list(numpy.nonzero(curve.knotVersions)[0]), [1]);
+		self.assertEqual(curve.changedSince(0), 0.0);
+		self.assertEqual(curve.changedSince(1), float("inf"));
+		self.assertAlmostEqual(curve.forwardRate(0, 1), 4.05, 10);
+
+		before = curve.logDiscountFactors.copy();
+		self.assertEqual(curve.updateQuote(6, 95.25), 8);
+		self.assertTrue(numpy.array_equal(curve.logDiscountFactors[:7], before[:7]));
+		self.assertEqual(curve.changedSince(1), curve.knotDays[6]);
+		self.assertAlmostEqual(curve.forwardRate(273, 364), 4.75, 10);
+
+		index = len(curve) - 1;
+		bond = curve.instruments[index];
+		self.assertEqual(curve.updateBondPrice(index, 108.0), 1);
+		self.assertAlmostEqual(dirtyBondPrice(100, bond.couponRate, curve.instruments[index].marketYield, bond.couponFrequency, bond.numCouponPaymentsRemaining, bond.daysToNextCoupon), 108.0, 9);
+		self.assertTrue(numpy.array_equal(curve.logDiscountFactors, YieldCurve(curve.instruments).logDiscountFactors));
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(CurveTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import datetime
+
+import numpy
+
+from QDFinConstants import ACTACT_DAYS_IN_YEAR
+
+from QDFinDayCount import DayCountACT365F
+from QDFinDayCount import DayCountACT360
+from QDFinDayCount import DayCountACTACTISDA
+from QDFinDayCount import DayCount30360
+from QDFinDayCount import DayCount30E360
+from QDFinDayCount import dayCountConvention
+from QDFinDayCount import yearFraction
+
+from QDFinInterest import simpleInterestRate
+from QDFinMoneyMarket import discountInstrumentPriceUsingDiscountRate
+
+class DayCountTests(unittest.TestCase):
+	def testACT365FYearFraction(self):
+		self.assertAlmostEqual(DayCountACT365F().yearFraction('2020-01-01', '2020-07-01'), 182 / 365, 12);
+
+	def testACT360YearFractionFromDates(self):
+		self.assertAlmostEqual(yearFraction(datetime.date(2020, 1, 1), datetime.date(2020, 7, 1), DayCountACT360()), 182 / 360, 12);
+
+	def testACTACTISDASpanningLeapYear(self):
+		self.assertAlmostEqual(DayCountACTACTISDA().yearFraction('2003-11-01', '2004-05-01'), 61 / 365 + 121 / 366, 12);
+
+	def testACTACTISDAWholeYears(self):
+		self.assertAlmostEqual(DayCountACTACTISDA().yearFraction('2001-03-15', '2011-03-15'), 10.0, 2);
+
+	def testACTACTDaysInYear(self):
+		self.assertEqual(ACTACT_DAYS_IN_YEAR(), 366);
+		self.assertEqual(ACTACT_DAYS_IN_YEAR(2019), 365);
+		self.assertEqual(ACTACT_DAYS_IN_YEAR(2000), 366);
+		self.assertEqual(ACTACT_DAYS_IN_YEAR(2100), 365);
+
+	def test30360EndOfMonth(self):
+		starts = ['2020-01-31', '2020-01-30', '2020-02-29', '2020-01-15'];
+		ends = ['2020-03-31', '2020-03-31', '2020-03-31', '2020-03-31'];
+		self.assertEqual(list(DayCount30360().dayCount(starts, ends)), [60, 60, 32, 76]);
+
+	def test30E360EndOfMonth(self):
+		starts = ['2020-01-31', '2020-01-30', '2020-02-29', '2020-01-15'];
+		ends = ['2020-03-31', '2020-03-31', '2020-03-31', '2020-03-31'];
+		self.assertEqual(list(DayCount30E360().dayCount(starts, ends)), [60, 60, 31, 75]);
+
+	def testYearFractionsForScheduleMatchSingleDates(self):
+		starts = numpy.array(['1999-12-31', '2003-02-28', '2024-06-30', '2150-01-01'], dtype='datetime64[D]');
+		ends = starts + numpy.array([1, 400, 3000, 10000]);
+		for name in ['ACT/365F', 'ACT/360', 'ACT/ACT', '30/360', '30E/360']:
+			convention = dayCountConvention(name);
+			fractions = convention.yearFraction(starts, ends);
+			for i in range(len(starts)):
+				self.assertEqual(fractions[i], convention.yearFraction(starts[i], ends[i]));
+
+	def testDatesOutsideTableRange(self):
+		self.assertAlmostEqual(DayCountACTACTISDA().yearFraction('1800-01-01', '2400-01-01'), 600.0, 12);
+
+	def testUnknownConventionRaises(self):
+		with self.assertRaises(ValueError):
+			dayCountConvention('BUS/252');
+
+	def testConventionInPlaceOfDaysInYear(self):
+		self.assertEqual(simpleInterestRate(5, 123, DayCountACT360()), simpleInterestRate(5, 123, 360));
+		self.assertEqual(discountInstrumentPriceUsingDiscountRate(100, 5, 91, DayCountACT365F()), discountInstrumentPriceUsingDiscountRate(100, 5, 91, 365));
+		self.assertEqual(simpleInterestRate(5, 123, DayCountACTACTISDA(2019)), simpleInterestRate(5, 123, 365));
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(DayCountTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import threading
+
+import numpy
+
+from QDFinConstants import ACT360_DAYS_IN_YEAR
+
+from QDFinDiscountFactorCache import DiscountFactorCache
+
+from QDFinTimeValueMoney import enableDiscountFactorCache
+from QDFinTimeValueMoney import disableDiscountFactorCache
+from QDFinTimeValueMoney import simpleDiscountFactor
+from QDFinTimeValueMoney import complexDiscountFactor
+from QDFinTimeValueMoney import continuouslyCompoundedDiscountFactor
+
+from QDFinMoneyMarket import annuityDeferred
+from QDFinMoneyMarket import certificateOfDepositSecondaryMarketPrice
+
+from QDFinInterestRateInstruments import bondDuration
+
+class DiscountFactorCacheTests(unittest.TestCase):
+	def tearDown(self):
+		disableDiscountFactorCache();
+
+	def testCachedFactorsMatchUncached(self):
+		expected = [simpleDiscountFactor(7.5, 123), complexDiscountFactor(7.5, 5), continuouslyCompoundedDiscountFactor(9, 47)];
+		cache = enableDiscountFactorCache(100);
+		for item in range(3):
+			self.assertEqual([simpleDiscountFactor(7.5, 123), complexDiscountFactor(7.5, 5), continuouslyCompoundedDiscountFactor(9, 47)], expected);
+		statistics = cache.statistics();
+		self.assertEqual(statistics['misses'], 3);
+		self.assertEqual(statistics['hits'], 6);
+		self.assertAlmostEqual(cache.hitRate(), 6 / 9, 12);
+
+	def testPricingFunctionsRouteThroughCache(self):
+		expectedAnnuity = annuityDeferred(50000, 8, 5);
+		expectedPrice = certificateOfDepositSecondaryMarketPrice(1014625, 5.5, 120, ACT360_DAYS_IN_YEAR());
+		expectedDuration = bondDuration(5.4, [6, 6, 6, 6, 6, 6, 6, 6, 106], [1, 2, 3, 4, 5, 6, 7, 8, 9]);
+		cache = enableDiscountFactorCache(100);
+		for item in range(2):
+			self.assertEqual(annuityDeferred(50000, 8, 5), expectedAnnuity);
+			self.assertEqual(certificateOfDepositSecondaryMarketPrice(1014625, 5.5, 120, ACT360_DAYS_IN_YEAR()), expectedPrice);
+			self.assertEqual(bondDuration(5.4, [6, 6, 6, 6, 6, 6, 6, 6, 106], [1, 2, 3, 4, 5, 6, 7, 8, 9]), expectedDuration);
+		self.assertEqual(cache.statistics()['misses'], 11);
+		self.assertEqual(cache.statistics()['hits'], 11);
+
+	def testLeastRecentlyUsedEviction(self):
+		cache = enableDiscountFactorCache(2);
+		complexDiscountFactor(5, 1);
+		complexDiscountFactor(5, 2);
+		complexDiscountFactor(5, 1);
+		complexDiscountFactor(5, 3);
+		complexDiscountFactor(5, 1);
+		statistics = cache.statistics();
+		self.assertEqual(statistics['size'], 2);
+		self.assertEqual(statistics['evictions'], 1);
+		self.assertEqual(statistics['hits'], 2);
+
+	def testArraysBypassCache(self):
+		cache = enableDiscountFactorCache(10);
+		factors = complexDiscountFactor(numpy.array([1.0, 2.0]), 3);
+		self.assertAlmostEqual(factors[1], complexDiscountFactor(2.0, 3), 14);
+		self.assertEqual(cache.statistics()['misses'], 1);
+
+	def testSharedBetweenThreads(self):
+		cache = enableDiscountFactorCache(50);
+		results = [];
+		def worker():
+			results.append([simpleDiscountFactor(rate / 4, 90) for rate in range(100)]);
+		threads = [threading.Thread(target=worker) for item in range(8)];
+		for thread in threads:
+			thread.start();
+		for thread in threads:
+			thread.join();
+		for result in results:
+			self.assertEqual(result, results[0]);
+		statistics = cache.statistics();
+		self.assertEqual(statistics['hits'] + statistics['misses'], 800);
+		self.assertTrue(statistics['size'] <= 50);
+
+	def testKeywordArguments(self):
+		expected = simpleDiscountFactor(5, 90, 360);
+		self.assertEqual(simpleDiscountFactor(5, 90, daysInYear=360), expected);
+		self.assertEqual(simpleDiscountFactor(interest=5, days=90, daysInYear=360), expected);
+		cache = enableDiscountFactorCache(10);
+		self.assertEqual(simpleDiscountFactor(5, 90, daysInYear=360), expected);
+		self.assertEqual(simpleDiscountFactor(5, days=90, daysInYear=360), expected);
+		self.assertEqual(simpleDiscountFactor(5, 90, 360), expected);
+		statistics = cache.statistics();
+		self.assertEqual(statistics['misses'], 1);
+		self.assertEqual(statistics['hits'], 2);
+
+	def testFailedLookupsAreNotCached(self):
+		cache = DiscountFactorCache(2);
+		def failing(rate):
+			raise ZeroDivisionError("no factor");
+		with self.assertRaises(ZeroDivisionError):
+			cache.lookup(failing, 1);
+		self.assertEqual(len(cache), 0);
+		self.assertEqual(cache.lookup(abs, -1), 1);
+		self.assertEqual(cache.lookup(abs, -2), 2);
+		self.assertEqual(cache.statistics()['evictions'], 0);
+		cache.lookup(abs, -3);
+		self.assertEqual(cache.statistics()['evictions'], 1);
+		cache.clear();
+		self.assertEqual(cache.statistics()['evictions'], 0);
+
+	def testInvalidSize(self):
+		with self.assertRaises(ValueError):
+			DiscountFactorCache(0);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(DiscountFactorCacheTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -29,12 +29,15 @@ import math
 import sys
 import os
 
+import numpy
+
 sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
 
 from QDFinConstants import DAYS_IN_YEAR
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 
 from QDFinInterest import simpleInterest
+from QDFinInterest import simpleInterestRate
 from QDFinInterest import complexInterest
 from QDFinInterest import complexInterestRate
 from QDFinInterest import effectiveRate
@@ -91,6 +94,32 @@ class InterestTests(unittest.TestCase):
 		rate = effectiveRateRatioAtMaturity(convertRatioToRate(100/95), 123);
 		self.assertAlmostEqual(convertRateToMoneyMarketBasis(rate), 16.2155, 4);
 	
+	def testSimpleInterestRateOverArrayOfDaysAndBases(self):
+		days = numpy.array([1, 123, 365]);
+		bases = numpy.array([[365], [360]]);
+		rates = simpleInterestRate(5, days, bases);
+		self.assertEqual(rates.shape, (2, 3));
+		for i in range(2):
+			for j in range(3):
+				self.assertEqual(rates[i][j], simpleInterestRate(5, int(days[j]), int(bases[i][0])));
+	
+	def testArrayRatesMatchScalarRates(self):
+		interest = numpy.array([0.5, 5.8, 12.25, 30.0]);
+		days = numpy.array([1, 123, 180, 540]);
+		checks = [
+			(effectiveRate(interest, 4), lambda i, d: effectiveRate(i, 4)),
+			(nominalRate(interest, 4), lambda i, d: nominalRate(i, 4)),
+			(dailyEffectiveRate(interest, days), lambda i, d: dailyEffectiveRate(i, d)),
+			(continuouslyCompoundedRate(interest, days), lambda i, d: continuouslyCompoundedRate(i, d)),
+			(effectiveRateFromContinuallyCompoundedRate(interest), lambda i, d: effectiveRateFromContinuallyCompoundedRate(i)),
+			(convertRateToMoneyMarketBasis(interest), lambda i, d: convertRateToMoneyMarketBasis(i)),
+			(complexInterest(100.0, interest, days / ACT365_DAYS_IN_YEAR()), lambda i, d: complexInterest(100.0, i, d / ACT365_DAYS_IN_YEAR())),
+		];
+		for values, scalar in checks:
+			for k in range(len(interest)):
+				expected = scalar(float(interest[k]), int(days[k]));
+				self.assertTrue(math.isclose(values[k], expected, rel_tol=1e-14, abs_tol=1e-14));
+	
 testSuite = unittest.TestLoader().loadTestsFromTestCase(InterestTests);
 
 print(testSuite);
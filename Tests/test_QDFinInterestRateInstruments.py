@@ -30,6 +30,8 @@ import os
 
 sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
 
+import numpy
+
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 from QDFinConstants import ACT360_DAYS_IN_YEAR
 from QDFinConstants import ACTACT_DAYS_IN_YEAR
@@ -64,12 +66,24 @@ from QDFinInterestRateInstruments import bondModifiedDuration
 from QDFinInterestRateInstruments import bondConvexity
 from QDFinInterestRateInstruments import bondPriceChange
 from QDFinInterestRateInstruments import bondPriceChangeUsingConvexity
+from QDFinInterestRateInstruments import bondPriceChangeByModifiedDuration
 from QDFinInterestRateInstruments import bondHedgeUsingModifiedDuration
 from QDFinInterestRateInstruments import bondFuturesPrice
 from QDFinInterestRateInstruments import bondFuturesHedgeNotional
 from QDFinInterestRateInstruments import bondImpliedRepoRate
 from QDFinInterestRateInstruments import bondCashAndCarryArbitrage
 from QDFinInterestRateInstruments import bondYieldZeroCoupon
+from QDFinInterestRateInstruments import BondUniverse
+from QDFinInterestRateInstruments import Bond
+from QDFinInterestRateInstruments import bondYield
+from QDFinInterestRateInstruments import bondYieldBatch
+from QDFinInterestRateInstruments import bondYieldSafeguarded
+from QDFinInterestRateInstruments import bondPriceAndDerivative
+from QDFinInterestRateInstruments import bondRisk
+from QDFinInterestRateInstruments import bondPortfolioRisk
+from QDFinInterestRateInstruments import levelCouponBondDuration
+from QDFinInterestRateInstruments import levelCouponBondModifiedDuration
+from QDFinInterestRateInstruments import levelCouponBondConvexity
 
 class InterestRateInstrumentsTests(unittest.TestCase):
 	def testForwardForwardRate(self):
@@ -186,6 +200,215 @@ class InterestRateInstrumentsTests(unittest.TestCase):
 	def test(self):
 		self.assertAlmostEqual(bondYieldZeroCoupon(100, 65.48, 2, 16, 69, 184), 5.5845, 2);
 
+	def testBondUniverseMatchesSingleBonds(self):
+		notionals = [100, 1000, 100, 100];
+		couponRates = [6, 4.5, 0, 8];
+		frequencies = [1, 2, 2, 4];
+		paymentsRemaining = [9, 20, 6, 1];
+		daysSince = [260, 30, 0, 45];
+		daysTo = [100, 152, 182, 46];
+		bases = [ACT360_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR(), ACT360_DAYS_IN_YEAR()];
+		marketYields = numpy.array([3, 5.2, 4.4, 7.5]);
+		universe = BondUniverse(notionals, couponRates, frequencies, paymentsRemaining, daysSince, daysTo, bases, bases);
+		self.assertEqual(len(universe), 4);
+		dirtyPrices = universe.dirtyPrices(marketYields);
+		cleanPrices = universe.cleanPrices(marketYields);
+		accrued = universe.accruedInterest();
+		for bond in range(4):
+			self.assertAlmostEqual(dirtyPrices[bond], dirtyBondPrice(notionals[bond], couponRates[bond], marketYields[bond], frequencies[bond], paymentsRemaining[bond], daysTo[bond], bases[bond]), 10);
+			self.assertAlmostEqual(cleanPrices[bond], cleanBondPrice(notionals[bond], couponRates[bond], marketYields[bond], frequencies[bond], paymentsRemaining[bond], daysSince[bond], daysTo[bond], bases[bond], bases[bond]), 10);
+			self.assertAlmostEqual(accrued[bond], bondAccruedInterest(notionals[bond], couponRates[bond], daysSince[bond], bases[bond]), 12);
+		self.assertAlmostEqual(cleanPrices[0], 121.69, 2);
+		self.assertEqual(list(marketYields), [3, 5.2, 4.4, 7.5]);
+		sameYield = universe.subset([1, 3]).dirtyPrices(5.0);
+		self.assertAlmostEqual(sameYield[1], dirtyBondPrice(100, 8, 5.0, 4, 1, 46, ACT360_DAYS_IN_YEAR()), 10);
+
+	def testBondPriceAndDerivative(self):
+		price, derivative = bondPriceAndDerivative(100, 0.06, 0.03, 1, 9, 100 / 360.0);
+		self.assertAlmostEqual(price, dirtyBondPrice(100, 6, 3, 1, 9, 100, ACT360_DAYS_IN_YEAR()), 10);
+		bump = 1e-6;
+		up = bondPriceAndDerivative(100, 0.06, 0.03 + bump, 1, 9, 100 / 360.0)[0];
+		down = bondPriceAndDerivative(100, 0.06, 0.03 - bump, 1, 9, 100 / 360.0)[0];
+		self.assertAlmostEqual(derivative, (up - down) / (2 * bump), 4);
+
+	def testBondYieldBatchMatchesBondYield(self):
+		couponRates = numpy.array([6, 4.5, 0, 8, 2.25, 11]);
+		frequencies = numpy.array([1, 2, 2, 4, 2, 1]);
+		paymentsRemaining = numpy.array([9, 20, 6, 1, 60, 3]);
+		daysTo = numpy.array([100, 152, 182, 46, 10, 300]);
+		marketYields = numpy.array([3, 5.2, 4.4, 7.5, 1.1, 9.9]);
+		dirtyPrices = dirtyBondPrice(100, couponRates, marketYields, frequencies, paymentsRemaining, daysTo);
+		result = bondYieldBatch(100, dirtyPrices, couponRates, frequencies, paymentsRemaining, daysTo);
+		self.assertTrue(numpy.all(result.converged));
+		self.assertTrue(numpy.all(result.iterations > 0));
+		for bond in range(6):
+			self.assertAlmostEqual(result.yields[bond], marketYields[bond], 8);
+			self.assertAlmostEqual(result.yields[bond], bondYield(100, dirtyPrices[bond], couponRates[bond], frequencies[bond], paymentsRemaining[bond], daysTo[bond]), 8);
+		universe = BondUniverse([1000] * 6, couponRates, frequencies, paymentsRemaining, 0, daysTo);
+		fromUniverse = universe.yields(universe.dirtyPrices(marketYields));
+		self.assertTrue(numpy.allclose(fromUniverse.yields, marketYields, rtol=0, atol=1e-8));
+		limited = bondYieldBatch(100, dirtyPrices, couponRates, frequencies, paymentsRemaining, daysTo, maxIterations=2);
+		self.assertFalse(numpy.any(limited.converged));
+		self.assertEqual(list(limited.iterations), [2] * 6);
+
+	def testBondUniverseWarmStart(self):
+		couponRates = numpy.array([6, 4.5, 0, 8, 2.25, 11]);
+		frequencies = numpy.array([1, 2, 2, 4, 2, 1]);
+		paymentsRemaining = numpy.array([9, 20, 6, 1, 60, 3]);
+		daysTo = numpy.array([100, 152, 182, 46, 10, 300]);
+		marketYields = numpy.array([3, 5.2, 4.4, 7.5, 1.1, 9.9]);
+		universe = BondUniverse([1000] * 6, couponRates, frequencies, paymentsRemaining, 0, daysTo);
+		cold = universe.yields(universe.dirtyPrices(marketYields), decimalPlaces=8);
+		self.assertTrue(numpy.all(cold.iterations >= 3));
+
+		# Re-solving from the last yields takes one step for unchanged prices and two after a 0.1bp tick.
+		unchanged = universe.yields(universe.dirtyPrices(marketYields), decimalPlaces=8, initialYields=cold.yields);
+		self.assertEqual(list(unchanged.iterations), [1] * 6);
+		ticked = universe.yields(universe.dirtyPrices(marketYields + 0.001), decimalPlaces=8, initialYields=cold.yields, priceTolerance=1e-12);
+		self.assertTrue(numpy.all(ticked.converged));
+		self.assertTrue(numpy.all(ticked.iterations <= 2));
+		self.assertTrue(numpy.allclose(ticked.yields, marketYields + 0.001, rtol=0, atol=1e-10));
+
+	def testBondYieldSafeguardedMatchesBondYield(self):
+		dirtyPrice = dirtyBondPrice(100, 6, 3, 1, 9, 100, ACT360_DAYS_IN_YEAR());
+		result = bondYieldSafeguarded(100, dirtyPrice, 6, 1, 9, 100, ACT360_DAYS_IN_YEAR());
+		self.assertTrue(result.converged);
+		self.assertAlmostEqual(result.yields, 3, 8);
+		self.assertAlmostEqual(result.yields, bondYield(100, dirtyPrice, 6, 1, 9, 100, ACT360_DAYS_IN_YEAR()), 8);
+		self.assertEqual(bondYieldSafeguarded(100, dirtyPrice, 6, 1, 9, 100, ACT360_DAYS_IN_YEAR(), initialYield=3).iterations, 0);
+
+	def testBondYieldSafeguardedWarmStartsAndHardCases(self):
+		dirtyPrice = dirtyBondPrice(1000, 4.5, 5.21, 2, 40, 60);
+		warm = bondYieldSafeguarded(1000, dirtyPrice, 4.5, 2, 40, 60, initialYield=5.2);
+		self.assertTrue(warm.converged);
+		self.assertLessEqual(warm.iterations, 2);
+		self.assertAlmostEqual(warm.yields, 5.21, 8);
+		for notional, couponRate, marketYield, frequency, payments, days in [(100, 0, 3.0323, 2, 200, 30), (100, 1, 75, 1, 100, 100), (100, 0, 0.0001, 1, 30, 10), (100, 9, 14.5, 4, 120, 5)]:
+			dirtyPrice = dirtyBondPrice(notional, couponRate, marketYield, frequency, payments, days);
+			result = bondYieldSafeguarded(notional, dirtyPrice, couponRate, frequency, payments, days);
+			self.assertTrue(result.converged);
+			self.assertLess(result.iterations, 30);
+			self.assertAlmostEqual(result.yields, marketYield, 6);
+		batch = bondYieldBatch(100, [dirtyPrice] * 2, 9, 4, 120, 5, initialYields=[14.5, 14.4], priceTolerance=1e-9);
+		self.assertEqual(batch.iterations[0], 1);
+		self.assertTrue(numpy.all(batch.converged));
+
+		# Deep discount zero coupon bonds price at a tiny fraction of their notional, so the price tolerance is relative.
+		for marketYield in [60, 25]:
+			dirtyPrice = dirtyBondPrice(100, 0, marketYield, 2, 200, 30);
+			result = bondYieldSafeguarded(100, dirtyPrice, 0, 2, 200, 30);
+			self.assertTrue(result.converged);
+			self.assertAlmostEqual(result.yields, marketYield, 8);
+			batch = bondYieldBatch(100, [dirtyPrice], 0, 2, 200, 30, priceTolerance=1e-9);
+			self.assertTrue(batch.converged[0]);
+			self.assertAlmostEqual(batch.yields[0], marketYield, 8);
+			bond = Bond(100, 0, 2, 200, 30);
+			self.assertAlmostEqual(bond.marketYield(dirtyPrice), marketYield, 8);
+			self.assertAlmostEqual(bond.lastYield, marketYield, 8);
+
+	def testBondYieldBatchNearZeroYield(self):
+		# Yields of 1e-6%, priced with bondPriceAndDerivative which keeps its digits next to a zero yield, where dirtyBondPrice
+		#	only agrees to about 1e-7.
+		for marketYield in [1e-6, -1e-6]:
+			for couponRate, frequency, payments, days in [(2, 2, 20, 100), (5, 1, 30, 200), (0, 2, 10, 30)]:
+				dirtyPrice = bondPriceAndDerivative(100, couponRate * 0.01, marketYield * 0.01, frequency, payments, days / 365.0)[0];
+				self.assertAlmostEqual(dirtyPrice, dirtyBondPrice(100, couponRate, marketYield, frequency, payments, days), 5);
+				for priceTolerance in [1e-12, 0.0]:
+					batch = bondYieldBatch(100, [dirtyPrice], couponRate, frequency, payments, days, priceTolerance=priceTolerance);
+					self.assertTrue(batch.converged[0]);
+					self.assertLess(batch.iterations[0], 20);
+					self.assertAlmostEqual(batch.yields[0], marketYield, 12);
+
+	def testBondMatchesBondFunctions(self):
+		annual = Bond(100, 6, 1, 9, 0);
+		cashflows = [6, 6, 6, 6, 6, 6, 6, 6, 106];
+		years = [0, 1, 2, 3, 4, 5, 6, 7, 8];
+		self.assertEqual(list(annual.cashflows), cashflows);
+		self.assertAlmostEqual(annual.dirtyPrice(5.4), dirtyBondPrice(100, 6, 5.4, 1, 9, 0), 10);
+		self.assertAlmostEqual(annual.duration(5.4), bondDuration(5.4, cashflows, years), 10);
+		self.assertAlmostEqual(annual.modifiedDuration(5.4), bondModifiedDuration(bondDuration(5.4, cashflows, years), 5.4, 1), 10);
+		self.assertAlmostEqual(annual.convexity(5.4), bondConvexity(annual.dirtyPrice(5.4), 5.4, 1, cashflows, years), 10);
+
+		bond = Bond(1000, 4.5, 2, 40, 60, 122, ACT365_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR());
+		self.assertAlmostEqual(bond.dirtyPrice(5.2), dirtyBondPrice(1000, 4.5, 5.2, 2, 40, 60, ACT365_DAYS_IN_YEAR()), 9);
+		self.assertAlmostEqual(bond.cleanPrice(5.2), cleanBondPrice(1000, 4.5, 5.2, 2, 40, 122, 60, ACT365_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR()), 9);
+		self.assertAlmostEqual(bond.accruedInterest(), bondAccruedInterest(1000, 4.5, 122, ACT365_DAYS_IN_YEAR()), 12);
+		self.assertAlmostEqual(bond.convexity(5.2), bondConvexity(bond.dirtyPrice(5.2), 5.2, 2, list(bond.cashflows), list(bond.years)), 9);
+		bump = 1e-4;
+		slope = (bond.dirtyPrice(5.2 + bump) - bond.dirtyPrice(5.2 - bump)) / (2 * bump * 0.01);
+		self.assertAlmostEqual(bond.modifiedDuration(5.2), -slope / bond.dirtyPrice(5.2), 6);
+
+	def testBondCachesOneDiscountingPassPerYield(self):
+		bond = Bond(100, 5, 2, 20, 30);
+		price = bond.dirtyPrice(4.0);
+		presentValues = bond.presentValues;
+		duration = bond.duration(4.0);
+		bond.convexity(4.0);
+		self.assertIs(bond.presentValues, presentValues);
+		self.assertEqual(bond.cachedDuration, duration);
+		bond.dirtyPrice(4.5);
+		self.assertIsNot(bond.presentValues, presentValues);
+		self.assertIsNone(bond.cachedDuration);
+		self.assertLess(bond.dirtyPrice(4.5), price);
+		self.assertFalse(hasattr(bond, "__dict__"));
+		self.assertAlmostEqual(bond.marketYield(price), 4.0, 8);
+		self.assertEqual(bond.lastYield, bond.marketYield(price));
+
+	def testBondRiskMatchesSeparateFunctions(self):
+		cashflows = [6, 6, 6, 6, 6, 6, 6, 6, 106];
+		years = [1, 2, 3, 4, 5, 6, 7, 8, 9];
+		risk = bondRisk(100, 5.4, 1, 1, cashflows, years);
+		self.assertAlmostEqual(risk.duration, bondDuration(5.4, cashflows, years), 10);
+		self.assertAlmostEqual(risk.modifiedDuration, bondModifiedDuration(risk.duration, 5.4, 1), 10);
+		self.assertAlmostEqual(risk.convexity, bondConvexity(100, 5.4, 1, cashflows, years), 10);
+		self.assertAlmostEqual(risk.priceChange, bondPriceChangeUsingConvexity(100, 5.4, 1, 1, cashflows, years), 10);
+		self.assertAlmostEqual(risk.dv01, -bondPriceChangeByModifiedDuration(100, 0.01, risk.modifiedDuration), 12);
+
+		bond = Bond(1000, 4.5, 2, 40, 60);
+		price = bond.dirtyPrice(5.2);
+		risk = bondRisk(price, 5.2, 0.5, 2, list(bond.cashflows), list(bond.years));
+		self.assertAlmostEqual(risk.presentValue, price, 9);
+		self.assertAlmostEqual(risk.convexity, bond.convexity(5.2), 10);
+		self.assertAlmostEqual(risk.priceChange, bondPriceChangeUsingConvexity(price, 5.2, 0.5, 2, list(bond.cashflows), list(bond.years)), 9);
+
+	def testBondPortfolioRiskAggregatesPositions(self):
+		bonds = [Bond(100, 6, 1, 9, 0), Bond(1000, 4.5, 2, 40, 60), Bond(100, 3, 4, 7, 20)];
+		yields = [5.4, 5.2, 3.1];
+		prices = [bond.dirtyPrice(marketYield) for bond, marketYield in zip(bonds, yields)];
+		quantities = [10, 5, 200];
+		positions, portfolio = bondPortfolioRisk(quantities, prices, yields, 0.25, [1, 2, 4], [list(bond.cashflows) for bond in bonds], [list(bond.years) for bond in bonds]);
+		for index in range(len(bonds)):
+			single = bondRisk(prices[index], yields[index], 0.25, bonds[index].couponFrequency, list(bonds[index].cashflows), list(bonds[index].years));
+			for field in range(len(single)):
+				self.assertAlmostEqual(positions[field][index], single[field], 10);
+		self.assertAlmostEqual(portfolio.dv01, sum(q * dv01 for q, dv01 in zip(quantities, positions.dv01)), 10);
+		self.assertAlmostEqual(portfolio.priceChange, sum(q * change for q, change in zip(quantities, positions.priceChange)), 10);
+		value = sum(q * p for q, p in zip(quantities, prices));
+		self.assertAlmostEqual(portfolio.presentValue, value, 8);
+		self.assertAlmostEqual(portfolio.modifiedDuration, sum(q * p * md for q, p, md in zip(quantities, prices, positions.modifiedDuration)) / value, 10);
+
+	def testLevelCouponBondRiskMatchesCashflowLists(self):
+		expectedDurations = [];
+		expectedConvexities = [];
+		bonds = [(1, 9, 6, 5.4, 0), (2, 40, 4.5, 5.2, 60), (4, 7, 3, 0.01, 20), (12, 360, 5, 6.5, 12), (12, 360, 5, 0.0, 12), (2, 1, 8, 7, 100)];
+		for couponFrequency, numCoupons, couponRate, marketYield, daysToNextCoupon in bonds:
+			bond = Bond(100, couponRate, couponFrequency, numCoupons, daysToNextCoupon);
+			cashflows = list(bond.cashflows);
+			years = list(bond.years);
+			duration = bondDuration(marketYield, cashflows, years);
+			convexity = bondConvexity(bond.dirtyPrice(marketYield), marketYield, couponFrequency, cashflows, years);
+			self.assertAlmostEqual(levelCouponBondDuration(100, couponRate, marketYield, couponFrequency, numCoupons, daysToNextCoupon), duration, 10);
+			self.assertAlmostEqual(levelCouponBondModifiedDuration(100, couponRate, marketYield, couponFrequency, numCoupons, daysToNextCoupon), bondModifiedDuration(duration, marketYield, couponFrequency), 10);
+			self.assertAlmostEqual(levelCouponBondConvexity(100, couponRate, marketYield, couponFrequency, numCoupons, daysToNextCoupon), convexity, 10);
+			expectedDurations.append(duration);
+			expectedConvexities.append(convexity);
+
+		columns = numpy.array(bonds);
+		durations = levelCouponBondDuration(100, columns[:, 2], columns[:, 3], columns[:, 0], columns[:, 1].astype(int), columns[:, 4]);
+		convexities = levelCouponBondConvexity(100, columns[:, 2], columns[:, 3], columns[:, 0], columns[:, 1].astype(int), columns[:, 4]);
+		self.assertTrue(numpy.allclose(durations, expectedDurations, rtol=0, atol=1e-10));
+		self.assertTrue(numpy.allclose(convexities, expectedConvexities, rtol=0, atol=1e-10));
+
 testSuite = unittest.TestLoader().loadTestsFromTestCase(InterestRateInstrumentsTests);
 
 print(testSuite);
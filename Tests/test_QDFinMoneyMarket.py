@@ -30,6 +30,8 @@ import os
 
 sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
 
+import numpy
+
 from QDFinConstants import ACT365_DAYS_IN_YEAR
 from QDFinConstants import ACT360_DAYS_IN_YEAR
 
@@ -48,6 +50,12 @@ from QDFinMoneyMarket import discountInstrumentPriceUsingDiscountRate
 from QDFinMoneyMarket import discountInstrumentYieldFromDiscountRate
 from QDFinMoneyMarket import certificateOfDepositMultiCouponPrice
 from QDFinMoneyMarket import discountInstrumentBondEquivalentYield
+from QDFinMoneyMarket import certificateOfDepositBook
+from QDFinMoneyMarket import discountInstrumentDiscountRateFromYield
+from QDFinMoneyMarket import discountInstrumentRateFromBondEquivalentYield
+
+from QDFinDayCount import DayCountACT360
+from QDFinDayCount import DayCountACT365F
 
 class MoneyMarketTests(unittest.TestCase):
 	def testInitialCostAnnuityDeferred5YearYield8(self):
@@ -103,6 +111,69 @@ class MoneyMarketTests(unittest.TestCase):
 		self.assertAlmostEqual(discountInstrumentBondEquivalentYield(8, 182, ACT360_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR()), 8.4530, 4);
 		self.assertAlmostEqual(discountInstrumentBondEquivalentYield(8, 183, ACT360_DAYS_IN_YEAR(), ACT365_DAYS_IN_YEAR()), 8.4540, 2);
 
+	def testCertificateOfDepositBookMatchesSingleLines(self):
+		faceValues = [1000000, 500000, 2000000];
+		interests = [8, 6, 5];
+		marketYields = [7, 6.5, 5.5];
+		firstDays = [40, 10, 75];
+		schedules = [[92, 81, 91, 92], [91], [90, 92]];
+		saleYields = [6, 6, 5];
+		daysHeld = [20, 5, 30];
+		book = certificateOfDepositBook(faceValues, interests, marketYields, firstDays, schedules, saleYields, daysHeld);
+		padded = certificateOfDepositBook(faceValues, interests, marketYields, numpy.array(firstDays), numpy.array([[92, 81, 91, 92], [91, 0, 0, 0], [90, 92, 0, 0]]));
+		self.assertIsNone(padded.holdingPeriodYield);
+		for line in range(3):
+			price = certificateOfDepositMultiCouponPrice(faceValues[line], interests[line], marketYields[line], firstDays[line], schedules[line]);
+			self.assertAlmostEqual(book.price[line], price, 6);
+			self.assertAlmostEqual(padded.price[line], price, 6);
+
+		# A single coupon line uses the single coupon functions.
+		daysToMaturity = firstDays[1];
+		proceeds = certificateOfDepositMaturityProceeds(faceValues[1], interests[1], schedules[1][0]);
+		self.assertAlmostEqual(book.secondaryMarketPrice[1], certificateOfDepositSecondaryMarketPrice(proceeds, marketYields[1], daysToMaturity), 6);
+		salePrice = certificateOfDepositSecondaryMarketPrice(proceeds, saleYields[1], daysToMaturity - daysHeld[1]);
+		self.assertAlmostEqual(book.holdingPeriodYield[1], (salePrice / book.price[1] - 1) * (360 / daysHeld[1]) * 100, 8);
+		self.assertAlmostEqual(book.price[1], book.secondaryMarketPrice[1], 6);
+
+		# With more coupons, the line is sold for its remaining cashflows at the sale yield, nothing having been paid yet.
+		for line in [0, 2]:
+			self.assertAlmostEqual(book.secondaryMarketPrice[line], book.price[line], 6);
+			salePrice = certificateOfDepositMultiCouponPrice(faceValues[line], interests[line], saleYields[line], firstDays[line] - daysHeld[line], schedules[line]);
+			self.assertAlmostEqual(book.holdingPeriodYield[line], (salePrice / book.price[line] - 1) * (360 / daysHeld[line]) * 100, 8);
+
+	def testCertificateOfDepositBookHoldingPastACoupon(self):
+		book = certificateOfDepositBook(1000000, 8, 7, 40, [[92, 81, 91, 92]], 6, 60);
+		price = certificateOfDepositMultiCouponPrice(1000000, 8, 7, 40, [92, 81, 91, 92]);
+		received = 1000000 * 0.08 * 92 / 360;
+		salePrice = certificateOfDepositMultiCouponPrice(1000000, 8, 6, 40 + 81 - 60, [81, 91, 92]);
+		self.assertAlmostEqual(book.holdingPeriodYield[0], ((salePrice + received) / price - 1) * (360 / 60) * 100, 8);
+		atIssue = certificateOfDepositBook(1000000, 5, 5, 91, [[91]], 6, 30);
+		self.assertAlmostEqual(atIssue.holdingPeriodYield[0], certificateOfDepositSimpleYield(5, 6, 91, 30), 10);
+
+	def testCertificateOfDepositBookBoughtAfterIssue(self):
+		# A 180 day 6% CD bought 90 days before maturity at 5% and sold 30 days later at 5% earns about 5%.
+		single = certificateOfDepositBook(1000000, 6, 5, 90, [[180]], 5, 30);
+		proceeds = certificateOfDepositMaturityProceeds(1000000, 6, 180);
+		price = certificateOfDepositSecondaryMarketPrice(proceeds, 5, 90);
+		salePrice = certificateOfDepositSecondaryMarketPrice(proceeds, 5, 60);
+		self.assertAlmostEqual(single.holdingPeriodYield[0], (salePrice / price - 1) * (360 / 30) * 100, 10);
+		self.assertAlmostEqual(single.holdingPeriodYield[0], 5.0, 1);
+
+	def testDiscountInstrumentArraysMatchScalarsExactly(self):
+		discountRates = numpy.array([8.0, 5.25, 4.1, 6.75, 3.3, 7.9]);
+		days = numpy.array([100, 182, 183, 250, 364, 30]);
+		bases = [DayCountACT360(), DayCountACT365F(), ACT360_DAYS_IN_YEAR(), DayCountACT365F(), DayCountACT360(), ACT365_DAYS_IN_YEAR()];
+		functions = [discountInstrumentBondEquivalentYield, discountInstrumentRateFromBondEquivalentYield, discountInstrumentYieldFromDiscountRate, discountInstrumentDiscountRateFromYield];
+		for function in functions:
+			batch = function(discountRates, days, bases);
+			for row in range(len(days)):
+				self.assertEqual(batch[row], function(float(discountRates[row]), int(days[row]), bases[row]));
+		prices = discountInstrumentPriceUsingDiscountRate(1000000, discountRates, days, bases);
+		for row in range(len(days)):
+			self.assertEqual(prices[row], discountInstrumentPriceUsingDiscountRate(1000000, float(discountRates[row]), int(days[row]), bases[row]));
+		self.assertEqual(list(discountRates), [8.0, 5.25, 4.1, 6.75, 3.3, 7.9]);
+		self.assertAlmostEqual(discountInstrumentBondEquivalentYield(numpy.array([8.0, 8.0]), numpy.array([100, 182]))[1], 8.4530, 4);
+
 testSuite = unittest.TestLoader().loadTestsFromTestCase(MoneyMarketTests);
 
 print(testSuite);
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import math
+
+import numpy
+
+from QDFinMonteCarlo import VasicekModel
+from QDFinMonteCarlo import HullWhiteModel
+from QDFinMonteCarlo import monteCarloPresentValue
+from QDFinMonteCarlo import monteCarloBondPrice
+from QDFinMonteCarlo import monteCarloAnnuityValue
+from QDFinMonteCarlo import bondCashflows
+
+from QDFinMoneyMarket import annuityDeferredInitialCost
+
+class MonteCarloTests(unittest.TestCase):
+	def testFlatRateMatchesClosedForms(self):
+		continuousRate = 100.0 * math.log(1.06);
+		model = VasicekModel(continuousRate, 0.2, continuousRate, 0.0);
+		annuity = monteCarloAnnuityValue(model, 1000, 10, numPaths=10);
+		self.assertAlmostEqual(annuity.value, annuityDeferredInitialCost(1000, 6, 10), 8);
+		self.assertAlmostEqual(annuity.standardError, 0.0, 8);
+		cashflows, years = bondCashflows(100, 5, 2, 20, 60);
+		self.assertEqual(len(cashflows), 20);
+		self.assertAlmostEqual(cashflows[-1], 102.5, 12);
+		self.assertAlmostEqual(years[1] - years[0], 0.5, 12);
+		bond = monteCarloBondPrice(model, 100, 5, 2, 20, 60, numPaths=10);
+		expected = sum(cashflows[i] * math.pow(1.06, -years[i]) for i in range(20));
+		self.assertAlmostEqual(bond.value, expected, 8);
+
+	def testVasicekZeroCouponBond(self):
+		meanReversion, longTermRate, volatility, initialRate, years = 0.3, 0.05, 0.012, 0.04, 5.0;
+		b = (1.0 - math.exp(-meanReversion * years)) / meanReversion;
+		a = math.exp((longTermRate - volatility * volatility / (2.0 * meanReversion * meanReversion)) * (b - years) - volatility * volatility * b * b / (4.0 * meanReversion));
+		model = VasicekModel(4.0, meanReversion, 5.0, 1.2);
+		valuation = monteCarloPresentValue(model, [1.0], [years], numPaths=20000, seed=7);
+		self.assertTrue(abs(valuation.value - a * math.exp(-b * initialRate)) < 4.0 * valuation.standardError + 1e-4);
+
+	def testHullWhiteRepricesInitialCurve(self):
+		model = HullWhiteModel([0.5, 2.0, 5.0, 10.0], [3.0, 3.5, 4.0, 4.2], 0.1, 1.0);
+		for years, rate in [(0.25, 3.0), (2.0, 3.5), (10.0, 4.2)]:
+			valuation = monteCarloPresentValue(model, [1.0], [years], numPaths=20000, seed=11);
+			self.assertTrue(abs(valuation.value - math.exp(-0.01 * rate * years)) < 4.0 * valuation.standardError + 1e-4);
+
+	def testHullWhiteRepricesBetweenKnots(self):
+		# The forwards jump at the knots, so the curve is only repriced between them if alpha is integrated exactly.
+		times, zeroRates = [0.5, 2.0, 5.0, 10.0], [3.0, 3.5, 4.0, 4.2];
+		deterministic = HullWhiteModel(times, zeroRates, 0.1, 0.0);
+		model = HullWhiteModel(times, zeroRates, 0.1, 0.01);
+		for years in [0.25, 1.5, 3.0, 7.0, 12.0]:
+			expected = math.exp(-deterministic.curve(years) * years);
+			self.assertAlmostEqual(monteCarloPresentValue(deterministic, [1.0], [years], numPaths=10).value, expected, 12);
+			valuation = monteCarloPresentValue(model, [1.0], [years], numPaths=20000, seed=11);
+			self.assertTrue(abs(valuation.value - expected) < 4.0 * valuation.standardError + 1e-7);
+
+	def testHullWhiteAlphaIntegral(self):
+		times = numpy.linspace(0.0, 12.0, 120001);
+		for meanReversion in [0.1, 1e-5, 0.0]:
+			model = HullWhiteModel([0.5, 2.0, 5.0, 10.0], [3.0, 3.5, 4.0, 4.2], meanReversion, 1.0);
+			alpha = model.alpha(times);
+			trapezium = numpy.concatenate(([0.0], numpy.cumsum(0.5 * (alpha[1:] + alpha[:-1]) * numpy.diff(times))));
+			self.assertTrue(numpy.max(numpy.abs(model.alphaIntegral(times) - trapezium)) < 1e-6);
+
+	def testResultsDoNotDependOnWorkers(self):
+		model = VasicekModel(4.0, 0.3, 5.0, 1.2);
+		single = monteCarloBondPrice(model, 100, 5, 2, 10, 30, numPaths=3000, blockSize=500, seed=3);
+		pooled = monteCarloBondPrice(model, 100, 5, 2, 10, 30, numPaths=3000, blockSize=500, seed=3, workers=2);
+		self.assertEqual(single, pooled);
+		self.assertEqual(single.numPaths, 3000);
+		self.assertNotEqual(single.value, monteCarloBondPrice(model, 100, 5, 2, 10, 30, numPaths=3000, blockSize=500, seed=4).value);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(MonteCarloTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import math
+
+import numpy
+
+from QDFinOptions import cumulativeNormal
+from QDFinOptions import blackScholes
+from QDFinOptions import black76
+
+class OptionsTests(unittest.TestCase):
+	def testCumulativeNormal(self):
+		self.assertAlmostEqual(cumulativeNormal(0.0), 0.5, 15);
+		self.assertAlmostEqual(cumulativeNormal(1.96), 0.9750021048517795, 15);
+		values = numpy.linspace(-10.0, 10.0, 2001);
+		batch = cumulativeNormal(values);
+		for i in range(len(values)):
+			expected = cumulativeNormal(float(values[i]));
+			self.assertAlmostEqual(batch[i], expected, 15);
+
+	def testBlackScholesTextbookValues(self):
+		call = blackScholes(True, 100.0, 100.0, 365, 5.0, 20.0);
+		put = blackScholes(False, 100.0, 100.0, 365, 5.0, 20.0);
+		self.assertAlmostEqual(call.price, 10.4506, 4);
+		self.assertAlmostEqual(put.price, 5.5735, 4);
+		self.assertAlmostEqual(call.delta, 0.6368, 4);
+		self.assertAlmostEqual(call.price - put.price, 100.0 - 100.0 * math.exp(-0.05), 12);
+
+	def testDeepInTheMoneyShortExpiry(self):
+		call = blackScholes(True, 100.0, 50.0, 1, 5.0, 1.0);
+		self.assertAlmostEqual(call.price, 100.0 - 50.0 * math.exp(-0.05 / 365.0), 10);
+		self.assertEqual(call.gamma, 0.0);
+		self.assertEqual(call.vega, 0.0);
+		batch = blackScholes(True, numpy.array([100.0]), 50.0, 1, 5.0, 1.0);
+		self.assertAlmostEqual(batch.price[0], call.price, 10);
+
+	def testGreeksMatchFiniteDifferences(self):
+		for isCall in [True, False]:
+			for pricer, extra in [(blackScholes, (2.0,)), (black76, ())]:
+				base = pricer(isCall, 105.0, 100.0, 200, 4.0, 25.0, *extra);
+				bump = 1e-4;
+				up = pricer(isCall, 105.0 + bump, 100.0, 200, 4.0, 25.0, *extra);
+				down = pricer(isCall, 105.0 - bump, 100.0, 200, 4.0, 25.0, *extra);
+				self.assertAlmostEqual(base.delta, (up.price - down.price) / (2 * bump), 6);
+				self.assertAlmostEqual(base.gamma, (up.delta - down.delta) / (2 * bump), 6);
+				vegaUp = pricer(isCall, 105.0, 100.0, 200, 4.0, 25.0 + bump, *extra).price;
+				vegaDown = pricer(isCall, 105.0, 100.0, 200, 4.0, 25.0 - bump, *extra).price;
+				self.assertAlmostEqual(base.vega, (vegaUp - vegaDown) / (2 * bump), 6);
+				rhoUp = pricer(isCall, 105.0, 100.0, 200, 4.0 + bump, 25.0, *extra).price;
+				rhoDown = pricer(isCall, 105.0, 100.0, 200, 4.0 - bump, 25.0, *extra).price;
+				self.assertAlmostEqual(base.rho, (rhoUp - rhoDown) / (2 * bump), 6);
+				thetaUp = pricer(isCall, 105.0, 100.0, 200 - bump, 4.0, 25.0, *extra).price;
+				thetaDown = pricer(isCall, 105.0, 100.0, 200 + bump, 4.0, 25.0, *extra).price;
+				self.assertAlmostEqual(base.theta, (thetaUp - thetaDown) / (2 * bump), 6);
+
+	def testBookValuationMatchesSingleOptions(self):
+		isCall = numpy.array([True, False, True, False]);
+		strikes = numpy.array([80.0, 95.0, 110.0, 140.0]);
+		days = numpy.array([30, 91, 182, 730]);
+		volatilities = numpy.array([15.0, 20.0, 35.0, 50.0]);
+		for book, single in [(blackScholes(isCall, 100.0, strikes, days, 3.0, volatilities, 1.0), lambda i: blackScholes(bool(isCall[i]), 100.0, strikes[i], days[i], 3.0, volatilities[i], 1.0)), (black76(isCall, 100.0, strikes, days, 3.0, volatilities), lambda i: black76(bool(isCall[i]), 100.0, strikes[i], days[i], 3.0, volatilities[i]))]:
+			for i in range(4):
+				expected = single(i);
+				for field in range(6):
+					self.assertAlmostEqual(book[field][i], float(expected[field]), 12);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(OptionsTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development" 
+__version__ = "0.1.0"
+
+import unittest
+import sys
+import os
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
+
+import datetime
+import math
+import shutil
+import tempfile
+
+import numpy
+
+from QDFinPriceHistory import writePriceHistory
+from QDFinPriceHistory import PriceHistory
+
+from QDFinStatistics import historicVolatility
+from QDFinStatistics import variance
+from QDFinStatistics import covariance
+from QDFinStatistics import correlationCoefficient
+from QDFinStatistics import correlationMatrix
+
+class PriceHistoryTests(unittest.TestCase):
+	def setUp(self):
+		self.directory = tempfile.mkdtemp();
+		self.dates = [datetime.date(2020, 1, 1) + datetime.timedelta(days=day) for day in range(40)];
+		self.instruments = ["AAA", "BBB", "CCC"];
+		self.columns = [[100.0 + 10.0 * math.sin(day * (0.3 + 0.1 * item)) + day * item for day in range(40)] for item in range(3)];
+		prices = [[self.columns[item][day] for item in range(3)] for day in range(40)];
+		writePriceHistory(self.directory, self.dates, self.instruments, prices);
+
+	def tearDown(self):
+		shutil.rmtree(self.directory);
+
+	def testColumnsAreMemoryMappedViews(self):
+		history = PriceHistory(self.directory);
+		self.assertEqual(len(history), 40);
+		self.assertEqual(history.instruments, self.instruments);
+		column = history.column("BBB");
+		self.assertTrue(isinstance(column.base, numpy.memmap) or isinstance(column, numpy.memmap));
+		self.assertTrue(column.flags["C_CONTIGUOUS"]);
+		self.assertEqual(list(column), self.columns[1]);
+		window = history.column("CCC", datetime.date(2020, 1, 5), datetime.date(2020, 1, 14));
+		self.assertEqual(list(window), self.columns[2][4:14]);
+
+	def testStatisticsAcceptColumns(self):
+		history = PriceHistory(self.directory);
+		columnA = history.column("AAA");
+		columnB = history.column("CCC");
+		self.assertAlmostEqual(historicVolatility(columnA), historicVolatility(self.columns[0]), 10);
+		self.assertAlmostEqual(variance(columnA, 1), variance(self.columns[0], 1), 8);
+		self.assertAlmostEqual(covariance(columnA, columnB), covariance(self.columns[0], self.columns[2]), 8);
+		self.assertAlmostEqual(correlationCoefficient(columnA, columnB), correlationCoefficient(self.columns[0], self.columns[2]), 10);
+
+	def testBulkVolatilities(self):
+		history = PriceHistory(self.directory);
+		for blockSize in [256, 2]:
+			volatilities = history.volatilities(blockSize=blockSize);
+			for item in range(3):
+				self.assertAlmostEqual(volatilities[item], historicVolatility(self.columns[item]), 10);
+		start = datetime.date(2020, 1, 11);
+		volatilities = history.volatilities(20, start);
+		for item in range(3):
+			self.assertAlmostEqual(volatilities[item], historicVolatility(self.columns[item][10:], 20), 10);
+		correlations = correlationMatrix(history.logReturns());
+		returnsA = [math.log(self.columns[0][day] / self.columns[0][day - 1]) for day in range(1, 40)];
+		returnsB = [math.log(self.columns[1][day] / self.columns[1][day - 1]) for day in range(1, 40)];
+		self.assertAlmostEqual(correlations[0][1], correlationCoefficient(returnsA, returnsB), 10);
+
+	def testBadShapeRaises(self):
+		self.assertRaises(ValueError, writePriceHistory, os.path.join(self.directory, "bad"), self.dates, self.instruments, [[1.0, 2.0]]);
+
+testSuite = unittest.TestLoader().loadTestsFromTestCase(PriceHistoryTests);
+
+print(testSuite);
+
+unittest.TextTestRunner(verbosity=3).run(testSuite);
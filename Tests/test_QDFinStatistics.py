@@ -25,11 +25,14 @@ __status__ = "Development"
 __version__ = "0.1.0"
 
 import unittest
+import math
 import sys
 import os
 
 sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
 
+import numpy
+
 from QDFinStatistics import linearInterpolation
 from QDFinStatistics import logInterpolation
 from QDFinStatistics import mean
@@ -40,6 +43,17 @@ from QDFinStatistics import correlationCoefficient
 from QDFinStatistics import covariance
 from QDFinStatistics import fastCovariance
 from QDFinStatistics import gaussian
+from QDFinStatistics import RunningStatistics
+from QDFinStatistics import RunningVolatility
+from QDFinStatistics import RollingVolatility
+from QDFinStatistics import RollingCorrelation
+from QDFinStatistics import rollingHistoricVolatility
+from QDFinStatistics import rollingCovariance
+from QDFinStatistics import rollingCorrelationCoefficient
+from QDFinStatistics import covarianceMatrix
+from QDFinStatistics import fastCovarianceMatrix
+from QDFinStatistics import correlationMatrix
+from QDFinStatistics import CurveInterpolator
 
 class StatisticsTests(unittest.TestCase):
 	def testLinearInterpolationBetween3mAnd5m(self):
@@ -76,6 +90,127 @@ class StatisticsTests(unittest.TestCase):
 		for item in range(numItems):
 			self.assertAlmostEqual(gaussian(inputs[item]), outputs[item], 4);
 
+	def testRunningStatisticsMatchesVariance(self):
+		numbers = [110, 32, 85, 99, 100, 92, 93, 99, 34, 70];
+		running = RunningStatistics();
+		for item in numbers:
+			running.add(item);
+		self.assertAlmostEqual(running.mean(), mean(numbers), 10);
+		self.assertAlmostEqual(running.variance(), 686.04, 2);
+		self.assertAlmostEqual(running.variance(1), variance(numbers, 1), 10);
+		self.assertAlmostEqual(running.standardDeviation(), standardDeviation(numbers), 10);
+
+	def testRunningStatisticsChunksAndMerges(self):
+		numbers = [110, 32, 85, 99, 100, 92, 93, 99, 34, 70];
+		chunked = RunningStatistics().addMany(numbers[:3]).addMany(numbers[3:]);
+		merged = RunningStatistics().addMany(numbers[:6]).merge(RunningStatistics().addMany(numbers[6:]));
+		for running in [chunked, merged]:
+			self.assertEqual(running.count, 10);
+			self.assertAlmostEqual(running.mean(), mean(numbers), 10);
+			self.assertAlmostEqual(running.variance(), variance(numbers), 10);
+
+	def testRunningVolatilityMatchesHistoricVolatility(self):
+		prices = [1.6520, 1.7342, 1.7490, 1.7640, 1.7850, 1.8890, 1.8980, 1.9230, 1.9450, 1.9540];
+		single = RunningVolatility();
+		for price in prices:
+			single.add(price);
+		chunked = RunningVolatility().addMany(prices[:4]).addMany(prices[4:]);
+		merged = RunningVolatility().addMany(prices[:5]).merge(RunningVolatility().addMany(prices[5:]));
+		for running in [single, chunked, merged]:
+			self.assertEqual(running.numPrices, 10);
+			self.assertAlmostEqual(running.volatility(), 31.0603, 1);
+			self.assertAlmostEqual(running.volatility(10), historicVolatility(prices, 10), 10);
+			self.assertAlmostEqual(running.returns.mean(), mean([math.log(prices[i] / prices[i - 1]) for i in range(1, 10)]), 12);
+
+	def testRollingVolatilityMatchesHistoricVolatilityForEachWindow(self):
+		prices = [100.0 + 5.0 * math.sin(i * 0.7) + 0.1 * i for i in range(60)];
+		rolling = RollingVolatility((5, 10, 30), refreshInterval=17);
+		for i in range(len(prices)):
+			rolling.add(prices[i]);
+			for window in [5, 10, 30]:
+				self.assertEqual(rolling.ready(window), i + 1 >= window);
+				if rolling.ready(window):
+					self.assertAlmostEqual(rolling.volatility(window), historicVolatility(prices[i + 1 - window:i + 1]), 8);
+		series = rollingHistoricVolatility(prices, 10);
+		self.assertTrue(math.isnan(series[8]));
+		for i in range(9, len(prices)):
+			self.assertAlmostEqual(series[i], historicVolatility(prices[i - 9:i + 1]), 8);
+
+	def testRollingCorrelationMatchesFullWindowCalculations(self):
+		listA = [math.sin(i * 0.3) + 0.01 * i for i in range(50)];
+		listB = [math.cos(i * 0.2) + 0.5 * listA[i] for i in range(50)];
+		rolling = RollingCorrelation((4, 12), refreshInterval=13).addMany(listA, listB);
+		covarianceSeries = rollingCovariance(listA, listB, 12);
+		correlationSeries = rollingCorrelationCoefficient(listA, listB, 12);
+		for window in [4, 12]:
+			self.assertAlmostEqual(rolling.correlation(window), correlationCoefficient(listA[-window:], listB[-window:]), 10);
+			self.assertAlmostEqual(rolling.covariance(window), covariance(listA[-window:], listB[-window:]), 10);
+			self.assertAlmostEqual(rolling.fastCovariance(window), fastCovariance(listA[-window:], listB[-window:]), 10);
+		for i in range(11, 50):
+			self.assertAlmostEqual(covarianceSeries[i], covariance(listA[i - 11:i + 1], listB[i - 11:i + 1]), 10);
+			self.assertAlmostEqual(correlationSeries[i], correlationCoefficient(listA[i - 11:i + 1], listB[i - 11:i + 1]), 10);
+
+	def testCovarianceAndCorrelationMatricesMatchPairCalculations(self):
+		columns = [[math.sin(i * (0.2 + 0.1 * j)) + 0.05 * i * j for i in range(30)] for j in range(4)];
+		data = [[columns[j][i] for j in range(4)] for i in range(30)];
+		for chunkSize in [None, 7]:
+			covariances = covarianceMatrix(data, chunkSize=chunkSize);
+			yearCovariances = covarianceMatrix(data, 30, chunkSize);
+			fastCovariances = fastCovarianceMatrix(data, chunkSize);
+			correlations = correlationMatrix(data, chunkSize);
+			for a in range(4):
+				for b in range(4):
+					self.assertAlmostEqual(covariances[a][b], covariance(columns[a], columns[b]), 10);
+					self.assertAlmostEqual(yearCovariances[a][b], covariance(columns[a], columns[b], 30), 10);
+					self.assertAlmostEqual(fastCovariances[a][b], fastCovariance(columns[a], columns[b]), 10);
+					self.assertAlmostEqual(correlations[a][b], correlationCoefficient(columns[a], columns[b]), 10);
+
+	def testCurveInterpolatorMatchesTwoPointInterpolation(self):
+		times = [30, 92, 153, 365, 730];
+		values = [5.0, 5.1, 5.5, 5.7, 6.1];
+		queries = [0, 12, 30, 50, 92, 112, 153, 200, 500, 730, 900];
+		linear = CurveInterpolator(times, values);
+		logLinear = CurveInterpolator(times, values, "logLinear");
+		for query in queries:
+			index = min(max(sum(1 for time in times if time <= query) - 1, 0), 3);
+			expectedLinear = linearInterpolation(values[index], values[index + 1], times[index], times[index + 1], query);
+			expectedLog = logInterpolation(values[index], values[index + 1], times[index], times[index + 1], query);
+			self.assertAlmostEqual(linear(query), expectedLinear, 12);
+			self.assertAlmostEqual(logLinear(query), expectedLog, 12);
+		self.assertAlmostEqual(linear(112), 5.2311, 4);
+		self.assertAlmostEqual(linear(163), 5.5094, 4);
+		queryArray = numpy.array(queries, dtype=float);
+		for interpolator in [linear, logLinear]:
+			batch = interpolator(queryArray);
+			for i in range(len(queries)):
+				self.assertAlmostEqual(batch[i], interpolator(queries[i]), 12);
+
+	def testCurveInterpolatorFlatForward(self):
+		times = [0.5, 1.0, 2.0];
+		rates = [0.02, 0.025, 0.03];
+		flatForward = CurveInterpolator(times, rates, "flatForward");
+		self.assertAlmostEqual(flatForward(1.0), 0.025, 14);
+		self.assertAlmostEqual(flatForward(1.5), (0.025 + 0.035 * 0.5) / 1.5, 14);
+		forwards = [(flatForward(t + 0.01) * (t + 0.01) - flatForward(t) * t) / 0.01 for t in [1.1, 1.5, 1.9]];
+		for forward in forwards:
+			self.assertAlmostEqual(forward, 0.035, 10);
+		batch = flatForward(numpy.array([0.0, 0.75, 1.5, 3.0]));
+		self.assertAlmostEqual(batch[0], 0.02, 14);
+		self.assertAlmostEqual(batch[2], flatForward(1.5), 14);
+		self.assertAlmostEqual(batch[3], flatForward(3.0), 14);
+
+		# Before the first knot the first zero rate is held flat.
+		early = [0.01, 0.1, 0.25, 0.49];
+		for time in early:
+			self.assertEqual(flatForward(time), 0.02);
+		self.assertTrue(numpy.all(flatForward(numpy.array(early)) == 0.02));
+		self.assertAlmostEqual(flatForward(0.5), 0.02, 14);
+
+	def testCurveInterpolatorRejectsBadKnots(self):
+		self.assertRaises(ValueError, CurveInterpolator, [1.0], [2.0]);
+		self.assertRaises(ValueError, CurveInterpolator, [1.0, 1.0], [2.0, 3.0]);
+		self.assertRaises(ValueError, CurveInterpolator, [1.0, 2.0], [2.0, 3.0], "cubic");
+
 testSuite = unittest.TestLoader().loadTestsFromTestCase(StatisticsTests);
 
 print(testSuite);
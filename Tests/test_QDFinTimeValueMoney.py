@@ -28,6 +28,8 @@ import unittest
 import sys
 import os
 
+import numpy
+
 sys.path.append( os.path.join( os.path.dirname( __file__ ), '..', 'Scripts' ))
 
 from QDFinTimeValueMoney import complexFutureValue
@@ -40,8 +42,16 @@ from QDFinTimeValueMoney import simpleDiscountFactor
 from QDFinTimeValueMoney import complexDiscountFactor
 from QDFinTimeValueMoney import continuouslyCompoundedDiscountFactor
 from QDFinTimeValueMoney import netPresentValueOfCashflows
+from QDFinTimeValueMoney import netPresentValueOfCashflowsWithDates
+from QDFinTimeValueMoney import netPresentValueProfile
+from QDFinTimeValueMoney import netPresentValueProfileWithDates
 from QDFinTimeValueMoney import internalRateOfReturnOfCashflows
 from QDFinTimeValueMoney import internalRateOfReturnOfCashflowsWithDates
+from QDFinTimeValueMoney import internalRateOfReturn
+from QDFinTimeValueMoney import internalRateOfReturnBatch
+from QDFinTimeValueMoney import extendedInternalRateOfReturn
+from QDFinTimeValueMoney import ExtendedInternalRateOfReturnCache
+from QDFinTimeValueMoney import complexYieldFromDays
 from QDFinInterest import convertRateToMoneyMarketBasis
 
 class TimeValueOfMoneyTests(unittest.TestCase):
@@ -87,6 +97,101 @@ class TimeValueOfMoneyTests(unittest.TestCase):
 	
 	def testGetSimpleYieldInMoneyMarketBasis(self):
 		self.assertAlmostEqual(convertRateToMoneyMarketBasis(simpleYield(36, 39, 123)), 24.3902, 4);
+	
+	def testNetPresentValueProfileMatchesSingleRate(self):
+		cashflows = [[130, 42, -58, 18, -44], [-100, 20, 30, 40, 50], [5, 5, 5, 5, 105]];
+		rates = [0, 1.5, 5.8, 12, 40];
+		profile = netPresentValueProfile(cashflows, rates);
+		self.assertEqual(profile.shape, (3, 5));
+		self.assertAlmostEqual(profile[0][2], 92.5945, 4);
+		for i in range(3):
+			for j in range(5):
+				self.assertAlmostEqual(profile[i][j], netPresentValueOfCashflows(cashflows[i], rates[j]), 10);
+	
+	def testNetPresentValueProfileWithSharedDates(self):
+		cashflows = [[1000, -200, 300, 400], [50, 50, 50, 1050]];
+		years = [0.5, 1.0, 1.5, 2.0];
+		rates = numpy.linspace(-5, 25, 7);
+		profile = netPresentValueProfileWithDates(cashflows, years, rates);
+		for i in range(2):
+			for j in range(7):
+				self.assertAlmostEqual(profile[i][j], netPresentValueOfCashflowsWithDates(cashflows[i], years, rates[j]), 10);
+	
+	def testNetPresentValueProfileWithDatesPerPortfolio(self):
+		cashflows = [[1000, -200, 300, 400], [50, 50, 50, 1050], [10, 20, 30, 40]];
+		years = [[0.5, 1.0, 1.5, 2.0], [1, 2, 3, 4], [0.25, 3, 7.5, 10]];
+		rates = [2, 4, 8];
+		profile = netPresentValueProfileWithDates(cashflows, years, rates, blockSize=2);
+		for i in range(3):
+			for j in range(3):
+				self.assertAlmostEqual(profile[i][j], netPresentValueOfCashflowsWithDates(cashflows[i], years[i], rates[j]), 10);
+	
+	def testInternalRateOfReturnReportsIterations(self):
+		result = internalRateOfReturn(1300, [100, -200, 1100, 350]);
+		self.assertTrue(result.converged);
+		self.assertTrue(result.iterations < 20);
+		self.assertAlmostEqual(netPresentValueOfCashflows([100, -200, 1100, 350], result.rate), 1300, 8);
+	
+	def testInternalRateOfReturnFallsBackToBracketedSolver(self):
+		cashflows = [1000, 0, 0, 0, -2000, 0, 0, 0, 0, 1200];
+		result = internalRateOfReturn(100, cashflows);
+		self.assertTrue(result.converged);
+		self.assertAlmostEqual(netPresentValueOfCashflows(cashflows, result.rate), 100, 8);
+	
+	def testInternalRateOfReturnWithNoSolutionStops(self):
+		result = internalRateOfReturn(100, [-10, -10], maxIterations=50);
+		self.assertFalse(result.converged);
+		self.assertTrue(result.iterations < 200);
+	
+	def testInternalRateOfReturnBatchMatchesSingleSolves(self):
+		initialInvestments = [1300, 1300, 100, 100, 90];
+		cashflows = [[100, -200, 1100, 350], [1000, -200, 300, 400], [-10, -10, 0, 0], [0, 0, 0, 150], [6, 6, 6, 106]];
+		result = internalRateOfReturnBatch(initialInvestments, cashflows);
+		self.assertEqual(list(result.converged), [True, True, False, True, True]);
+		for row in [0, 1, 3, 4]:
+			self.assertAlmostEqual(result.rate[row], internalRateOfReturn(initialInvestments[row], cashflows[row]).rate, 8);
+		self.assertTrue(numpy.all(result.iterations[[0, 1, 3, 4]] < 20));
+	
+	def testInternalRateOfReturnBatchWithDates(self):
+		cashflows = [[100, -200, 1100, 350], [1000, -200, 300, 400]];
+		result = internalRateOfReturnBatch(1300, cashflows, [[1, 2, 3, 4], [0.5, 1.0, 1.5, 2.0]]);
+		self.assertAlmostEqual(result.rate[0], 1.1654, 4);
+		self.assertAlmostEqual(result.rate[1], 15.3945, 4);
+	
+	def testExtendedInternalRateOfReturn(self):
+		dates = ['2008-01-01', '2008-03-01', '2008-10-30', '2009-02-15', '2009-04-01'];
+		result = extendedInternalRateOfReturn([-10000, 2750, 4250, 3250, 2750], dates);
+		self.assertTrue(result.converged);
+		self.assertAlmostEqual(result.rate, 37.3363, 4);
+	
+	def testExtendedInternalRateOfReturnMatchesComplexYieldFromDays(self):
+		result = extendedInternalRateOfReturn([-100, 112.23], ['2020-01-01', '2020-06-30'], 360);
+		self.assertAlmostEqual(result.rate, complexYieldFromDays(100, 112.23, 181, 360), 8);
+	
+	def testExtendedInternalRateOfReturnCacheWarmStarts(self):
+		dates = numpy.datetime64('2015-01-01') + numpy.arange(0, 30 * 40, 30);
+		cashflows = [-50000] + [600 + 10 * (i % 7) for i in range(1, 40)];
+		cache = ExtendedInternalRateOfReturnCache();
+		cold = cache.solve('fund', cashflows[:30], dates[:30]);
+		for i in range(30, 40):
+			warm = cache.appendCashflow('fund', cashflows[i], dates[i]);
+			fresh = extendedInternalRateOfReturn(cashflows[:i + 1], dates[:i + 1]);
+			self.assertTrue(warm.converged);
+			self.assertTrue(warm.iterations < fresh.iterations);
+			self.assertAlmostEqual(warm.rate, fresh.rate, 8);
+		self.assertAlmostEqual(cache.rate('fund'), warm.rate, 12);
+		self.assertTrue('fund' in cache);
+		self.assertTrue(cold.converged);
+		self.assertTrue(cold.iterations > warm.iterations);
+
+	def testExtendedInternalRateOfReturnCountsStepsTaken(self):
+		cashflows = [-1000, 300, 400, 500];
+		dates = ['2020-01-01', '2021-01-01', '2022-01-01', '2023-01-01'];
+		newton = extendedInternalRateOfReturn(cashflows, dates);
+		fallback = extendedInternalRateOfReturn(cashflows, dates, guess=-150.0);
+		self.assertTrue(fallback.converged);
+		self.assertAlmostEqual(fallback.rate, newton.rate, 8);
+		self.assertTrue(fallback.iterations < 100);
 
 testSuite = unittest.TestLoader().loadTestsFromTestCase(TimeValueOfMoneyTests);
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development"
+__version__ = "0.1.0"
+import sys
+import os
+import time
+
+import numpy
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), 'Scripts' ))
+
+from QDFinCurve import YieldCurve
+from QDFinCurve import Deposit
+from QDFinCurve import ForwardRateAgreement
+from QDFinCurve import InterestRateFuture
+from QDFinCurve import CurveBond
+from QDFinCurve import QUOTE_FIELDS
+
+# Compare rebuilding a yield curve from scratch on every market data tick against updating the one quote that ticked, for a
+#	stream of random ticks on a curve of deposits, FRAs, a strip of futures and bonds.  Prints the ticks per second and the
+#	latency of each approach against a target rate of 1000 ticks per second, and checks both end up with the same curve.
+TICKS = 5000;
+TARGET_TICKS_PER_SECOND = 1000;
+
+def benchmarkInstruments():
+	instruments = [Deposit(3.9 + 0.01 * days / 30, days) for days in [1, 7, 14, 30, 61, 91]];
+	instruments += [ForwardRateAgreement(4.3, 91, 182), ForwardRateAgreement(4.4, 91, 273)];
+	instruments += [InterestRateFuture(95.6 - 0.05 * contract, 273 + 91 * contract, 364 + 91 * contract) for contract in range(12)];
+	instruments += [CurveBond(4 + 0.1 * years, 4.4 + 0.05 * years, 2, 2 * years, 45) for years in [4, 5, 7, 10, 15, 20, 30]];
+	return instruments;
+
+def tickStream(curve, count, seed=0):
+	# Random (index, quote) ticks, moving a quote a little each time.
+	random = numpy.random.default_rng(seed);
+	quotes = [getattr(instrument, QUOTE_FIELDS[type(instrument)]) for instrument in curve.instruments];
+	ticks = [];
+	for index in random.integers(len(quotes), size=count):
+		quotes[index] += random.normal(0.0, 0.005);
+		ticks.append((int(index), quotes[index]));
+	return ticks;
+
+def runFull(instruments, ticks):
+	latencies = numpy.empty(len(ticks));
+	curve = YieldCurve(instruments);
+	for tick, (index, quote) in enumerate(ticks):
+		start = time.perf_counter();
+		instrument = instruments[index];
+		instruments[index] = instrument._replace(**{QUOTE_FIELDS[type(instrument)]: quote});
+		curve = YieldCurve(instruments);
+		latencies[tick] = time.perf_counter() - start;
+	return curve, latencies;
+
+def runIncremental(curve, ticks):
+	latencies = numpy.empty(len(ticks));
+	for tick, (index, quote) in enumerate(ticks):
+		start = time.perf_counter();
+		curve.updateQuote(index, quote);
+		latencies[tick] = time.perf_counter() - start;
+	return curve, latencies;
+
+def report(name, latencies):
+	print(name + ": " + str(int(len(latencies) / numpy.sum(latencies))) + " ticks/s, mean " + str(round(numpy.mean(latencies) * 1e6, 1)) +
+		"us, 99% " + str(round(numpy.percentile(latencies, 99) * 1e6, 1)) + "us, " + str(round(100 * numpy.sum(latencies) * TARGET_TICKS_PER_SECOND / len(latencies), 1)) +
+		"% of the time at " + str(TARGET_TICKS_PER_SECOND) + " ticks/s");
+
+if __name__ == "__main__":
+	curve = YieldCurve(benchmarkInstruments());
+	ticks = tickStream(curve, TICKS);
+	print(str(len(curve)) + " instruments in " + str(len(curve.stages)) + " stages, " + str(TICKS) + " ticks");
+
+	fullCurve, fullLatencies = runFull(list(curve.instruments), ticks);
+	incrementalCurve, incrementalLatencies = runIncremental(curve, ticks);
+	report("Full rebuild", fullLatencies);
+	report("Incremental", incrementalLatencies);
+	print("Same curve: " + str(numpy.array_equal(fullCurve.logDiscountFactors, incrementalCurve.logDiscountFactors)) + ", version " + str(incrementalCurve.version));
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#
+#   Copyright 2018 Nic Ho Chee
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+__author__ = "Nic Ho Chee"
+__copyright__ = "Copyright 2018 Nic Ho Chee"
+__credits__ = ["Nic Ho Chee"]
+__license__ = "Apache License 2.0"
+__maintainer__ = "Nic Ho Chee"
+__twitter__ = "@funcrandm"
+__email__ = "dev@bedtimecomics.com"
+__status__ = "Development"
+__version__ = "0.1.0"
+import sys
+import os
+import time
+
+import numpy
+
+sys.path.append( os.path.join( os.path.dirname( __file__ ), 'Scripts' ))
+
+from QDFinConstants import ACT360_DAYS_IN_YEAR
+
+from QDFinTimeValueMoney import enableDiscountFactorCache
+from QDFinTimeValueMoney import disableDiscountFactorCache
+from QDFinTimeValueMoney import simpleDiscountFactor
+from QDFinTimeValueMoney import uncachedSimpleDiscountFactor
+
+from QDFinMoneyMarket import certificateOfDepositSecondaryMarketPrice
+
+from QDFinInterestRateInstruments import bondDuration
+
+# Compare the discount factor functions and the pricing built on them with the discount factor cache off and on.  The books are
+#	revalued a number of times against a grid of quoted yields, so the same (yield, days) factors come up again and again, which
+#	is the case the cache is for.  Prints the time per call or per revaluation each way and checks the cache gives the same values.
+CALLS = 100000;
+REPEATS = 7;
+
+def timePerCall(function, args, count=CALLS):
+	start = time.perf_counter();
+	for item in range(count):
+		function(*args);
+	return (time.perf_counter() - start) / count;
+
+def cdBook(size, seed=0):
+	random = numpy.random.default_rng(seed);
+	proceeds = [float(value) for value in random.uniform(1e5, 1e7, size)];
+	yields = [float(value) for value in numpy.round(random.uniform(3.0, 6.0, size), 2)];
+	days = [int(value) for value in random.integers(1, 366, size)];
+	return list(zip(proceeds, yields, days));
+
+def bondBook(size, seed=1):
+	random = numpy.random.default_rng(seed);
+	bonds = [];
+	for item in range(size):
+		years = int(random.integers(2, 31));
+		coupon = float(numpy.round(random.uniform(2.0, 8.0), 2));
+		bonds.append((float(numpy.round(random.uniform(3.0, 6.0), 2)), [coupon] * (years - 1) + [100 + coupon], list(range(1, years + 1))));
+	return bonds;
+
+def revalue(cds, bonds):
+	prices = [certificateOfDepositSecondaryMarketPrice(proceeds, marketYield, days, ACT360_DAYS_IN_YEAR()) for proceeds, marketYield, days in cds];
+	durations = [bondDuration(marketYield, cashflows, years) for marketYield, cashflows, years in bonds];
+	return prices, durations;
+
+def timeRevaluation(cds, bonds):
+	start = time.perf_counter();
+	values = revalue(cds, bonds);
+	return time.perf_counter() - start, values;
+
+def bestOfRepeats(run):
+	# The machine is shared, so run each way several times and keep the best time of each.  The cache is switched on once, so
+	#	after the first run with it on the same factors are already held, as for a book revalued through the day.
+	best = {};
+	disableDiscountFactorCache();
+	best["off"] = min((run() for repeat in range(REPEATS)), key=lambda result: result[0]);
+	cache = enableDiscountFactorCache();
+	best["on"] = min((run() for repeat in range(REPEATS)), key=lambda result: result[0]);
+	disableDiscountFactorCache();
+	return best, cache.statistics();
+
+def report(name, results):
+	best, statistics = results;
+	off = best["off"][0];
+	on = best["on"][0];
+	print(name + ": cache off " + str(round(off * 1e6, 3)) + "us, cache on " + str(round(on * 1e6, 3)) + "us, " + str(round(off / on, 2)) + "x, same values: " +
+		str(best["off"][1] == best["on"][1]) + ", hit rate " + str(round(100 * statistics['hitRate'], 1)) + "%, " + str(statistics['size']) + " factors");
+
+if __name__ == "__main__":
+	args = (5.25, 90, 360);
+	formula = min(timePerCall(uncachedSimpleDiscountFactor, args) for repeat in range(REPEATS));
+	print("uncachedSimpleDiscountFactor: " + str(round(formula * 1e6, 3)) + "us");
+	report("simpleDiscountFactor", bestOfRepeats(lambda: (timePerCall(simpleDiscountFactor, args), simpleDiscountFactor(*args))));
+
+	cds = cdBook(20000);
+	bonds = bondBook(2000);
+	report("Book revaluation (" + str(len(cds)) + " CDs, " + str(len(bonds)) + " bonds)", bestOfRepeats(lambda: timeRevaluation(cds, bonds)));
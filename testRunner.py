@@ -29,15 +29,31 @@ import sys
 
 sys.path.append('Tests') # noqa: E703
 
+from test_QDFinAmortisation import AmortisationTests
+from test_QDFinCalendar import CalendarTests
+from test_QDFinCurve import CurveTests
+from test_QDFinDayCount import DayCountTests
+from test_QDFinDiscountFactorCache import DiscountFactorCacheTests
 from test_QDFinInterest import InterestTests
 from test_QDFinInterestRateInstruments import InterestRateInstrumentsTests
 from test_QDFinMoneyMarket import MoneyMarketTests
+from test_QDFinMonteCarlo import MonteCarloTests
+from test_QDFinOptions import OptionsTests
+from test_QDFinPriceHistory import PriceHistoryTests
 from test_QDFinStatistics import StatisticsTests
 from test_QDFinTimeValueMoney import TimeValueOfMoneyTests
 
-testSuite = unittest.TestLoader().loadTestsFromTestCase(InterestTests)
+testSuite = unittest.TestLoader().loadTestsFromTestCase(AmortisationTests)
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(CalendarTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(CurveTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(DayCountTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(DiscountFactorCacheTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(InterestTests))
 testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(InterestRateInstrumentsTests))
 testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(MoneyMarketTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(MonteCarloTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(OptionsTests))
+testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(PriceHistoryTests))
 testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(StatisticsTests))
 testSuite.addTest(unittest.TestLoader().loadTestsFromTestCase(TimeValueOfMoneyTests))
 